@@ -0,0 +1,53 @@
+"""Benchmark the diff engines on normalized text with a few scattered edits.
+
+    python benchmarks/bench_diff.py [--size-mb 1] [--edits 10]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_normalize import make_text  # noqa: E402
+from textvalid.diffing import ENGINES  # noqa: E402
+from textvalid.engine import normalize_text  # noqa: E402
+
+
+def edit(text, edits, seed=2):
+    rng = random.Random(seed)
+    chars = list(text)
+    for _ in range(edits):
+        pos = rng.randrange(len(chars))
+        op = rng.random()
+        if op < 0.4:
+            chars[pos] = "X"
+        elif op < 0.7:
+            chars.insert(pos, "Y")
+        else:
+            del chars[pos]
+    return "".join(chars)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=1, help="Text size in millions of characters")
+    parser.add_argument("--edits", type=int, default=10)
+    parser.add_argument("--engines", default=",".join(sorted(ENGINES)))
+    args = parser.parse_args()
+
+    norm_a, _ = normalize_text(make_text(int(args.size_mb * 1_000_000)))
+    norm_b = edit(norm_a, args.edits)
+    print(f"{len(norm_a)} normalized chars, {args.edits} edits")
+    for name in args.engines.split(","):
+        start = time.perf_counter()
+        opcodes = ENGINES[name]().opcodes(norm_a, norm_b)
+        elapsed = time.perf_counter() - start
+        changed = sum(1 for op in opcodes if op[0] != "equal")
+        print(f"{name:8s} {elapsed:8.3f}s  {changed} changed regions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
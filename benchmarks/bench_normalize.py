@@ -0,0 +1,107 @@
+"""Benchmark normalize_text against the original per-character loop.
+
+    python benchmarks/bench_normalize.py [--size-mb 5] [--repeat 3]
+
+Also measures how long a main thread ticking every TICK seconds (as the Tk
+event loop does) is held up while another thread normalizes the text, with
+one normalize_text() call and with normalize_in_slices().
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import unicodedata
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textvalid.engine import normalize_in_slices, normalize_text  # noqa: E402
+
+TICK = 0.01  # Seconds between the main thread's ticks
+PUNCTUATION = "，。、；：？！「」『』（）　 \n"
+
+
+def legacy_normalize_text(text):
+    """The original TextValidApp.normalize_text loop, kept as the reference."""
+    normalized = []
+    mapping = []
+    for i, char in enumerate(text):
+        cat = unicodedata.category(char)
+        if not (cat.startswith('P') or cat.startswith('Z') or cat.startswith('C')):
+            normalized.append(char)
+            mapping.append(i)
+    return "".join(normalized), mapping
+
+
+def make_text(size_chars, seed=1):
+    """Punctuated CJK text with a sprinkling of astral ideographs."""
+    rng = random.Random(seed)
+    han = [chr(c) for c in range(0x4E00, 0x4E00 + 3000)] + ["\U00020000", "\U0002A700"]
+    parts = []
+    n = 0
+    while n < size_chars:
+        k = rng.randint(3, 12)
+        parts.append("".join(rng.choices(han, k=k)))
+        parts.append(rng.choice(PUNCTUATION))
+        n += k + 1
+    return "".join(parts)
+
+
+def best_of(func, text, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def worst_tick(normalize, text):
+    """Longest gap, in seconds, between main-thread ticks while a thread runs normalize(text)."""
+    worker = threading.Thread(target=normalize, args=(text,))
+    worst = 0
+    last = time.perf_counter()
+    worker.start()
+    while worker.is_alive():
+        time.sleep(TICK)
+        now = time.perf_counter()
+        worst = max(worst, now - last - TICK)
+        last = now
+    worker.join()
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=5, help="Text size in millions of characters")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = make_text(int(args.size_mb * 1_000_000))
+    normalize_text("")  # build the code-point table outside the timed region
+
+    legacy_time, expected = best_of(legacy_normalize_text, text, args.repeat)
+    new_time, actual = best_of(normalize_text, text, args.repeat)
+    if actual[0] != expected[0] or list(actual[1]) != expected[1]:
+        print("MISMATCH: normalize_text differs from the reference loop")
+        return 1
+
+    chars = len(text)
+    print(f"{chars} chars")
+    print(f"legacy loop    {legacy_time:8.3f}s  {chars / legacy_time / 1e6:8.2f} Mchar/s")
+    print(f"normalize_text {new_time:8.3f}s  {chars / new_time / 1e6:8.2f} Mchar/s")
+    print(f"speedup        {legacy_time / new_time:8.2f}x")
+    sliced_time, sliced = best_of(normalize_in_slices, text, args.repeat)
+    if sliced[0] != actual[0] or list(sliced[1]) != list(actual[1]):
+        print("MISMATCH: normalize_in_slices differs from normalize_text")
+        return 1
+    print(f"in slices      {sliced_time:8.3f}s  {chars / sliced_time / 1e6:8.2f} Mchar/s")
+    print(f"worst UI tick delay on a background thread: one call {worst_tick(normalize_text, text) * 1000:.0f} ms, "
+          f"in slices {worst_tick(normalize_in_slices, text) * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""Scaling of compare_texts() with a ParallelPool of 1/2/4/8 workers.
+
+    python benchmarks/bench_parallel.py [--size-mb 20] [--edits 2000] [--workers 1,2,4,8]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_diff import edit  # noqa: E402
+from bench_normalize import make_text  # noqa: E402
+from textvalid.engine import compare_texts  # noqa: E402
+from textvalid.parallel import ParallelPool  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=20, help="Text size in millions of characters")
+    parser.add_argument("--edits", type=int, default=2000)
+    parser.add_argument("--workers", default="1,2,4,8")
+    args = parser.parse_args()
+
+    text_a = make_text(int(args.size_mb * 1_000_000))
+    text_b = edit(text_a, args.edits)
+    print(f"{len(text_a)} chars, {args.edits} edits, {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    expected = compare_texts(text_a, text_b).opcodes
+    baseline = time.perf_counter() - start
+    print(f"in-process   {baseline:8.3f}s")
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        with ParallelPool(workers) as pool:
+            pool.warm_up()
+            start = time.perf_counter()
+            opcodes = compare_texts(text_a, text_b, pool=pool).opcodes
+            elapsed = time.perf_counter() - start
+        status = "" if opcodes == expected else "  MISMATCH"
+        print(f"{workers} workers    {elapsed:8.3f}s  {baseline / elapsed:5.2f}x{status}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
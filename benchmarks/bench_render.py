@@ -0,0 +1,114 @@
+"""Benchmark rendering a DiffResult into two Tk Text panes.
+
+    python benchmarks/bench_render.py [--size-mb 1] [--edits 5000]
+
+Compares the old per-segment inserts (one Text.insert per segment plus
+padding and "end-1c" lookups around every difference) with what the GUI
+does now: render.build_rows() once, then materialize a window of
+WINDOW_ROWS rows per pane with batched tag_add calls, here at a few points
+through the text as when scrolling. Without a display only build_rows()
+and the window contents are timed.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_diff import edit  # noqa: E402
+from bench_normalize import make_text  # noqa: E402
+from textvalid.engine import compare_texts  # noqa: E402
+from textvalid.render import SEGMENT_TAGS, TAG_BATCH, WINDOW_ROWS, build_rows  # noqa: E402
+
+WINDOWS = 10  # Windows materialized through the text
+
+
+def legacy_render(result, text_a, text_b):
+    """The per-segment rendering that main.py used before display rows."""
+    def insert_and_sync(content_a, content_b, tag_a, tag_b):
+        if content_a:
+            text_a.insert("end", content_a, tag_a)
+        if content_b:
+            text_b.insert("end", content_b, tag_b)
+        newlines = content_a.count('\n') - content_b.count('\n')
+        if newlines > 0:
+            text_b.insert("end", '\n' * newlines)
+        elif newlines < 0:
+            text_a.insert("end", '\n' * -newlines)
+
+    marks = []
+    for segment in result.segments():
+        chunk_a = result.text_a[segment.start_a:segment.end_a]
+        chunk_b = result.text_b[segment.start_b:segment.end_b]
+        tag_a, tag_b = SEGMENT_TAGS[segment.tag]
+        if segment.tag in ("equal", "ignored"):
+            insert_and_sync(chunk_a, chunk_b, tag_a, tag_b)
+            continue
+        start_a, start_b = text_a.index("end-1c"), text_b.index("end-1c")
+        insert_and_sync(chunk_a, chunk_b, tag_a, tag_b)
+        marks.append((start_a, text_a.index("end-1c"), start_b, text_b.index("end-1c")))
+    return marks
+
+
+def window_starts(rows):
+    """First rows of WINDOWS windows spread through the longer pane."""
+    total = max(len(pane) for pane in rows)
+    return [k * max(0, total - WINDOW_ROWS) // max(1, WINDOWS - 1) for k in range(WINDOWS)]
+
+
+def window_render(rows, text_a, text_b):
+    """Materialize each window in both panes, replacing the previous one."""
+    for first in window_starts(rows):
+        for widget, pane in zip((text_a, text_b), rows):
+            content, tags = pane.window(first, min(len(pane), first + WINDOW_ROWS))
+            widget.delete("1.0", "end")
+            widget.insert("1.0", content)
+            for tag, indices in tags.items():
+                for i in range(0, len(indices), 2 * TAG_BATCH):
+                    widget.tag_add(tag, *indices[i:i + 2 * TAG_BATCH])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=1, help="Text size in millions of characters")
+    parser.add_argument("--edits", type=int, default=5000)
+    args = parser.parse_args()
+
+    text_a = make_text(int(args.size_mb * 1_000_000))
+    result = compare_texts(text_a, edit(text_a, args.edits))
+    differences = sum(1 for segment in result.segments() if segment.tag not in ("equal", "ignored"))
+    print(f"{len(text_a)} chars, {args.edits} edits, {differences} differences")
+
+    start = time.perf_counter()
+    rows = build_rows(result)
+    print(f"build_rows   {time.perf_counter() - start:8.3f}s  {len(rows[0])} / {len(rows[1])} rows")
+    start = time.perf_counter()
+    for first in window_starts(rows):
+        for pane in rows:
+            pane.window(first, min(len(pane), first + WINDOW_ROWS))
+    print(f"{WINDOWS} windows   {time.perf_counter() - start:8.3f}s  (contents only)")
+
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:  # No display, or Tk not installed
+        print(f"Tk rendering skipped: {e}")
+        return 0
+    root.withdraw()
+    renders = (("per-segment", lambda a, b: legacy_render(result, a, b)),
+               ("rows+windows", lambda a, b: window_render(build_rows(result), a, b)))
+    for name, render in renders:
+        text_a, text_b = tk.Text(root), tk.Text(root)
+        start = time.perf_counter()
+        render(text_a, text_b)
+        root.update_idletasks()
+        print(f"{name:12s} {time.perf_counter() - start:8.3f}s")
+        text_a.destroy()
+        text_b.destroy()
+    root.destroy()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""Benchmark suite over synthetic classical-Chinese pairs, with baselines.
+
+    python benchmarks/bench_suite.py [--sizes 10KB,1MB,10MB] [--patterns ...] [--ops ...]
+                                     [--repeat 3] [--no-memory] [--save-baseline]
+
+Every (operation, pattern, size) case runs on a pair from corpus.py and
+reports the best wall time of --repeat runs, the throughput in MB of
+source text per second and, in one extra run under tracemalloc, the peak
+traced memory. Operations:
+
+    normalize   normalize_text on both texts
+    diff        compare_texts in the automatic mode
+    summary     compare_texts in summary mode
+    render      build_rows, the first log page and one pane window: what
+                the GUI computes before anything reaches Tk
+    verify      verify_files (streaming) on the pair written to disk
+
+With --save-baseline the results are written to baselines.json next to
+this file. Otherwise they are compared with the saved ones and any case
+that got more than --tolerance slower, or needs that much more memory, is
+reported as a regression and the exit status is 1. Baselines are only
+meaningful on the machine that recorded them; a mismatch is warned about.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import PATTERNS, format_size, make_pair, parse_size  # noqa: E402
+from textvalid.difflog import DifferenceLog  # noqa: E402
+from textvalid.engine import MODE_SUMMARY, compare_texts, normalize_text  # noqa: E402
+from textvalid.render import build_rows  # noqa: E402
+from textvalid.verify import verify_files  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Changes below these are noise, whatever the ratio.
+MIN_SECONDS_DELTA = 0.05
+MIN_PEAK_DELTA = 1024 * 1024
+
+# Rows and log entries the GUI shows at once (main.WINDOW_ROWS, LOG_PAGE_SIZE).
+WINDOW_ROWS = 600
+LOG_PAGE_SIZE = 500
+
+
+def run_normalize(source, target, paths):
+    normalize_text(source)
+    normalize_text(target)
+
+
+def run_diff(source, target, paths):
+    compare_texts(source, target)
+
+
+def run_summary(source, target, paths):
+    compare_texts(source, target, mode=MODE_SUMMARY)
+
+
+def run_render(source, target, paths):
+    result = compare_texts(source, target)
+    rows_a, rows_b = build_rows(result)
+    difflog = DifferenceLog(result, limit=80)
+    for i in range(min(len(difflog), LOG_PAGE_SIZE)):
+        difflog.describe(i)
+    rows_a.window(0, min(len(rows_a), WINDOW_ROWS))
+    rows_b.window(0, min(len(rows_b), WINDOW_ROWS))
+
+
+def run_verify(source, target, paths):
+    verify_files(*paths)
+
+
+OPERATIONS = {
+    "normalize": run_normalize,
+    "diff": run_diff,
+    "summary": run_summary,
+    "render": run_render,
+    "verify": run_verify,
+}
+
+
+def measure(operation, source, target, paths, repeat, memory):
+    """(best seconds, peak traced bytes or None) of one case."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation(source, target, paths)
+        best = min(best, time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            operation(source, target, paths)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+
+def machine():
+    return {"platform": platform.platform(), "python": platform.python_version(),
+            "processor": platform.processor(), "cpus": os.cpu_count()}
+
+
+def regressions(results, baseline, tolerance):
+    """Lines describing every case worse than its baseline."""
+    found = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        seconds, old_seconds = current["seconds"], previous["seconds"]
+        if seconds > old_seconds * (1 + tolerance) and seconds - old_seconds > MIN_SECONDS_DELTA:
+            found.append(f"{key}: {old_seconds:.3f}s -> {seconds:.3f}s")
+        peak, old_peak = current.get("peak_bytes"), previous.get("peak_bytes")
+        if peak is not None and old_peak is not None \
+                and peak > old_peak * (1 + tolerance) and peak - old_peak > MIN_PEAK_DELTA:
+            found.append(f"{key}: peak {old_peak / 2 ** 20:.1f}MB -> {peak / 2 ** 20:.1f}MB")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10KB,1MB,10MB",
+                        help="Comma separated sizes per file, 10KB up to 500MB")
+    parser.add_argument("--patterns", default=",".join(PATTERNS))
+    parser.add_argument("--ops", default=",".join(OPERATIONS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed slowdown (0.3 = 30%%)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    patterns = args.patterns.split(",")
+    ops = args.ops.split(",")
+    for name in ops:
+        if name not in OPERATIONS:
+            parser.error(f"unknown operation: {name}")
+    for name in patterns:
+        if name not in PATTERNS:
+            parser.error(f"unknown pattern: {name}")
+
+    normalize_text("")  # Build the normalization tables outside the timings
+    results = {}
+    print(f"{'case':40s} {'seconds':>9s} {'MB/s':>8s} {'peak MB':>8s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            for pattern in patterns:
+                source, target = make_pair(size, pattern, args.seed)
+                paths = None
+                if "verify" in ops:
+                    paths = (os.path.join(tmp, "source.txt"), os.path.join(tmp, "target.txt"))
+                    for path, text in zip(paths, (source, target)):
+                        with open(path, 'w', encoding='utf-8') as f:
+                            f.write(text)
+                megabytes = len(source.encode('utf-8')) / 2 ** 20
+                for name in ops:
+                    seconds, peak = measure(OPERATIONS[name], source, target, paths,
+                                            args.repeat, not args.no_memory)
+                    key = f"{name}/{pattern}/{format_size(size)}"
+                    results[key] = {"seconds": seconds, "peak_bytes": peak}
+                    peak_text = f"{peak / 2 ** 20:8.1f}" if peak is not None else f"{'-':>8s}"
+                    print(f"{key:40s} {seconds:9.3f} {megabytes / seconds:8.1f} {peak_text}")
+                del source, target
+
+    if args.save_baseline:
+        saved = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                saved = json.load(f).get("results", {})
+        saved.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({"machine": machine(), "results": saved}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with; run with --save-baseline first")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get("machine") != machine():
+        print("Warning: the baseline was recorded on a different machine or Python")
+    found = regressions(results, baseline.get("results", {}), args.tolerance)
+    for line in found:
+        print(f"REGRESSION {line}")
+    if not found:
+        print("No regressions against the baseline")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""Synthetic classical-Chinese corpus and source/target pairs for benchmarks.
+
+    python benchmarks/corpus.py SIZE PATTERN OUTDIR [--seed 1]
+
+The text is built from four- to seven-character phrases over a
+Zipf-weighted vocabulary of common classical characters (with a tail of
+rarer CJK and a few astral ideographs), joined by ，、；：。 and 「」 and
+broken into paragraphs. Everything is derived from the seed, so a given
+(size, pattern, seed) always produces the same pair.
+
+Patterns (how the target differs from the source):
+
+    punctuation     punctuation changed, added or dropped only; the pair is
+                    identical after normalization
+    substitutions   scattered single-character substitutions
+    early-insert    a phrase inserted near the start, which shifts every
+                    fixed-offset chunk after it
+    block-moves     a few paragraphs cut out and pasted elsewhere
+    single-line     no line breaks at all, plus scattered substitutions
+"""
+import argparse
+import itertools
+import os
+import random
+import re
+import sys
+
+# Common classical characters, most frequent first.
+COMMON = ("之不也而以其人者曰於子為有天下無所此吾與乎矣則王公大夫君臣民事道德仁義禮"
+          "樂知言行見聞使得欲可能將至若如何乃故今古上中心生死日月年時國家"
+          "兵師戰勝敗正治亂法令賢聖明善惡利害學問文武山水地氣物皆亦焉哉且既")
+RARE = "".join(chr(c) for c in range(0x4E00, 0x4E00 + 4000, 3))
+ASTRAL = "\U00020000\U00020001\U0002A700\U0002B740"
+
+PHRASE_BREAKS = "，，，，、；：。。"
+SENTENCE_ENDS = "。？！"
+
+PATTERNS = ("punctuation", "substitutions", "early-insert", "block-moves", "single-line")
+
+_SIZE_RE = re.compile(r"(?i)^\s*(\d+(?:\.\d+)?)\s*(B|KB|MB|GB)?\s*$")
+_UNITS = {None: 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+# Distinct phrases the text is assembled from.
+_POOL_SIZE = 50_000
+
+
+def parse_size(text):
+    """'10KB', '1.5MB', '500MB' -> bytes."""
+    match = _SIZE_RE.match(text)
+    if not match:
+        raise ValueError(f"Not a size: {text!r}")
+    number, unit = match.groups()
+    return int(float(number) * _UNITS[unit.upper() if unit else None])
+
+
+def format_size(size):
+    for unit in ("GB", "MB", "KB"):
+        if size >= _UNITS[unit] and size % _UNITS[unit] == 0:
+            return f"{size // _UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def _phrase_pool(rng):
+    vocabulary = list(COMMON) + list(RARE) + list(ASTRAL)
+    # Zipf-like weights: the common characters dominate, as in real texts
+    weights = [1 / (rank + 1) for rank in range(len(COMMON))]
+    weights += [0.2 / len(COMMON)] * len(RARE) + [0.05 / len(COMMON)] * len(ASTRAL)
+    cum_weights = list(itertools.accumulate(weights))
+    pool = []
+    for _ in range(_POOL_SIZE):
+        phrase = "".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.choice((4, 4, 4, 5, 6, 7))))
+        if rng.random() < 0.03:
+            phrase = f"「{phrase}」"
+        pool.append(phrase + rng.choice(PHRASE_BREAKS))
+    return pool
+
+
+def make_source(size_bytes, seed=1, line_breaks=True):
+    """Classical-Chinese-like text of about size_bytes bytes in UTF-8."""
+    rng = random.Random(seed)
+    pool = _phrase_pool(rng)
+    # Nearly every character is three bytes in UTF-8
+    target = max(1, size_bytes // 3)
+    blocks = []
+    length = 0
+    while length < target:
+        picked = rng.choices(pool, k=min(100_000, target // 5 + 1))
+        if line_breaks:
+            # End a paragraph every 40 phrases or so
+            for i in range(rng.randrange(40), len(picked), 40):
+                picked[i] = picked[i][:-1] + rng.choice(SENTENCE_ENDS) + "\n"
+        blocks.append("".join(picked))
+        length += len(blocks[-1])
+    return "".join(blocks)[:target]
+
+
+def _splice(text, edits):
+    """Apply (position, delete_count, insert_text) edits, given in any order."""
+    pieces = []
+    pos = 0
+    for at, delete, insert in sorted(edits):
+        if at < pos:
+            continue
+        pieces.append(text[pos:at])
+        pieces.append(insert)
+        pos = at + delete
+    pieces.append(text[pos:])
+    return "".join(pieces)
+
+
+def _edit_count(text):
+    return max(1, len(text) // 5000)
+
+
+def _punctuation_edits(text, rng):
+    marks = [m.start() for m in re.finditer("[，、；：。？！]", text)]
+    edits = []
+    for at in rng.sample(marks, min(len(marks), _edit_count(text) * 4)):
+        op = rng.random()
+        if op < 0.5:
+            edits.append((at, 1, rng.choice("，。；、")))
+        elif op < 0.75:
+            edits.append((at, 1, ""))
+        else:
+            edits.append((at, 0, rng.choice("「」，　")))
+    return edits
+
+
+def _substitutions(text, rng):
+    edits = []
+    for _ in range(_edit_count(text)):
+        at = rng.randrange(len(text))
+        if text[at] not in PHRASE_BREAKS + SENTENCE_ENDS + "\n「」":
+            edits.append((at, 1, rng.choice(COMMON)))
+    return edits
+
+
+def make_target(source, pattern, seed=1):
+    rng = random.Random(seed + 1000)
+    if pattern == "punctuation":
+        return _splice(source, _punctuation_edits(source, rng))
+    if pattern == "substitutions" or pattern == "single-line":
+        return _splice(source, _substitutions(source, rng))
+    if pattern == "early-insert":
+        at = min(len(source), 100)
+        return source[:at] + "天下之事" + source[at:]
+    if pattern == "block-moves":
+        # Move a few whole paragraphs, as an editor reordering passages would
+        text = source
+        for _ in range(3):
+            start = text.find("\n", rng.randrange(len(text))) + 1
+            end = text.find("\n", start) + 1
+            if not 0 < start < end:
+                continue
+            moved = text[start:end]
+            text = text[:start] + text[end:]
+            at = text.find("\n", rng.randrange(len(text))) + 1
+            text = text[:at] + moved + text[at:]
+        return text
+    raise ValueError(f"Unknown pattern: {pattern}")
+
+
+def make_pair(size_bytes, pattern, seed=1):
+    """(source, target) texts of about size_bytes each for an edit pattern."""
+    source = make_source(size_bytes, seed, line_breaks=pattern != "single-line")
+    return source, make_target(source, pattern, seed)
+
+
+def write_pair(size_bytes, pattern, directory, seed=1):
+    """Write the pair as UTF-8 files; returns their paths."""
+    os.makedirs(directory, exist_ok=True)
+    source, target = make_pair(size_bytes, pattern, seed)
+    stem = os.path.join(directory, f"{pattern}-{format_size(size_bytes)}-{seed}")
+    paths = (stem + "-source.txt", stem + "-target.txt")
+    for path, text in zip(paths, (source, target)):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("size", help="Approximate size per file, e.g. 10KB, 5MB, 500MB")
+    parser.add_argument("pattern", choices=PATTERNS)
+    parser.add_argument("outdir")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    for path in write_pair(parse_size(args.size), args.pattern, args.outdir, args.seed):
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Load-test the HTTP validation service on localhost.
+
+    python benchmarks/load_test.py [--requests 200] [--concurrency 8] [--size-kb 50]
+    python benchmarks/load_test.py --url http://127.0.0.1:8765
+
+Without --url a service is started in this process on a free port. Every
+request compares one of a few sources with an edited copy, so the sources
+stay warm in the workers after their first use. Prints the status counts,
+throughput and latency percentiles seen by the clients, then the service's
+own /stats; the exit code is 1 if any request failed other than by being
+refused (503).
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_diff import edit  # noqa: E402
+from bench_normalize import make_text  # noqa: E402
+from textvalid.service import ValidationService, make_server  # noqa: E402
+
+
+def post(url, body, timeout):
+    """(HTTP status, seconds) of one POST."""
+    request = urllib.request.Request(url + "/compare", data=body, headers={"Content-Type": "application/json"})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    except OSError:
+        status = "failed"
+    return status, time.perf_counter() - started
+
+
+def make_bodies(count, sources, size_chars, edits):
+    """count request bodies comparing one of sources texts with an edited copy."""
+    texts = [make_text(size_chars, seed=seed) for seed in range(sources)]
+    bodies = []
+    for i in range(count):
+        source = texts[i % sources]
+        target = edit(source, edits, seed=i) if edits else source
+        bodies.append(json.dumps({"source": source, "target": target, "max_differences": 100},
+                                 ensure_ascii=False).encode('utf-8'))
+    return bodies
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Service to test (default: start one in this process)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8, help="Clients sending requests at once")
+    parser.add_argument("--size-kb", type=float, default=50, help="Source size in thousands of characters")
+    parser.add_argument("--sources", type=int, default=4, help="Distinct sources the requests use")
+    parser.add_argument("--edits", type=int, default=10, help="Edits per target (0: identical)")
+    parser.add_argument("--workers", type=int, default=None, help="Workers of the started service")
+    parser.add_argument("--timeout", type=float, default=60, help="Client timeout per request, in seconds")
+    args = parser.parse_args()
+
+    bodies = make_bodies(args.requests, args.sources, int(args.size_kb * 1000), args.edits)
+    service = server = None
+    url = args.url
+    if url is None:
+        service = ValidationService(workers=args.workers)
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        service.warm_up()
+        url = f"http://127.0.0.1:{server.server_port}"
+    url = url.rstrip("/")
+    print(f"{args.requests} requests of ~{args.size_kb:g}k characters, {args.concurrency} at once, to {url}")
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as clients:
+            results = list(clients.map(lambda body: post(url, body, args.timeout), bodies))
+        elapsed = time.perf_counter() - started
+        with urllib.request.urlopen(url + "/stats", timeout=args.timeout) as response:
+            stats = json.load(response)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            service.close()
+
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    ordered = sorted(seconds for status, seconds in results if status == 200)
+    print("Statuses: " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items(), key=str)))
+    print(f"Throughput: {len(ordered) / elapsed:.1f} answered requests/s over {elapsed:.2f}s")
+    if ordered:
+        print("Latency (ms): " + ", ".join(f"{name} {percentile(ordered, fraction) * 1000:.1f}"
+                                           for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99),
+                                                                  ("max", 1))))
+    print("Service stats: " + json.dumps(stats))
+    # Refusals (503) are the service's backpressure working, not failures
+    return 1 if any(status not in (200, 503) for status in statuses) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,31 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from tkinterdnd2 import DND_FILES, TkinterDnD
-import difflib
+import multiprocessing
 import os
-import re
-import unicodedata
 import platform
+import queue
+import threading
+import time
 import traceback
 import logging
+from contextlib import nullcontext
+from array import array
+from bisect import bisect_right
+
+from textvalid.batch import STATUS_DIFFERENT, describe_result, pair_directories, run_batch, summarize_batch
+from textvalid.cache import ResultCache, default_cache_dir
+from textvalid.difflog import DifferenceLog
+from textvalid.document import LoadedDocument, compare_documents
+from textvalid.engine import MODE_CHUNKED, MODE_SUMMARY, SUMMARY_MODE_SIZE, read_text
+from textvalid.instrument import Instrumentation, InstrumentedProgress
+from textvalid.multi import SourceIndex, compare_targets, format_ranking, rank_targets
+from textvalid.parallel import ParallelPool
+from textvalid.progress import Cancelled, QueueProgress
+from textvalid.render import TAG_BATCH, WINDOW_ROWS, RowModel, build_rows
+from textvalid.report import export_report
+from textvalid.verify import describe_mismatch, verify_files
+from textvalid.watch import FileWatcher, update_result
 
 # Configure logging
 logging.basicConfig(filename='debug.log', level=logging.DEBUG, 
@@ -19,10 +37,24 @@ CMD_KEY = "Command" if IS_MAC else "Control"
 CMD_KEY_NAME = "Cmd" if IS_MAC else "Ctrl"
 
 # File size limits (in bytes)
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB hard limit
-WARN_FILE_SIZE = 5 * 1024 * 1024  # 5MB warning threshold
-SUMMARY_MODE_SIZE = 5 * 1024 * 1024  # 5MB - use summary mode instead of full diff
-CHUNK_SIZE = 50000  # Compare in 50KB chunks to prevent freezing
+MAX_FILE_SIZE = 256 * 1024 * 1024  # 256MB - larger files are verified by streaming, not displayed
+WARN_FILE_SIZE = 50 * 1024 * 1024  # 50MB warning threshold
+
+WORKER_POLL_MS = 50  # How often the UI checks the comparison worker for news
+PARALLEL_FILE_SIZE = 2 * 1024 * 1024  # 2MB - use all cores above this combined size
+LOG_PAGE_SIZE = 500  # Differences listed in the log at a time
+# The panes only hold render.WINDOW_ROWS rows of the row model at a time, and
+# move that window once the view comes within WINDOW_MARGIN rows of its edge.
+WINDOW_MARGIN = 150
+# Rendering is time-sliced: a pane's first screen of rows and the first
+# entries of a log page go into Tk at once, the rest in batches from
+# root.after() callbacks that each stop after RENDER_SLICE_MS.
+FIRST_SCREEN_ROWS = 80
+FIRST_LOG_ENTRIES = 50
+RENDER_BATCH_ROWS = 40
+RENDER_BATCH_ENTRIES = 50
+RENDER_SLICE_MS = 15
+WATCH_POLL_MS = 1000  # How often watch mode checks the loaded files
 
 
 
@@ -31,10 +63,18 @@ class TextValidApp:
         self.root = root
         self.root.title("中文標點驗證")
         self.root.geometry("1200x850")
-        # Mapping from log entry tags to text indices for highlighting
-        self.log_mappings = {}
-        # Track currently highlighted range
-        self.current_highlight_tag = None
+        # Differences of the shown comparison (DifferenceLog), the log page
+        # listing them, the log line each listed entry starts on (plus the
+        # line after the last one), and the selected entry
+        self._difflog = None
+        self._log_page = 0
+        self._log_line_starts = array('I')
+        self._selected = None
+        # Whether the selected move is shown at its place in the target
+        self._move_target = False
+        # Entries [_log_next, _log_last) of the log page are still to be listed
+        self._log_next = 0
+        self._log_last = 0
         # Font size tracking
         self.text_font_size = 16
         self.log_font_size = 15
@@ -43,11 +83,47 @@ class TextValidApp:
 
         self.file_a_path = None
         self.file_b_path = None
+        # Decoded (and normalized) contents of the loaded files
+        self.doc_a = None
+        self.doc_b = None
         self._scrolling = False
+        # Row model shown by each pane, the rows [first, last) materialised
+        # in it so far, and the end of its window once fully rendered
+        self._rows = {}
+        self._window_first = {}
+        self._window_last = {}
+        self._window_end = {}
+        # Pending root.after() job rendering the rest of the panes and log
+        self._render_job = None
+        # Original offsets (start_a, end_a, start_b, end_b) of the selected difference
+        self._highlight = None
+        # Background comparison state
+        self._worker = None
+        self._worker_queue = queue.Queue()
+        self._worker_progress = None
+        # Process pool for large comparisons, started on first use
+        self._pool = None
+        # Timings of the running (or last) comparison when diagnostics are on
+        self._instrumentation = None
+        # Watch mode: the shown comparison, updated when the files change
+        self._result = None
+        self._watcher = None
+        self._watch_job = None
+        # Last batch run (BatchResults), (source path, normalized length) when
+        # it ranked targets against one source, and the log line of each
+        # failing pair listed in its report, plus the pairs themselves
+        self._batch = None
+        self._batch_ranking = None
+        self._batch_lines = array('I')
+        self._batch_failures = []
+        # Normalizations and diffs of earlier comparisons, keyed by content;
+        # in memory unless the Disk cache option is ticked
+        self._cache = ResultCache()
 
         self._setup_styles()
         self._setup_ui()
         self._bind_hotkeys()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
         # Bind click on log entries
         self.log_text.bind("<Button-1>", self._on_log_click)
 
@@ -94,6 +170,27 @@ class TextValidApp:
         self.btn_compare = ttk.Button(control_frame, text=f"Compare ({CMD_KEY_NAME}+Enter)", command=self.compare_files, state=tk.DISABLED, style="Large.TButton")
         self.btn_compare.grid(row=0, column=2, rowspan=2, padx=30, sticky="ns")
 
+        # Progress of a running comparison (stage name, bar and Cancel)
+        self.lbl_stage = ttk.Label(control_frame, text="", foreground="gray")
+        self.lbl_stage.grid(row=0, column=3, padx=5, pady=5, sticky="w")
+        self.progress_bar = ttk.Progressbar(control_frame, orient=tk.HORIZONTAL, length=220, mode="determinate")
+        self.progress_bar.grid(row=1, column=3, padx=5, pady=5, sticky="ew")
+        self.btn_cancel = ttk.Button(control_frame, text="Cancel", command=self.cancel_comparison, state=tk.DISABLED)
+        self.btn_cancel.grid(row=0, column=4, rowspan=2, padx=5, sticky="ns")
+        # Re-compare incrementally whenever a loaded file changes on disk
+        self.var_watch = tk.BooleanVar(value=False)
+        self.chk_watch = ttk.Checkbutton(control_frame, text="Watch files", variable=self.var_watch,
+                                         command=self._toggle_watch)
+        self.chk_watch.grid(row=0, column=5, rowspan=2, padx=5, sticky="w")
+        # Compare whole directories; failing pairs open from the report
+        self.btn_batch = ttk.Button(control_frame, text="Batch...", command=self.compare_directories)
+        self.btn_batch.grid(row=0, column=6, padx=5, pady=5, sticky="ew")
+        self.btn_batch_report = ttk.Button(control_frame, text="Batch report", command=self._show_batch_report,
+                                           state=tk.DISABLED)
+        self.btn_batch_report.grid(row=1, column=6, padx=5, pady=5, sticky="ew")
+        self.btn_rank = ttk.Button(control_frame, text="Rank targets...", command=self.rank_targets)
+        self.btn_rank.grid(row=0, column=7, padx=5, pady=5, sticky="ew")
+
         # Main Content Area (Split View)
         self.paned_window = tk.PanedWindow(self.root, orient=tk.HORIZONTAL, sashrelief=tk.FLAT, sashwidth=4, bg="#d0d0d0")
         self.paned_window.pack(fill=tk.BOTH, expand=True, padx=15, pady=10)
@@ -104,9 +201,11 @@ class TextValidApp:
         self.lbl_header_a.pack(side=tk.TOP, anchor="w", pady=(0, 5))
         
         self.text_a = tk.Text(self.frame_a, wrap=tk.NONE, undo=False, font=("Menlo", 16), relief=tk.FLAT, highlightthickness=1, highlightbackground="#cccccc")
-        self.scroll_a_y = ttk.Scrollbar(self.frame_a, orient=tk.VERTICAL, command=self.text_a.yview)
+        self.scroll_a_y = ttk.Scrollbar(self.frame_a, orient=tk.VERTICAL,
+                                        command=lambda *args: self._scroll_command(self.text_a, *args))
         self.scroll_a_x = ttk.Scrollbar(self.frame_a, orient=tk.HORIZONTAL, command=self.text_a.xview)
-        self.text_a.configure(yscrollcommand=self._sync_scroll_y, xscrollcommand=self.scroll_a_x.set)
+        self.text_a.configure(yscrollcommand=lambda *args: self._sync_scroll_y(self.text_a, *args),
+                              xscrollcommand=self.scroll_a_x.set)
         
         self.scroll_a_y.pack(side=tk.RIGHT, fill=tk.Y)
         self.scroll_a_x.pack(side=tk.BOTTOM, fill=tk.X)
@@ -124,9 +223,11 @@ class TextValidApp:
         self.lbl_header_b.pack(side=tk.TOP, anchor="w", pady=(0, 5))
 
         self.text_b = tk.Text(self.frame_b, wrap=tk.NONE, undo=False, font=("Menlo", 16), relief=tk.FLAT, highlightthickness=1, highlightbackground="#cccccc")
-        self.scroll_b_y = ttk.Scrollbar(self.frame_b, orient=tk.VERTICAL, command=self.text_b.yview)
+        self.scroll_b_y = ttk.Scrollbar(self.frame_b, orient=tk.VERTICAL,
+                                        command=lambda *args: self._scroll_command(self.text_b, *args))
         self.scroll_b_x = ttk.Scrollbar(self.frame_b, orient=tk.HORIZONTAL, command=self.text_b.xview)
-        self.text_b.configure(yscrollcommand=self._sync_scroll_y, xscrollcommand=self.scroll_b_x.set)
+        self.text_b.configure(yscrollcommand=lambda *args: self._sync_scroll_y(self.text_b, *args),
+                              xscrollcommand=self.scroll_b_x.set)
 
         self.scroll_b_y.pack(side=tk.RIGHT, fill=tk.Y)
         self.scroll_b_x.pack(side=tk.BOTTOM, fill=tk.X)
@@ -146,7 +247,36 @@ class TextValidApp:
         # Log Frame (Bottom)
         self.log_frame = ttk.LabelFrame(self.root, text="Comparison Log", padding=10)
         self.log_frame.pack(fill=tk.BOTH, expand=False, padx=15, pady=15)
-        
+
+        # Stepping through differences and pages of the listing
+        log_nav = ttk.Frame(self.log_frame)
+        log_nav.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        self.btn_prev_diff = ttk.Button(log_nav, text="◀ Previous (Shift+F8)", command=lambda: self._step_difference(-1), state=tk.DISABLED)
+        self.btn_prev_diff.pack(side=tk.LEFT, padx=(0, 5))
+        self.btn_next_diff = ttk.Button(log_nav, text="Next (F8) ▶", command=lambda: self._step_difference(1), state=tk.DISABLED)
+        self.btn_next_diff.pack(side=tk.LEFT, padx=5)
+        self.btn_next_page = ttk.Button(log_nav, text="Next page", command=lambda: self._show_log_page(self._log_page + 1), state=tk.DISABLED)
+        self.btn_next_page.pack(side=tk.RIGHT, padx=(5, 0))
+        self.btn_prev_page = ttk.Button(log_nav, text="Previous page", command=lambda: self._show_log_page(self._log_page - 1), state=tk.DISABLED)
+        self.btn_prev_page.pack(side=tk.RIGHT, padx=5)
+        self.lbl_log_page = ttk.Label(log_nav, text="", foreground="gray")
+        self.lbl_log_page.pack(side=tk.RIGHT, padx=5)
+        # Opt-in per-stage timings and peak memory
+        self.var_diagnostics = tk.BooleanVar(value=False)
+        self.chk_diagnostics = ttk.Checkbutton(log_nav, text="Diagnostics", variable=self.var_diagnostics)
+        self.chk_diagnostics.pack(side=tk.LEFT, padx=(20, 5))
+        self.btn_export_stats = ttk.Button(log_nav, text="Export diagnostics...", command=self._export_diagnostics, state=tk.DISABLED)
+        self.btn_export_stats.pack(side=tk.LEFT, padx=5)
+        # Opt-in on-disk cache of normalizations and diffs, kept across sessions
+        self.var_disk_cache = tk.BooleanVar(value=False)
+        self.chk_disk_cache = ttk.Checkbutton(log_nav, text="Disk cache", variable=self.var_disk_cache,
+                                              command=self._toggle_disk_cache)
+        self.chk_disk_cache.pack(side=tk.LEFT, padx=(20, 5))
+        self.btn_clear_cache = ttk.Button(log_nav, text="Clear cache", command=self._clear_cache)
+        self.btn_clear_cache.pack(side=tk.LEFT, padx=5)
+        self.btn_export_report = ttk.Button(log_nav, text="Export report...", command=self.export_report, state=tk.DISABLED)
+        self.btn_export_report.pack(side=tk.LEFT, padx=5)
+
         self.log_text = tk.Text(self.log_frame, height=18, font=("Menlo", 15), relief=tk.FLAT, bg="#1e1e1e", fg="#d4d4d4", wrap=tk.WORD)
         self.log_scroll = ttk.Scrollbar(self.log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
         self.log_text.configure(yscrollcommand=self.log_scroll.set)
@@ -156,9 +286,20 @@ class TextValidApp:
         self.log_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
+        # One tag marks every listed difference, styled and bound once
+        self.log_text.tag_config("difference", foreground="#4fc3f7", underline=True)
+        self.log_text.tag_config("selected_difference", background="#264f78")
+        self.log_text.tag_bind("difference", "<Enter>", lambda e: self.log_text.config(cursor="hand2"))
+        self.log_text.tag_bind("difference", "<Leave>", lambda e: self.log_text.config(cursor=""))
+        self.log_text.tag_config("batch_pair", foreground="#ff8a65", underline=True)
+        self.log_text.tag_bind("batch_pair", "<Enter>", lambda e: self.log_text.config(cursor="hand2"))
+        self.log_text.tag_bind("batch_pair", "<Leave>", lambda e: self.log_text.config(cursor=""))
+
     def _bind_hotkeys(self):
         # Bind Command+Enter (macOS) and Control+Enter (Windows/Linux)
         self.root.bind(f"<{CMD_KEY}-Return>", lambda event: self.compare_files())
+        # Escape cancels a running comparison
+        self.root.bind("<Escape>", lambda event: self.cancel_comparison())
         
         # Bind font size controls
         # Increase: Cmd/Ctrl + Plus/Equal
@@ -173,26 +314,174 @@ class TextValidApp:
         self.root.bind(f"<{CMD_KEY}-KP_Subtract>", lambda event: self._decrease_font_size())
         self.root.bind(f"<{CMD_KEY}-KP_Add>", lambda event: self._increase_font_size())
 
+        # Step through the differences
+        self.root.bind("<F8>", lambda event: self._step_difference(1))
+        self.root.bind("<Shift-F8>", lambda event: self._step_difference(-1))
+
     def _configure_tags(self, text_widget):
         text_widget.tag_config("added", background="#e6ffec", foreground="#006600") # Light green (Extra in Target)
         text_widget.tag_config("removed", background="#ffebe9", foreground="#cc0000") # Light red (Missing in Target)
         # Tag for active highlight when a log entry is selected - bright orange for visibility
         text_widget.tag_config("active_highlight", background="#ff9800", foreground="#ffffff")
         text_widget.tag_config("changed", background="#fff8c4", foreground="#996600") # Light yellow
+        text_widget.tag_config("moved", background="#e8eefc", foreground="#1f4fb5") # Light blue (Moved elsewhere)
         text_widget.tag_config("header", background="#f0f0f0", foreground="#888888") # Gray for context
 
-    def _sync_scroll_y(self, *args):
-        # Sync scrolling for both text widgets
+    def _sync_scroll_y(self, widget, first, last):
+        # Sync scrolling for both text widgets, in row-model coordinates
         if self._scrolling: return
         self._scrolling = True
         try:
-            self.text_a.yview_moveto(args[0])
-            self.text_b.yview_moveto(args[0])
-            self.scroll_a_y.set(*args)
-            self.scroll_b_y.set(*args)
+            top, bottom = self._model_fraction(widget, float(first), float(last))
+            for other in (self.text_a, self.text_b):
+                if other is not widget:
+                    self._scroll_to(other, top)
+            self.scroll_a_y.set(top, bottom)
+            self.scroll_b_y.set(top, bottom)
+            # Wheel and key scrolling happen inside the window; move it
+            # before the view runs out of materialised rows
+            if self._near_window_edge(widget, top):
+                self._scroll_to(widget, top)
         finally:
             self._scrolling = False
 
+    def _scroll_command(self, widget, *args):
+        """Scrollbar callback: jumps go through the row model, steps scroll natively."""
+        if args and args[0] == "moveto":
+            self._scroll_to(widget, float(args[1]))
+        else:
+            widget.yview(*args)
+
+    def _windowed(self, widget):
+        """Whether a pane holds only part of its row model (a window, or rows still being rendered)."""
+        rows = self._rows.get(widget)
+        return rows is not None and self._window_last[widget] - self._window_first[widget] < len(rows)
+
+    def _model_fraction(self, widget, first, last):
+        """Convert a pane's yview fractions to fractions of its whole row model."""
+        if not self._windowed(widget):
+            return first, last
+        rows = len(self._rows[widget])
+        window_first = self._window_first[widget]
+        shown = self._window_last[widget] - window_first
+        return (window_first + first * shown) / rows, (window_first + last * shown) / rows
+
+    def _near_window_edge(self, widget, fraction):
+        if not self._windowed(widget):
+            return False
+        rows = len(self._rows[widget])
+        row = fraction * rows - self._window_first[widget]
+        at_start = self._window_first[widget] == 0
+        at_end = self._window_end[widget] >= rows
+        return (row < WINDOW_MARGIN and not at_start) or (row > WINDOW_ROWS - 2 * WINDOW_MARGIN and not at_end)
+
+    def _scroll_to(self, widget, fraction):
+        """Scroll a pane so the given fraction of its row model is at the top."""
+        if not self._windowed(widget):
+            widget.yview_moveto(fraction)
+            return
+        rows = len(self._rows[widget])
+        row = fraction * rows
+        first = self._window_first[widget]
+        if row < first + WINDOW_MARGIN or row > first + WINDOW_ROWS - 2 * WINDOW_MARGIN:
+            window_first = max(0, min(rows - WINDOW_ROWS, int(row) - WINDOW_MARGIN))
+            if window_first != first:
+                first = window_first
+                self._materialize(widget, first, int(row))
+        # The screen at row is rendered before the view moves there
+        self._fill_rows(widget, int(row) + FIRST_SCREEN_ROWS)
+        widget.yview_moveto((row - first) / (self._window_last[widget] - first))
+
+    def _set_rows(self, widget, rows):
+        """Show a RowModel in a pane, starting at its first row."""
+        self._rows[widget] = rows
+        self._materialize(widget, 0)
+        widget.yview_moveto(0)
+
+    def _show_message(self, widget, message):
+        self._set_rows(widget, RowModel.for_text(message, tag="header"))
+
+    def _materialize(self, widget, first, row=None):
+        """Replace a pane's content with rows [first, first + WINDOW_ROWS) of its model.
+
+        Only the rows up to a screen below row (default first) go in now;
+        _render_step() appends the rest.
+        """
+        rows = self._rows[widget]
+        end = min(len(rows), first + WINDOW_ROWS)
+        last = min(end, max(first, row or 0) + FIRST_SCREEN_ROWS)
+        content, tags = rows.window(first, last)
+        self._window_first[widget] = first
+        self._window_last[widget] = last
+        self._window_end[widget] = end
+        widget.config(state=tk.NORMAL)
+        widget.delete(1.0, tk.END)
+        widget.insert("1.0", content)
+        self._apply_tags(widget, tags)
+        self._apply_highlight(widget)
+        widget.config(state=tk.DISABLED)
+        if last < end:
+            self._schedule_render()
+
+    def _fill_rows(self, widget, last):
+        """Append the rows of a pane's window up to row last (exclusive) that are not rendered yet."""
+        filled = self._window_last[widget]
+        last = min(last, self._window_end[widget])
+        if last <= filled:
+            return
+        content, tags = self._rows[widget].window(filled, last, origin=self._window_first[widget])
+        self._window_last[widget] = last
+        widget.config(state=tk.NORMAL)
+        widget.insert(tk.END, "\n" + content)
+        self._apply_tags(widget, tags)
+        self._apply_highlight(widget)
+        widget.config(state=tk.DISABLED)
+
+    def _schedule_render(self):
+        if self._render_job is None:
+            self._render_job = self.root.after(1, self._render_step)
+
+    def _render_step(self):
+        """Render further batches of pane rows and log entries for up to RENDER_SLICE_MS.
+
+        Between slices Tk handles events, so the rows and entries already
+        rendered can be scrolled and clicked while the rest comes in.
+        """
+        self._render_job = None
+        deadline = time.perf_counter() + RENDER_SLICE_MS / 1000
+        while time.perf_counter() < deadline:
+            pending = False
+            for widget in (self.text_a, self.text_b):
+                if widget in self._rows and self._window_last[widget] < self._window_end[widget]:
+                    self._fill_rows(widget, self._window_last[widget] + RENDER_BATCH_ROWS)
+                    pending = True
+            if self._log_next < self._log_last:
+                self._fill_log(self._log_next + RENDER_BATCH_ENTRIES)
+                pending = True
+            if not pending:
+                return
+        self._schedule_render()
+
+    def _pane_index(self, widget, offset, end=False):
+        """Tk index of an original text offset in a pane, clamped to its window."""
+        rows = self._rows[widget]
+        first = self._window_first[widget]
+        row, column = rows.position(offset, end)
+        if row < first:
+            return "1.0"
+        if row >= self._window_last[widget]:
+            return "end-1c"
+        return f"{row - first + 1}.{column}"
+
+    def _apply_highlight(self, widget):
+        if self._highlight is None or widget not in self._rows:
+            return
+        start_a, end_a, start_b, end_b = self._highlight
+        start, end = (start_a, end_a) if widget is self.text_a else (start_b, end_b)
+        widget.tag_add("active_highlight", self._pane_index(widget, start), self._pane_index(widget, end, end=True))
+        # Raise the highlight tag priority so it shows on top of other tags
+        widget.tag_raise("active_highlight")
+
 
     def drop_a(self, event):
         path = event.data
@@ -221,433 +510,476 @@ class TextValidApp:
         if is_source:
             self.file_a_path = path
             self.lbl_file_a.config(text=os.path.basename(path), foreground="black")
-            self._load_content(path, self.text_a)
+            self.doc_a = self._load_content(path, self.text_a)
         else:
             self.file_b_path = path
             self.lbl_file_b.config(text=os.path.basename(path), foreground="black")
-            self._load_content(path, self.text_b)
+            self.doc_b = self._load_content(path, self.text_b)
         self._check_ready()
 
     def _load_content(self, path, text_widget):
+        """Show a file in a pane; returns its LoadedDocument, normalizing in the background.
+
+        Files that are not shown get a document that Compare loads itself.
+        """
+        document = LoadedDocument(path)
         try:
             # Check file size first
             file_size = os.path.getsize(path)
             logging.info(f"Loading file: {path}, size: {file_size} bytes")
             
             if file_size > MAX_FILE_SIZE:
-                messagebox.showerror("File Too Large", 
-                                   f"File size is {file_size / (1024*1024):.1f}MB.\n\n"
-                                   f"Maximum supported size is {MAX_FILE_SIZE / (1024*1024):.0f}MB.\n\n"
-                                   "Please use a smaller file.")
-                return
+                # Too large to display; Compare streams it instead
+                self._show_message(text_widget, f"File size is {file_size / (1024*1024):.1f}MB, too large to display.\n\n"
+                                                "Compare will verify it by streaming and report the first difference.")
+                return document
             
             if file_size > WARN_FILE_SIZE:
                 result = messagebox.askyesno("Large File Warning",
                                             f"File size is {file_size / (1024*1024):.2f}MB.\n\n"
-                                            "Processing large files may take time and could freeze the app.\n\n"
+                                            "Processing large files may take time.\n\n"
                                             "Continue?")
                 if not result:
-                    return
-            
-            with open(path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                text_widget.config(state=tk.NORMAL)
-                text_widget.delete(1.0, tk.END)
-                text_widget.insert(tk.END, content)
-                text_widget.config(state=tk.DISABLED)
+                    return document
+
+            # Decoded once: the preview, the comparison and the diff view share this text
+            document = LoadedDocument.load(path).start_normalizing()
+            self._highlight = None
+            self._set_rows(text_widget, RowModel.for_text(document.text))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load file: {e}")
             logging.error(f"Failed to load file {path}: {e}")
+        return document
 
     def _check_ready(self):
-        if self.file_a_path and self.file_b_path:
+        if self.file_a_path and self.file_b_path and self._worker is None:
             self.btn_compare.config(state=tk.NORMAL)
 
-    def normalize_text(self, text):
-        # Remove all punctuation (half-width and full-width) and whitespace
-        # Unicode categories: P* (Punctuation), Z* (Separator/Space), C* (Control)
-        # Return tuple: (normalized_string, index_mapping)
-        # index_mapping[i] is the index in 'text' corresponding to normalized_string[i]
-        
-        normalized = []
-        mapping = []
-        for i, char in enumerate(text):
-            cat = unicodedata.category(char)
-            # P* = Punctuation, Z* = Separator, C* = Control
-            if not (cat.startswith('P') or cat.startswith('Z') or cat.startswith('C')):
-                normalized.append(char)
-                mapping.append(i)
-        return "".join(normalized), mapping
-
     def compare_files(self):
-        if not self.file_a_path or not self.file_b_path:
+        if not self.file_a_path or not self.file_b_path or self._worker is not None:
             return
 
         try:
-            # Disable compare button during processing
-            self.btn_compare.config(state=tk.DISABLED)
-            self.btn_compare.config(text="Processing...")
-            self.root.update_idletasks()  # Force UI update
-            
             # Check combined file sizes
             size_a = os.path.getsize(self.file_a_path)
             size_b = os.path.getsize(self.file_b_path)
-            total_size = size_a + size_b
-            
-            logging.info(f"Comparing files: {size_a} + {size_b} = {total_size} bytes")
-            
-            with open(self.file_a_path, 'r', encoding='utf-8') as f1, \
-                 open(self.file_b_path, 'r', encoding='utf-8') as f2:
-                text_a = f1.read()
-                text_b = f2.read()
-
-            # Use summary mode for large files
-            if total_size > SUMMARY_MODE_SIZE:
-                self._compare_summary_mode(text_a, text_b)
-            else:
-                self._display_diff(text_a, text_b)
+        except OSError as e:
+            messagebox.showerror("Error", f"Comparison failed: {e}")
+            logging.error(f"Comparison failed: {e}")
+            return
+        total_size = size_a + size_b
+        logging.info(f"Comparing files: {size_a} + {size_b} = {total_size} bytes")
+
+        # Files too large to display are only verified, streaming
+        verify = size_a > MAX_FILE_SIZE or size_b > MAX_FILE_SIZE
+        # Use summary mode for large files
+        mode = MODE_SUMMARY if total_size > SUMMARY_MODE_SIZE else None
+        # Spread large comparisons over all cores
+        pool = None
+        if not verify and total_size > PARALLEL_FILE_SIZE and (os.cpu_count() or 1) > 1:
+            if self._pool is None:
+                self._pool = ParallelPool()
+            pool = self._pool
+
+        # A new comparison replaces the one watch mode would update
+        self._result = None
+        self._watcher = None
+        if verify:
+            self._start_worker(self._run_verification, self.file_a_path, self.file_b_path)
+        else:
+            self._start_worker(self._run_comparison, self._document(self.doc_a, self.file_a_path),
+                               self._document(self.doc_b, self.file_b_path), mode, pool, self._cache)
 
+    def compare_directories(self):
+        """Compare every file of a source directory with its namesake in a target directory."""
+        if self._worker is not None:
+            return
+        dir_a = filedialog.askdirectory(title="Source directory")
+        if not dir_a:
+            return
+        dir_b = filedialog.askdirectory(title="Target directory")
+        if not dir_b:
+            return
+        try:
+            pairs = pair_directories(dir_a, dir_b)
+        except OSError as e:
+            messagebox.showerror("Error", f"Batch failed: {e}")
+            return
+        logging.info(f"Batch: {len(pairs)} pairs from {dir_a} and {dir_b}")
+        self._start_worker(self._run_batch, pairs)
+
+    def rank_targets(self):
+        """Compare the source with several target files at once and rank them."""
+        if self._worker is not None:
+            return
+        source = self.file_a_path or filedialog.askopenfilename(title="Source file")
+        if not source:
+            return
+        targets = filedialog.askopenfilenames(title="Target files")
+        if not targets:
+            return
+        logging.info(f"Ranking {len(targets)} targets against {source}")
+        self._start_worker(self._run_ranking, self._document(self.doc_a, source), list(targets))
+
+    def export_report(self):
+        """Write the shown comparison to a JSON Lines, JSON, unified diff or HTML report."""
+        if self._worker is not None or self._result is None:
+            return
+        path = filedialog.asksaveasfilename(
+            defaultextension=".html", initialfile="textvalid-report.html",
+            filetypes=[("HTML report", "*.html"), ("JSON Lines", "*.jsonl"), ("JSON", "*.json"),
+                       ("Unified diff", "*.diff")])
+        if not path:
+            return
+        logging.info(f"Exporting report to {path}")
+        self._start_worker(self._run_export, self._result, path, self.file_a_path, self.file_b_path)
+
+    @staticmethod
+    def _document(document, path):
+        """The loaded document for path, or one that the worker will load."""
+        return document if document is not None and document.path == path else LoadedDocument(path)
+
+    def _start_worker(self, target, *args):
+        """Run target(*args, progress, results) on a worker thread; the UI polls for news."""
+        self._worker_queue = queue.Queue()
+        self._worker_progress = QueueProgress(self._worker_queue)
+        self._instrumentation = None
+        self.btn_export_stats.config(state=tk.DISABLED)
+        if self.var_diagnostics.get():
+            self._instrumentation = Instrumentation(memory=True)
+            self._instrumentation.start()
+            self._worker_progress = InstrumentedProgress(self._instrumentation, self._worker_progress)
+        self._worker = threading.Thread(target=target, args=args + (self._worker_progress, self._worker_queue),
+                                        daemon=True)
+        self._set_busy(True)
+        self._worker.start()
+        self.root.after(WORKER_POLL_MS, self._poll_worker)
+
+    @staticmethod
+    def _run_comparison(doc_a, doc_b, mode, pool, cache, progress, results):
+        """Worker thread body: no Tk calls allowed here."""
+        try:
+            # Only files that changed since they were loaded are read again
+            progress.stage("Reading files", 2)
+            doc_a.refresh()
+            progress.update(1, 2)
+            doc_b.refresh()
+            progress.update(2, 2)
+            result = compare_documents(doc_a, doc_b, mode=mode, progress=progress, pool=pool, cache=cache)
+            progress.stage("Laying out")
+            difflog = DifferenceLog(result, limit=50 if result.mode == MODE_CHUNKED else None)
+            results.put(("done", (result, build_rows(result), difflog)))
+        except Cancelled:
+            results.put(("cancelled", None))
+        except Exception as e:
+            logging.error(f"Comparison failed: {e}\n{traceback.format_exc()}")
+            results.put(("error", e))
+
+    @staticmethod
+    def _run_update(result, path_a, path_b, progress, results):
+        """Worker thread body for watch mode: update result for the changed files."""
+        try:
+            progress.stage("Reading files", 2)
+            text_a = read_text(path_a)
+            text_b = read_text(path_b)
+            started = time.perf_counter()
+            result = update_result(result, text_a, text_b, progress=progress)
+            progress.stage("Laying out")
+            difflog = DifferenceLog(result, limit=50 if result.mode == MODE_CHUNKED else None)
+            results.put(("updated", (result, build_rows(result), difflog, time.perf_counter() - started)))
+        except Cancelled:
+            results.put(("cancelled", None))
+        except Exception as e:
+            logging.error(f"Update failed: {e}\n{traceback.format_exc()}")
+            results.put(("error", e))
+
+    @staticmethod
+    def _run_batch(pairs, progress, results):
+        """Worker thread body for a batch: the pairs are compared in worker processes."""
+        try:
+            results.put(("batch", run_batch(pairs, progress=progress)))
+        except Cancelled:
+            results.put(("cancelled", None))
+        except Exception as e:
+            logging.error(f"Batch failed: {e}\n{traceback.format_exc()}")
+            results.put(("error", e))
+
+    @staticmethod
+    def _run_ranking(doc_a, targets, progress, results):
+        """Worker thread body: index the (usually already normalized) source once for every target."""
+        try:
+            progress.stage("Reading files", 1)
+            doc_a.refresh()
+            source = SourceIndex(doc_a.text, doc_a.normalized(progress))
+            ranked = rank_targets(compare_targets(source, targets, source_path=doc_a.path, progress=progress))
+            results.put(("ranked", (doc_a.path, len(source.normalized[0]), ranked)))
+        except Cancelled:
+            results.put(("cancelled", None))
+        except Exception as e:
+            logging.error(f"Ranking failed: {e}\n{traceback.format_exc()}")
+            results.put(("error", e))
+
+    @staticmethod
+    def _run_export(result, path, path_a, path_b, progress, results):
+        """Worker thread body: the report is streamed to the file."""
+        try:
+            count = export_report(result, path, source=path_a or "source", target=path_b or "target",
+                                  progress=progress)
+            results.put(("exported", (path, count)))
+        except Cancelled:
+            results.put(("cancelled", None))
+        except Exception as e:
+            logging.error(f"Export failed: {e}\n{traceback.format_exc()}")
+            results.put(("error", e))
+
+    @staticmethod
+    def _run_verification(path_a, path_b, progress, results):
+        """Worker thread body for files too large to display."""
+        try:
+            results.put(("verified", verify_files(path_a, path_b, progress=progress)))
+        except Cancelled:
+            results.put(("cancelled", None))
+        except Exception as e:
+            logging.error(f"Verification failed: {e}\n{traceback.format_exc()}")
+            results.put(("error", e))
+
+    def _poll_worker(self):
+        latest_progress = None
+        outcome = None
+        try:
+            while outcome is None:
+                kind, payload = self._worker_queue.get_nowait()
+                if kind == "progress":
+                    latest_progress = payload
+                else:
+                    outcome = (kind, payload)
+        except queue.Empty:
+            pass
+
+        if latest_progress is not None:
+            self._show_progress(*latest_progress)
+        if outcome is None:
+            self.root.after(WORKER_POLL_MS, self._poll_worker)
+            return
+
+        self._worker = None
+        kind, payload = outcome
+        try:
+            if kind == "done":
+                self._show_progress("Rendering", 0, None)
+                self.root.update_idletasks()
+                result, (rows_a, rows_b), difflog = payload
+                self._display_result(result, rows_a, rows_b, difflog)
+            elif kind == "updated":
+                self._show_progress("Rendering", 0, None)
+                result, (rows_a, rows_b), difflog, seconds = payload
+                # Update in place: keep the scroll position and log page
+                top = self._model_fraction(self.text_a, *map(float, self.text_a.yview()))[0]
+                page = self._log_page
+                self._display_result(result, rows_a, rows_b, difflog)
+                self._scroll_to(self.text_a, top)
+                self._show_log_page(page)
+                self._log(f"Watch: files changed, comparison updated in {seconds:.3f}s.")
+            elif kind == "verified":
+                self._display_verification(payload)
+            elif kind == "batch":
+                self._batch = payload
+                self._batch_ranking = None
+                self.btn_batch_report.config(state=tk.NORMAL)
+                self._show_batch_report()
+            elif kind == "ranked":
+                source_path, source_length, self._batch = payload
+                self._batch_ranking = (source_path, source_length)
+                self.btn_batch_report.config(state=tk.NORMAL)
+                self._show_batch_report()
+            elif kind == "exported":
+                path, count = payload
+                self._log(f"Report written to {path} ({count} entries).")
+            elif kind == "cancelled":
+                self._log("Comparison cancelled.")
+            else:
+                messagebox.showerror("Error", f"Comparison failed: {payload}")
+            self._finish_diagnostics()
         except Exception as e:
             messagebox.showerror("Error", f"Comparison failed: {e}")
-            logging.error(f"Comparison failed: {e}")
+            logging.error(f"Rendering failed: {e}")
         finally:
-            # Re-enable compare button
-            self.btn_compare.config(state=tk.NORMAL)
+            self._set_busy(False)
+
+    def _display_result(self, result, rows_a, rows_b, difflog):
+        self._result = result
+        if result.mode == MODE_SUMMARY:
+            self._display_summary(result, rows_a, rows_b, difflog)
+        else:
+            self._display_diff(result, rows_a, rows_b, difflog)
+
+    def _toggle_watch(self):
+        if self.var_watch.get():
+            self._watcher = None
+            self._poll_files()
+        elif self._watch_job is not None:
+            self.root.after_cancel(self._watch_job)
+            self._watch_job = None
+
+    def _poll_files(self):
+        """Watch mode: update the shown comparison once a loaded file changes on disk."""
+        self._watch_job = self.root.after(WATCH_POLL_MS, self._poll_files)
+        paths = [self.file_a_path, self.file_b_path]
+        if None in paths:
+            return
+        if self._watcher is None or self._watcher.paths != paths:
+            self._watcher = FileWatcher(paths)
+            return
+        if self._worker is not None or self._result is None:
+            return
+        changed = self._watcher.changed()
+        if changed:
+            logging.info(f"Watch: {changed} changed")
+            self._start_worker(self._run_update, self._result, *paths)
+
+    def cancel_comparison(self):
+        if self._worker_progress is not None and self._worker is not None:
+            self._worker_progress.cancel()
+            self.btn_cancel.config(state=tk.DISABLED)
+            self.lbl_stage.config(text="Cancelling...")
+
+    def _on_close(self):
+        if self._worker_progress is not None:
+            self._worker_progress.cancel()
+        if self._pool is not None:
+            self._pool.close()
+        self.root.destroy()
+
+    def _set_busy(self, busy):
+        if busy:
+            self.btn_compare.config(state=tk.DISABLED, text="Processing...")
+            self.btn_cancel.config(state=tk.NORMAL)
+            self.btn_batch.config(state=tk.DISABLED)
+            self.btn_rank.config(state=tk.DISABLED)
+            self.btn_export_report.config(state=tk.DISABLED)
+        else:
             self.btn_compare.config(text=f"Compare ({CMD_KEY_NAME}+Enter)")
+            self.btn_cancel.config(state=tk.DISABLED)
+            self.btn_batch.config(state=tk.NORMAL)
+            self.btn_rank.config(state=tk.NORMAL)
+            self.btn_export_report.config(state=tk.NORMAL if self._result is not None else tk.DISABLED)
+            self.progress_bar.stop()
+            self.progress_bar.config(mode="determinate", value=0)
+            self.lbl_stage.config(text="")
+            self._check_ready()
 
-    def _display_diff(self, text_a, text_b):
-        # Clear existing content
-        self.text_a.config(state=tk.NORMAL)
-        self.text_b.config(state=tk.NORMAL)
-        self.text_a.delete(1.0, tk.END)
-        self.text_b.delete(1.0, tk.END)
-        
+    def _show_progress(self, stage, done, total):
+        self.lbl_stage.config(text=f"{stage}...")
+        if total:
+            self.progress_bar.stop()
+            self.progress_bar.config(mode="determinate", maximum=total, value=done)
+        elif str(self.progress_bar.cget("mode")) != "indeterminate":
+            # Stage without a known length: keep the bar moving
+            self.progress_bar.config(mode="indeterminate")
+            self.progress_bar.start(15)
+
+    def _display_diff(self, result, rows_a, rows_b, difflog):
+        """Show a DiffResult side by side and log every difference."""
         self._clear_log()
         self._log("Starting comparison...")
+        chunked = result.mode == MODE_CHUNKED
+        if chunked:
+            self._log(f"Using optimized chunked comparison for large content ({len(result.norm_a) + len(result.norm_b)} chars)...")
 
-        # Normalize content
-        norm_a, map_a = self.normalize_text(text_a)
-        norm_b, map_b = self.normalize_text(text_b)
-        
-        # Use chunked comparison for better performance on large files
-        if len(norm_a) > CHUNK_SIZE or len(norm_b) > CHUNK_SIZE:
-            self._log(f"Using optimized chunked comparison for large content ({len(norm_a) + len(norm_b)} chars)...")
-            self._display_diff_chunked(text_a, text_b, norm_a, norm_b, map_a, map_b)
+        # Only a window of the aligned rows goes into the widgets
+        self._highlight = None
+        with self._measure("Rendering panes"):
+            self._set_rows(self.text_a, rows_a)
+            self._set_rows(self.text_b, rows_b)
+
+        if result.identical:
+            self._log("SUCCESS: Files are identical (ignoring punctuation/whitespace).")
+        elif chunked:
+            self._log(f"Comparison complete. {len(difflog)} differences found (chunks processed: {result.chunks}).")
         else:
-            self._display_diff_full(text_a, text_b, norm_a, norm_b, map_a, map_b)
+            self._log(f"Comparison complete. {len(difflog)} differences found.")
+        with self._measure("Listing differences"):
+            self._show_differences(difflog)
 
-    def _display_diff_full(self, text_a, text_b, norm_a, norm_b, map_a, map_b):
-        """Original full diff algorithm for smaller files."""
-        matcher = difflib.SequenceMatcher(None, norm_a, norm_b)
-        
-        curr_a = 0
-        curr_b = 0
-        
-        differences_found = False
-        
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-            # Determine start/end in original text
-            # Start
-            start_a = map_a[i1] if i1 < len(map_a) else len(text_a)
-            start_b = map_b[j1] if j1 < len(map_b) else len(text_b)
-            
-            # End
-            end_a = map_a[i2 - 1] + 1 if i2 > i1 else start_a
-            end_b = map_b[j2 - 1] + 1 if j2 > j1 else start_b
-            
-            # 1. Handle "Ignored" content (punctuation/newlines) BEFORE this chunk
-            ignored_a = text_a[curr_a:start_a]
-            ignored_b = text_b[curr_b:start_b]
-            
-            self._insert_and_sync(ignored_a, ignored_b, "header")
-            
-            # 2. Handle the "Meaningful" chunk
-            chunk_a = text_a[start_a:end_a]
-            chunk_b = text_b[start_b:end_b]
+    def _display_summary(self, result, rows_a, rows_b, difflog):
+        """Large files: show the texts with the differing regions marked, and list the regions."""
+        self._clear_log()
+        self._log(f"Processing large files ({len(result.text_a) + len(result.text_b)} chars total)...")
+        self._log("Summary mode: differing regions are marked, not diffed character by character.")
 
-            # Calculate line numbers
-            line_a = text_a.count('\n', 0, start_a) + 1
-            line_b = text_b.count('\n', 0, start_b) + 1
-            
-            if tag == 'equal':
-                self._insert_and_sync(chunk_a, chunk_b, None)
-            elif tag == 'replace':
-                # Get widget positions BEFORE inserting
-                widget_start_a = self.text_a.index("end-1c")
-                widget_start_b = self.text_b.index("end-1c")
-                
-                self._insert_and_sync(chunk_a, chunk_b, "removed", "added")
-                
-                # Get widget positions AFTER inserting
-                widget_end_a = self.text_a.index("end-1c")
-                widget_end_b = self.text_b.index("end-1c")
-                
-                self._log_difference(f"[Line A:{line_a} / B:{line_b}] [DIFFERENCE] Replaced: '{chunk_a}' with '{chunk_b}'", 
-                                   widget_start_a, widget_end_a, widget_start_b, widget_end_b)
-                differences_found = True
-            elif tag == 'delete':
-                # Get widget positions BEFORE inserting
-                widget_start_a = self.text_a.index("end-1c")
-                widget_start_b = self.text_b.index("end-1c")
-                
-                self._insert_and_sync(chunk_a, "", "removed", None)
-                
-                # Get widget positions AFTER inserting
-                widget_end_a = self.text_a.index("end-1c")
-                widget_end_b = self.text_b.index("end-1c")
-                
-                self._log_difference(f"[Line A:{line_a} / B:{line_b}] [DIFFERENCE] Deleted: '{chunk_a}'", 
-                                   widget_start_a, widget_end_a, widget_start_b, widget_end_b)
-                differences_found = True
-            elif tag == 'insert':
-                # Get widget positions BEFORE inserting
-                widget_start_a = self.text_a.index("end-1c")
-                widget_start_b = self.text_b.index("end-1c")
-                
-                self._insert_and_sync("", chunk_b, None, "added")
-                
-                # Get widget positions AFTER inserting
-                widget_end_a = self.text_a.index("end-1c")
-                widget_end_b = self.text_b.index("end-1c")
-                
-                self._log_difference(f"[Line A:{line_a} / B:{line_b}] [DIFFERENCE] Inserted: '{chunk_b}'", 
-                                   widget_start_a, widget_end_a, widget_start_b, widget_end_b)
-                differences_found = True
-                
-            curr_a = end_a
-            curr_b = end_b
-            
-        # Handle remaining content
-        remaining_a = text_a[curr_a:]
-        remaining_b = text_b[curr_b:]
-        self._insert_and_sync(remaining_a, remaining_b, "header")
+        self._highlight = None
+        with self._measure("Rendering panes"):
+            self._set_rows(self.text_a, rows_a)
+            self._set_rows(self.text_b, rows_b)
 
-        self.text_a.config(state=tk.DISABLED)
-        self.text_b.config(state=tk.DISABLED)
-        
-        if not differences_found:
+        if result.identical:
             self._log("SUCCESS: Files are identical (ignoring punctuation/whitespace).")
         else:
-            self._log("Comparison complete. Differences found.")
+            self._log(f"Files are DIFFERENT: approximately {result.diff_count} characters differ "
+                      f"in {len(result.regions)} regions.")
+        with self._measure("Listing differences"):
+            self._show_differences(difflog)
 
-    def _display_diff_chunked(self, text_a, text_b, norm_a, norm_b, map_a, map_b):
-        """Optimized chunked comparison for large files to prevent freezing."""
-        differences_found = False
-        
-        # Quick check if files are identical
-        if norm_a == norm_b:
-            self.text_a.insert(tk.END, text_a, None)
-            self.text_b.insert(tk.END, text_b, None)
-            self.text_a.config(state=tk.DISABLED)
-            self.text_b.config(state=tk.DISABLED)
-            self._log("SUCCESS: Files are identical (ignoring punctuation/whitespace).")
-            return
-        
-        # Split into chunks for comparison
-        chunk_size = CHUNK_SIZE
-        num_chunks = max(len(norm_a), len(norm_b)) // chunk_size + 1
-        
-        self._log(f"Comparing in {num_chunks} chunks...")
-        
-        curr_a_norm = 0
-        curr_b_norm = 0
-        curr_a = 0
-        curr_b = 0
-        
-        for chunk_idx in range(num_chunks):
-            # Get chunk bounds in normalized text
-            chunk_start_a = chunk_idx * chunk_size
-            chunk_end_a = min((chunk_idx + 1) * chunk_size, len(norm_a))
-            chunk_start_b = chunk_idx * chunk_size
-            chunk_end_b = min((chunk_idx + 1) * chunk_size, len(norm_b))
-            
-            if chunk_start_a >= len(norm_a) and chunk_start_b >= len(norm_b):
-                break
-            
-            # Get chunks
-            chunk_norm_a = norm_a[chunk_start_a:chunk_end_a]
-            chunk_norm_b = norm_b[chunk_start_b:chunk_end_b]
-            
-            # Quick check if chunks are identical
-            if chunk_norm_a == chunk_norm_b:
-                # Map back to original text
-                orig_start_a = map_a[chunk_start_a] if chunk_start_a < len(map_a) else len(text_a)
-                orig_end_a = map_a[chunk_end_a - 1] + 1 if chunk_end_a > chunk_start_a and chunk_end_a - 1 < len(map_a) else orig_start_a
-                orig_start_b = map_b[chunk_start_b] if chunk_start_b < len(map_b) else len(text_b)
-                orig_end_b = map_b[chunk_end_b - 1] + 1 if chunk_end_b > chunk_start_b and chunk_end_b - 1 < len(map_b) else orig_start_b
-                
-                # Insert matching content
-                content_a = text_a[curr_a:orig_end_a]
-                content_b = text_b[curr_b:orig_end_b]
-                self._insert_and_sync(content_a, content_b, None)
-                
-                curr_a = orig_end_a
-                curr_b = orig_end_b
-            else:
-                # Chunks differ - do detailed comparison of this chunk
-                differences_found = True
-                self._log(f"Analyzing differences in chunk {chunk_idx + 1}/{num_chunks}...")
-                
-                # Run detailed diff on this chunk only
-                chunk_map_a = [map_a[i] - (map_a[chunk_start_a] if chunk_start_a < len(map_a) else 0) 
-                              for i in range(chunk_start_a, chunk_end_a) if i < len(map_a)]
-                chunk_map_b = [map_b[i] - (map_b[chunk_start_b] if chunk_start_b < len(map_b) else 0) 
-                              for i in range(chunk_start_b, chunk_end_b) if i < len(map_b)]
-                
-                # Get original text for this chunk
-                orig_start_a = map_a[chunk_start_a] if chunk_start_a < len(map_a) else len(text_a)
-                orig_end_a = map_a[chunk_end_a - 1] + 1 if chunk_end_a > 0 and chunk_end_a - 1 < len(map_a) else len(text_a)
-                orig_start_b = map_b[chunk_start_b] if chunk_start_b < len(map_b) else len(text_b)
-                orig_end_b = map_b[chunk_end_b - 1] + 1 if chunk_end_b > 0 and chunk_end_b - 1 < len(map_b) else len(text_b)
-                
-                chunk_text_a = text_a[orig_start_a:orig_end_a]
-                chunk_text_b = text_b[orig_start_b:orig_end_b]
-                
-                # Detailed diff of the chunk
-                matcher = difflib.SequenceMatcher(None, chunk_norm_a, chunk_norm_b)
-                
-                for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-                    # Map indices back to chunk text
-                    if i1 < len(chunk_map_a):
-                        start_a_chunk = chunk_map_a[i1]
-                    else:
-                        start_a_chunk = len(chunk_text_a)
-                    
-                    if i2 > 0 and i2 - 1 < len(chunk_map_a):
-                        end_a_chunk = chunk_map_a[i2 - 1] + 1
-                    else:
-                        end_a_chunk = start_a_chunk
-                    
-                    if j1 < len(chunk_map_b):
-                        start_b_chunk = chunk_map_b[j1]
-                    else:
-                        start_b_chunk = len(chunk_text_b)
-                    
-                    if j2 > 0 and j2 - 1 < len(chunk_map_b):
-                        end_b_chunk = chunk_map_b[j2 - 1] + 1
-                    else:
-                        end_b_chunk = start_b_chunk
-                    
-                    # Handle ignored content before this operation
-                    ignored_a = chunk_text_a[curr_a - orig_start_a:start_a_chunk] if curr_a >= orig_start_a else ""
-                    ignored_b = chunk_text_b[curr_b - orig_start_b:start_b_chunk] if curr_b >= orig_start_b else ""
-                    if ignored_a or ignored_b:
-                        self._insert_and_sync(ignored_a, ignored_b, "header")
-                    
-                    # Handle the meaningful content
-                    content_a_chunk = chunk_text_a[start_a_chunk:end_a_chunk]
-                    content_b_chunk = chunk_text_b[start_b_chunk:end_b_chunk]
-                    
-                    if tag == 'equal':
-                        self._insert_and_sync(content_a_chunk, content_b_chunk, None)
-                    elif tag == 'replace':
-                        widget_start_a = self.text_a.index("end-1c")
-                        widget_start_b = self.text_b.index("end-1c")
-                        self._insert_and_sync(content_a_chunk, content_b_chunk, "removed", "added")
-                        widget_end_a = self.text_a.index("end-1c")
-                        widget_end_b = self.text_b.index("end-1c")
-                        self._log_difference(f"[Chunk {chunk_idx+1}] Replaced: '{content_a_chunk[:50]}...' with '{content_b_chunk[:50]}...'",
-                                           widget_start_a, widget_end_a, widget_start_b, widget_end_b)
-                    elif tag == 'delete':
-                        widget_start_a = self.text_a.index("end-1c")
-                        widget_start_b = self.text_b.index("end-1c")
-                        self._insert_and_sync(content_a_chunk, "", "removed", None)
-                        widget_end_a = self.text_a.index("end-1c")
-                        widget_end_b = self.text_b.index("end-1c")
-                        self._log_difference(f"[Chunk {chunk_idx+1}] Deleted: '{content_a_chunk[:50]}...'",
-                                           widget_start_a, widget_end_a, widget_start_b, widget_end_b)
-                    elif tag == 'insert':
-                        widget_start_a = self.text_a.index("end-1c")
-                        widget_start_b = self.text_b.index("end-1c")
-                        self._insert_and_sync("", content_b_chunk, None, "added")
-                        widget_end_a = self.text_a.index("end-1c")
-                        widget_end_b = self.text_b.index("end-1c")
-                        self._log_difference(f"[Chunk {chunk_idx+1}] Inserted: '{content_b_chunk[:50]}...'",
-                                           widget_start_a, widget_end_a, widget_start_b, widget_end_b)
-                    
-                    curr_a = orig_start_a + end_a_chunk
-                    curr_b = orig_start_b + end_b_chunk
-                
-                # Move to end of chunk
-                curr_a = orig_end_a
-                curr_b = orig_end_b
+    def _display_verification(self, mismatch):
+        """Result of a streaming verification: identical, or the first mismatch."""
+        self._clear_log()
+        self._log("Streaming verification: files too large to display, stopped at the first difference.")
+        self._highlight = None
 
-            
-            curr_a_norm = chunk_end_a
-            curr_b_norm = chunk_end_b
-        
-        # Handle any remaining content
-        if curr_a < len(text_a) or curr_b < len(text_b):
-            self._insert_and_sync(text_a[curr_a:], text_b[curr_b:], None)
-        
-        self.text_a.config(state=tk.DISABLED)
-        self.text_b.config(state=tk.DISABLED)
-        
-        if not differences_found:
+        if mismatch is None:
+            message = "✓ Files are IDENTICAL\n\n(ignoring punctuation/whitespace)"
+            self._show_message(self.text_a, message)
+            self._show_message(self.text_b, message)
             self._log("SUCCESS: Files are identical (ignoring punctuation/whitespace).")
         else:
-            self._log(f"Comparison complete. Differences found (chunks processed: {num_chunks}).")
+            self._show_message(self.text_a, f"✗ Files are DIFFERENT\n\nFirst difference at line {mismatch.line_a}, "
+                                            f"column {mismatch.column_a}:\n\n{mismatch.context_a}")
+            self._show_message(self.text_b, f"✗ Files are DIFFERENT\n\nFirst difference at line {mismatch.line_b}, "
+                                            f"column {mismatch.column_b}:\n\n{mismatch.context_b}")
+            self._log(describe_mismatch(mismatch))
 
-    def _compare_summary_mode(self, text_a, text_b):
-        """Lightweight comparison mode for large files - shows summary instead of full diff."""
+    def _show_batch_report(self):
+        """List the last batch run in the log; clicking a failing pair opens it side by side."""
+        if self._batch is None:
+            return
         self._clear_log()
-        self._log(f"Processing large files ({len(text_a) + len(text_b)} bytes total)...")
-        self._log("Summary mode: Results only, no full text display.")
-        
-        # Clear text widgets
-        self.text_a.config(state=tk.NORMAL)
-        self.text_b.config(state=tk.NORMAL)
-        self.text_a.delete(1.0, tk.END)
-        self.text_b.delete(1.0, tk.END)
-        
-        # Normalize
-        norm_a, _ = self.normalize_text(text_a)
-        norm_b, _ = self.normalize_text(text_b)
-        
-        # Quick comparison
-        if norm_a == norm_b:
-            self.text_a.insert(tk.END, "✓ Files are IDENTICAL\n\n(ignoring punctuation/whitespace)\n\nOriginal text is not displayed in summary mode for large files.", "header")
-            self.text_b.insert(tk.END, "✓ Files are IDENTICAL\n\n(ignoring punctuation/whitespace)\n\nOriginal text is not displayed in summary mode for large files.", "header")
-            self._log("SUCCESS: Files are identical (ignoring punctuation/whitespace).")
+        summary = summarize_batch(self._batch)
+        if self._batch_ranking is None:
+            self._log(f"Batch: {summary['pairs']} pairs, {summary['identical']} identical, "
+                      f"{summary['different']} different, {summary['missing']} missing, {summary['error']} errors "
+                      f"({summary['seconds']:.2f}s of work). Click a failing pair to open it.")
+            entries = []
+            lines = [describe_result(result) for result in self._batch]
         else:
-            # Show statistics
-            diff_count = sum(1 for a, b in zip(norm_a, norm_b) if a != b)
-            self.text_a.insert(tk.END, f"✗ Files are DIFFERENT\n\n", "header")
-            self.text_a.insert(tk.END, f"Differences detected: ~{diff_count} characters differ\n", "header")
-            self.text_a.insert(tk.END, f"\nSource length: {len(norm_a)} chars (normalized)\n", "header")
-            self.text_a.insert(tk.END, f"\nOriginal text is not displayed in summary mode for large files.", "header")
-            
-            self.text_b.insert(tk.END, f"✗ Files are DIFFERENT\n\n", "header")
-            self.text_b.insert(tk.END, f"Differences detected: ~{diff_count} characters differ\n", "header")
-            self.text_b.insert(tk.END, f"\nTarget length: {len(norm_b)} chars (normalized)\n", "header")
-            self.text_b.insert(tk.END, f"\nOriginal text is not displayed in summary mode for large files.", "header")
-            
-            self._log(f"Files are DIFFERENT: approximately {diff_count} characters differ.")
-        
-        self.text_a.config(state=tk.DISABLED)
-        self.text_b.config(state=tk.DISABLED)
+            source_path, source_length = self._batch_ranking
+            self._log(f"Ranking: {summary['pairs']} targets against {os.path.basename(source_path)}, "
+                      f"{summary['identical']} identical, {summary['different']} different, {summary['error']} errors. "
+                      f"Click a differing target to open it.")
+            header, lines = format_ranking(self._batch, source_length)
+            entries = [header + "\n"]
+        ranges = []
+        line = int(self.log_text.index("end-1c").split('.')[0]) + len(entries)
+        for result, text in zip(self._batch, lines):
+            entries.append(text + "\n")
+            if result.status == STATUS_DIFFERENT:
+                self._batch_lines.append(line)
+                self._batch_failures.append(result)
+                ranges.extend((f"{line}.0", f"{line + 1}.0"))
+            line += 1
+        self.log_text.insert(tk.END, "".join(entries))
+        self._apply_tags(self.log_text, {"batch_pair": ranges})
 
+    def _open_batch_pair(self, result):
+        self.load_file_from_path(result.path_a, is_source=True)
+        self.load_file_from_path(result.path_b, is_source=False)
+        self.compare_files()
 
-    def _insert_and_sync(self, content_a, content_b, tag_a, tag_b=None):
-        # If tag_b is not provided, use tag_a (for symmetric tags like 'header')
-        # Actually for replace/delete/insert we pass specific tags.
-        if tag_b is None and tag_a == "header":
-            tag_b = "header"
-            
-        # Insert content
-        if content_a:
-            self.text_a.insert(tk.END, content_a, tag_a)
-        if content_b:
-            self.text_b.insert(tk.END, content_b, tag_b)
-            
-        # Sync newlines
-        newlines_a = content_a.count('\n')
-        newlines_b = content_b.count('\n')
-        
-        if newlines_a > newlines_b:
-            self.text_b.insert(tk.END, '\n' * (newlines_a - newlines_b))
-        elif newlines_b > newlines_a:
-            self.text_a.insert(tk.END, '\n' * (newlines_b - newlines_a))
+    @staticmethod
+    def _apply_tags(text_widget, tag_ranges):
+        """tag_add every range of every tag, TAG_BATCH ranges per Tcl call."""
+        for tag, indices in tag_ranges.items():
+            for i in range(0, len(indices), 2 * TAG_BATCH):
+                text_widget.tag_add(tag, *indices[i:i + 2 * TAG_BATCH])
 
     def _log(self, message):
         """Log a generic message without mapping (e.g., start/completion)."""
@@ -655,106 +987,206 @@ class TextValidApp:
         self.log_counter += 1
         self.log_text.see(tk.END)
 
-    def _log_difference(self, message, widget_start_a, widget_end_a, widget_start_b, widget_end_b):
-        """Log a difference entry and store its mapping for interactive highlighting.
-        Each entry gets a unique tag based on the current log line number.
-        """
-        # Get the position where we'll insert (before insertion)
-        line_start = self.log_text.index("end-1c")
-        tag_name = f"diff_{len(self.log_mappings)}"
-        # Store WIDGET positions, not original text positions
-        self.log_mappings[tag_name] = (widget_start_a, widget_end_a, widget_start_b, widget_end_b)
-        
-        # Insert the message with log ID
-        self.log_text.insert(tk.END, f"[{self.log_counter}] {message}\n")
-        self.log_counter += 1
-        
-        # Get the position after insertion (should be start of next line)
-        line_end = self.log_text.index("end-1c")
-        
-        # Apply tag to the inserted line
-        self.log_text.tag_add(tag_name, line_start, line_end)
-        
-        # Make it look clickable with better styling
-        self.log_text.tag_config(tag_name, foreground="#4fc3f7", underline=True)
-        
-        # Add hover effect (cursor change)
-        self.log_text.tag_bind(tag_name, "<Enter>", lambda e: self.log_text.config(cursor="hand2"))
-        self.log_text.tag_bind(tag_name, "<Leave>", lambda e: self.log_text.config(cursor=""))
-        
-        self.log_text.see(tk.END)
-        
-        print(f"Tagged {tag_name} from {line_start} to {line_end}, widget positions: A[{widget_start_a}:{widget_end_a}] B[{widget_start_b}:{widget_end_b}]")  # Debug
+    def _measure(self, stage):
+        """Time a GUI stage when diagnostics are on."""
+        if self._instrumentation is None:
+            return nullcontext()
+        return self._instrumentation.measure(stage)
+
+    def _finish_diagnostics(self):
+        instrumentation = self._instrumentation
+        if instrumentation is None:
+            return
+        instrumentation.finish()
+        for line in instrumentation.describe():
+            self._log(f"[Diagnostics] {line}")
+        self._log(f"[Diagnostics] {self._cache.describe()}")
+        logging.info(f"Diagnostics: {instrumentation.to_json(indent=None)}")
+        self.btn_export_stats.config(state=tk.NORMAL)
+
+    def _export_diagnostics(self):
+        if self._instrumentation is None:
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")],
+                                            initialfile="textvalid-diagnostics.json")
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self._instrumentation.to_json())
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export diagnostics: {e}")
+
+    def _toggle_disk_cache(self):
+        """Switch between the session's memory cache and the on-disk cache in default_cache_dir()."""
+        if not self.var_disk_cache.get():
+            self._cache = ResultCache()
+            return
+        try:
+            self._cache = ResultCache(default_cache_dir())
+        except OSError as e:
+            self.var_disk_cache.set(False)
+            messagebox.showerror("Error", f"On-disk cache unavailable: {e}")
+
+    def _clear_cache(self):
+        """Drop cached normalizations and diffs, including any left on disk by earlier sessions."""
+        self._cache.clear()
+        directory = default_cache_dir()
+        if self._cache.directory is None and os.path.isdir(directory):
+            ResultCache(directory).clear()
+        self._log(f"Cache cleared ({directory})")
+
+    def _show_differences(self, difflog):
+        """List a DifferenceLog below the messages logged so far, one page at a time."""
+        self._difflog = difflog
+        self._selected = None
+        # Pages replace the text between these marks; lines logged later stay
+        self.log_text.mark_set("differences", "end-1c")
+        self.log_text.mark_gravity("differences", tk.LEFT)
+        self.log_text.mark_set("differences_end", "end-1c")
+        self.log_text.mark_gravity("differences_end", tk.LEFT)
+        self._show_log_page(0)
+
+    def _show_log_page(self, page):
+        difflog = self._difflog
+        if difflog is None:
+            return
+        page = max(0, min(page, (len(difflog) - 1) // LOG_PAGE_SIZE))
+        first = page * LOG_PAGE_SIZE
+        self._log_page = page
+        self.log_text.delete("differences", "differences_end")
+        # The line each listed entry starts on, plus the line after the last
+        self._log_line_starts = array('I', [int(self.log_text.index("differences").split('.')[0])])
+        self._log_next = first
+        self._log_last = min(len(difflog), first + LOG_PAGE_SIZE)
+        self._fill_log(first + FIRST_LOG_ENTRIES)
+        if self._log_next < self._log_last:
+            self._schedule_render()
+        self._update_log_nav()
+
+    def _fill_log(self, until):
+        """List the entries of the log page up to until (exclusive) that are not listed yet."""
+        first = self._log_next
+        until = min(until, self._log_last)
+        if until <= first:
+            return
+        # Build the batch in Python: one insert and one tag_add call
+        entries = []
+        ranges = []
+        line_starts = self._log_line_starts
+        line = line_starts[-1]
+        for i in range(first, until):
+            entry = f"[#{i + 1}] {self._difflog.describe(i)}\n"
+            entries.append(entry)
+            start = line
+            line += entry.count('\n')
+            line_starts.append(line)
+            ranges.extend((f"{start}.0", f"{line}.0"))
+        self._log_next = until
+        self.log_text.insert("differences_end", "".join(entries))
+        self.log_text.mark_set("differences_end", f"{line}.0")
+        self._apply_tags(self.log_text, {"difference": ranges})
+        if self._selected is not None and first <= self._selected < until:
+            self._mark_selected_entry()
+
+    def _update_log_nav(self):
+        count = len(self._difflog) if self._difflog is not None else 0
+        first = self._log_page * LOG_PAGE_SIZE
+        if count > LOG_PAGE_SIZE:
+            self.lbl_log_page.config(text=f"Differences {first + 1}-{min(count, first + LOG_PAGE_SIZE)} of {count}")
+        else:
+            self.lbl_log_page.config(text=f"{count} differences" if count else "")
+        self.btn_prev_page.config(state=tk.NORMAL if first > 0 else tk.DISABLED)
+        self.btn_next_page.config(state=tk.NORMAL if first + LOG_PAGE_SIZE < count else tk.DISABLED)
+        self.btn_prev_diff.config(state=tk.NORMAL if count else tk.DISABLED)
+        self.btn_next_diff.config(state=tk.NORMAL if count else tk.DISABLED)
 
     def _on_log_click(self, event):
-        """Handle click on a log entry: highlight corresponding text in both panes."""
-        print(f"Click detected at {event.x}, {event.y}")  # Debug
-        
+        """Handle click on a log entry: highlight corresponding text in both panes,
+        or open a failing pair of a batch report."""
         index = self.log_text.index(f"@{event.x},{event.y}")
-        print(f"Index: {index}")  # Debug
-        
-        # Find tags at this index (ignore default tags)
         tags = self.log_text.tag_names(index)
-        print(f"Tags at index: {tags}")  # Debug
-        
-        diff_tag = None
-        for t in tags:
-            if t.startswith("diff_"):
-                diff_tag = t
-                break
-        
-        if not diff_tag:
-            print("No diff tag found")  # Debug
+        if "batch_pair" in tags:
+            k = bisect_right(self._batch_lines, int(index.split('.')[0])) - 1
+            if 0 <= k < len(self._batch_failures) and self._worker is None:
+                self._open_batch_pair(self._batch_failures[k])
             return
-        
-        print(f"Found diff tag: {diff_tag}")  # Debug
-        
-        # Retrieve mapping
-        mapping = self.log_mappings.get(diff_tag, (None, None, None, None))
-        start_a, end_a, start_b, end_b = mapping
-        
-        print(f"Mapping: {mapping}")  # Debug
-        
-        if start_a is None:
-            print("No mapping found")  # Debug
+        if self._difflog is None or not self._log_line_starts or "difference" not in tags:
             return
-        
-        # Enable text widgets to modify tags
-        self.text_a.config(state=tk.NORMAL)
-        self.text_b.config(state=tk.NORMAL)
-        
+        k = bisect_right(self._log_line_starts, int(index.split('.')[0])) - 1
+        if 0 <= k < len(self._log_line_starts) - 1:
+            self._select_difference(self._log_page * LOG_PAGE_SIZE + k)
+
+    def _step_difference(self, step):
+        """Select the next (step=1) or previous (step=-1) difference."""
+        if self._difflog is None or not len(self._difflog):
+            return
+        if self._selected is None:
+            i = 0 if step > 0 else len(self._difflog) - 1
+        else:
+            i = max(0, min(len(self._difflog) - 1, self._selected + step))
+        self._select_difference(i)
+
+    def _select_difference(self, i):
+        # A move has two places: selecting it again goes to the other one
+        self._move_target = (i == self._selected and self._difflog.moved(i) and not self._move_target)
+        self._selected = i
+        if i // LOG_PAGE_SIZE != self._log_page:
+            self._show_log_page(i // LOG_PAGE_SIZE)
+        # Entries are listed in the background; list this one now
+        self._fill_log(i + 1)
+        self._mark_selected_entry()
+        start_a, end_a, start_b, end_b = self._highlight = self._difflog.offsets(i)
+
         # Clear previous highlights
-        if self.current_highlight_tag:
-            self.text_a.tag_remove(self.current_highlight_tag, "1.0", tk.END)
-            self.text_b.tag_remove(self.current_highlight_tag, "1.0", tk.END)
-        
-        # Apply new highlight
-        self.current_highlight_tag = "active_highlight"
-        
-        print(f"Adding highlight A: {start_a} to {end_a}")  # Debug
-        print(f"Adding highlight B: {start_b} to {end_b}")  # Debug
-        
-        self.text_a.tag_add(self.current_highlight_tag, start_a, end_a)
-        self.text_b.tag_add(self.current_highlight_tag, start_b, end_b)
-        
-        # Raise the highlight tag priority so it shows on top of other tags
-        self.text_a.tag_raise(self.current_highlight_tag)
-        self.text_b.tag_raise(self.current_highlight_tag)
-        
-        # Disable text widgets again
-        self.text_a.config(state=tk.DISABLED)
-        self.text_b.config(state=tk.DISABLED)
-        
-        # Ensure visibility - scroll to show the highlighted text
-        self.text_a.see(start_a)
-        self.text_b.see(start_b)
-        
-        print("Highlight applied successfully")  # Debug
+        for widget in (self.text_a, self.text_b):
+            ranges = widget.tag_ranges("active_highlight")
+            if ranges:
+                widget.tag_remove("active_highlight", *ranges)
+
+        # Bring the difference into view (this may move the windows), then mark it
+        if self._difflog.moved(i):
+            # Both panes scroll together, to the source place or the target place
+            anchor, start = (self.text_b, start_b) if self._move_target else (self.text_a, start_a)
+            rows = self._rows.get(anchor)
+            if rows is None:
+                return
+            row, _ = rows.position(start)
+            for widget in (self.text_a, self.text_b):
+                if widget in self._rows:
+                    self._scroll_to(widget, max(0, row - 3) / len(rows))
+                    self._apply_highlight(widget)
+            anchor.see(self._pane_index(anchor, start))
+            return
+        for widget, start in ((self.text_a, start_a), (self.text_b, start_b)):
+            rows = self._rows.get(widget)
+            if rows is None:
+                continue
+            row, _ = rows.position(start)
+            self._scroll_to(widget, max(0, row - 3) / len(rows))
+            self._apply_highlight(widget)
+            widget.see(self._pane_index(widget, start))
+
+    def _mark_selected_entry(self):
+        ranges = self.log_text.tag_ranges("selected_difference")
+        if ranges:
+            self.log_text.tag_remove("selected_difference", *ranges)
+        k = self._selected - self._log_page * LOG_PAGE_SIZE
+        start, end = self._log_line_starts[k], self._log_line_starts[k + 1]
+        self.log_text.tag_add("selected_difference", f"{start}.0", f"{end}.0")
+        self.log_text.see(f"{start}.0")
 
     def _clear_log(self):
         self.log_text.delete(1.0, tk.END)
-        self.log_mappings = {}  # Clear mappings when clearing log
         self.log_counter = 0  # Reset log counter
+        self._difflog = None
+        self._selected = None
+        self._log_line_starts = array('I')
+        self._log_next = self._log_last = 0
+        self._batch_lines = array('I')
+        self._batch_failures = []
+        self._log_page = 0
+        self._update_log_nav()
 
     def _increase_font_size(self):
         """Increase font size for all text widgets."""
@@ -776,6 +1208,8 @@ class TextValidApp:
 
 
 if __name__ == "__main__":
+    # Needed for the process pool in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     try:
         logging.info("Starting application...")
         root = TkinterDnD.Tk()
@@ -0,0 +1,20 @@
+"""Checks shared by the tests."""
+
+EDIT_TAGS = ("equal", "replace", "delete", "insert")
+
+
+def check_opcodes(test, opcodes, a, b, tags=EDIT_TAGS):
+    """Assert that opcodes cover a and b in order and that equal blocks really are equal."""
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        test.assertIn(tag, tags)
+        test.assertEqual((i1, j1), (i, j), "opcodes leave a gap or overlap")
+        test.assertTrue(i1 <= i2 and j1 <= j2 and (i1 < i2 or j1 < j2), f"empty or reversed opcode {tag}")
+        if tag == "equal":
+            test.assertEqual(a[i1:i2], b[j1:j2])
+        elif tag == "delete":
+            test.assertEqual(j1, j2)
+        elif tag == "insert":
+            test.assertEqual(i1, i2)
+        i, j = i2, j2
+    test.assertEqual((i, j), (len(a), len(b)), "opcodes do not reach the end")
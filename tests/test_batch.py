@@ -0,0 +1,96 @@
+"""Batch pairing, manifests and per-pair outcomes."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from textvalid.batch import (STATUS_DIFFERENT, STATUS_ERROR, STATUS_IDENTICAL, STATUS_MISSING, BatchPair, _outcome,
+                             compare_pair, pair_directories, read_manifest, run_batch, summarize_batch)
+from textvalid.engine import MODE_FULL, MODE_SUMMARY, DiffResult, normalize_text
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        self.dir_a = os.path.join(self.root, "a")
+        self.dir_b = os.path.join(self.root, "b")
+        write(os.path.join(self.dir_a, "same.txt"), "天地玄黄，宇宙洪荒。")
+        write(os.path.join(self.dir_b, "same.txt"), "天地玄黄 宇宙洪荒")
+        write(os.path.join(self.dir_a, "sub", "edited.txt"), "天地玄黄，\n宇宙洪荒。\n日月盈昃。")
+        write(os.path.join(self.dir_b, "sub", "edited.txt"), "天地玄黄，\n宇宙洪荒。\n日月盈。")
+        write(os.path.join(self.dir_a, "only_a.txt"), "天")
+        write(os.path.join(self.dir_b, "only_b.txt"), "地")
+        write(os.path.join(self.dir_b, "notes.md"), "skipped")
+
+    def test_pair_directories(self):
+        pairs = pair_directories(self.dir_a, self.dir_b)
+        self.assertEqual([pair.name for pair in pairs], ["only_a.txt", "only_b.txt", "same.txt", "sub/edited.txt"])
+        self.assertIsNone(pairs[0].path_b)
+        self.assertIsNone(pairs[1].path_a)
+
+    def test_run_batch(self):
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                results = run_batch(pair_directories(self.dir_a, self.dir_b), workers=workers)
+                self.assertEqual([result.status for result in results],
+                                 [STATUS_MISSING, STATUS_MISSING, STATUS_IDENTICAL, STATUS_DIFFERENT])
+                edited = results[3]
+                self.assertEqual((edited.differences, edited.changed_chars), (1, 1))
+                self.assertEqual((edited.line_a, edited.line_b), (3, 3))
+                summary = summarize_batch(results)
+                self.assertEqual((summary["pairs"], summary["missing"], summary["differences"]), (4, 2, 1))
+
+    def test_summary_mode(self):
+        pair = BatchPair("edited", os.path.join(self.dir_a, "sub", "edited.txt"),
+                         os.path.join(self.dir_b, "sub", "edited.txt"))
+        result = compare_pair(pair, mode=MODE_SUMMARY)
+        self.assertEqual((result.status, result.differences, result.line_a, result.line_b),
+                         (STATUS_DIFFERENT, 1, 3, 3))
+
+    def test_manifest(self):
+        manifest = os.path.join(self.root, "pairs.tsv")
+        write(manifest, "# source\ttarget\n\na/same.txt\tb/same.txt\na/sub/edited.txt, b/sub/edited.txt\n")
+        pairs = read_manifest(manifest)
+        self.assertEqual([pair.name for pair in pairs], ["b/same.txt", "b/sub/edited.txt"])
+        self.assertEqual(pairs[0].path_a, os.path.join(self.root, "a/same.txt"))
+        write(manifest, "a/same.txt\n")
+        with self.assertRaisesRegex(ValueError, "pairs.tsv:1"):
+            read_manifest(manifest)
+
+    def test_unreadable_pair(self):
+        path = os.path.join(self.root, "latin1.txt")
+        with open(path, 'wb') as f:
+            f.write("caf\xe9".encode('latin-1'))
+        result = compare_pair(BatchPair("latin1", path, path))
+        self.assertEqual(result.status, STATUS_ERROR)
+        self.assertTrue(result.error)
+
+    def test_unexpected_error_fails_only_its_pair(self):
+        pair = BatchPair("same", os.path.join(self.dir_a, "same.txt"), os.path.join(self.dir_b, "same.txt"))
+        with mock.patch("textvalid.batch.compare_files", side_effect=RuntimeError("boom")):
+            result = compare_pair(pair)
+        self.assertEqual((result.status, result.error), (STATUS_ERROR, "RuntimeError: boom"))
+
+    def test_outcome_without_a_first_difference(self):
+        norm_a, map_a = normalize_text("天地")
+        norm_b, map_b = normalize_text("天玄")
+        pair = BatchPair("odd", "a", "b")
+        for mode in (MODE_FULL, MODE_SUMMARY):
+            with self.subTest(mode=mode):
+                result = DiffResult("天地", "天玄", norm_a, norm_b, map_a, map_b, [("equal", 0, 2, 0, 2)], mode)
+                outcome = _outcome(pair, result, 0)
+                self.assertEqual(outcome.status, STATUS_DIFFERENT)
+                self.assertEqual((outcome.line_a, outcome.line_b), (None, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""ResultCache hits, misses and eviction, in memory and on disk."""
+import os
+import tempfile
+import unittest
+
+from textvalid.cache import ResultCache, approximate_size
+from textvalid.engine import compare_texts, normalize_text
+
+
+class MemoryCacheTest(unittest.TestCase):
+
+    def test_hit_and_miss(self):
+        cache = ResultCache()
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", "天地玄黄")
+        self.assertEqual(cache.get("a"), "天地玄黄")
+        self.assertEqual((cache.stats["memory_hits"], cache.stats["misses"]), (1, 1))
+
+    def test_bounded_by_bytes(self):
+        value = "天" * 10000
+        size = approximate_size(value)
+        cache = ResultCache(memory_bytes=3 * size)
+        for key in "abcd":
+            cache.put(key, value)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual([cache.get(key) for key in "bcd"], [value] * 3)
+        cache.get("b")
+        cache.put("e", value)
+        self.assertIsNone(cache.get("c"), "the least recently used entry goes first")
+        self.assertEqual(cache.get("b"), value)
+
+    def test_entry_larger_than_budget(self):
+        cache = ResultCache(memory_bytes=1000)
+        cache.put("small", "天地")
+        cache.put("large", "天" * 10000)
+        self.assertIsNone(cache.get("large"))
+        self.assertEqual(cache.get("small"), "天地")
+
+    def test_size_counts_text_and_map(self):
+        norm, mapping = normalize_text("天地，玄黄。" * 1000)
+        self.assertGreater(approximate_size((norm, mapping)), 2 * len(norm) + 4 * len(mapping.norm_starts))
+
+    def test_compare_uses_cache(self):
+        cache = ResultCache()
+        first = compare_texts("天地玄黄，宇宙洪荒", "天地玄黄，宇宙", cache=cache)
+        misses = cache.stats["misses"]
+        second = compare_texts("天地玄黄，宇宙洪荒", "天地玄黄，宇宙", cache=cache)
+        self.assertEqual(second.opcodes, first.opcodes)
+        self.assertEqual(cache.stats["misses"], misses)
+        self.assertEqual(cache.stats["memory_hits"], 3)
+
+
+class DiskCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_disk_hit(self):
+        ResultCache(self.directory.name).put("a", "天地玄黄")
+        cache = ResultCache(self.directory.name)
+        self.assertEqual(cache.get("a"), "天地玄黄")
+        self.assertEqual(cache.stats["disk_hits"], 1)
+
+    def test_eviction(self):
+        value = "天" * 1000
+        probe = ResultCache(self.directory.name)
+        probe.put("probe", value)
+        entry = os.path.getsize(os.path.join(self.directory.name, "probe.pickle"))
+        probe.clear()
+
+        cache = ResultCache(self.directory.name, memory_bytes=0, disk_bytes=int(3.5 * entry))
+        for key in "abcd":
+            cache.put(key, value)
+            os.utime(os.path.join(self.directory.name, key + ".pickle"), (ord(key), ord(key)))
+        self.assertEqual(cache.stats["evictions"], 1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("d"), value)
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["b.pickle", "c.pickle", "d.pickle"])
+
+    def test_running_total_follows_overwrites(self):
+        cache = ResultCache(self.directory.name, disk_bytes=10 ** 9)
+        cache.put("a", "天" * 1000)
+        cache.put("a", "天")
+        self.assertEqual(cache._disk_size, os.path.getsize(os.path.join(self.directory.name, "a.pickle")))
+
+    def test_clear(self):
+        cache = ResultCache(self.directory.name)
+        cache.put("a", "天地玄黄")
+        cache.clear()
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
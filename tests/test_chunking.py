@@ -0,0 +1,85 @@
+"""Content-defined chunks fall back into step after an edit."""
+import random
+import unittest
+
+from textvalid.chunking import chunk_bounds, choose_cut_chars, chunked_opcodes, index_chunks, plan_regions
+from textvalid.diffing import MyersEngine
+from tests.support import check_opcodes
+
+SIZE = 500
+
+
+def make_text(rng, size):
+    # Skewed frequencies, like real text, so some characters make good cuts
+    return "".join(chr(0x4e00 + int(rng.paretovariate(1.2)) % 3000) for _ in range(size))
+
+
+def changed(opcodes):
+    return sum(max(i2 - i1, j2 - j1) for tag, i1, i2, j1, j2 in opcodes if tag != "equal")
+
+
+class ChunkingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(11)
+        self.text = make_text(self.rng, 100 * SIZE)
+
+    def test_chunk_sizes(self):
+        source = index_chunks(self.text, SIZE)
+        self.assertEqual(source.bounds[-1], len(self.text))
+        sizes = [end - start for start, end in zip([0] + source.bounds, source.bounds)]
+        self.assertTrue(all(SIZE // 4 <= size <= 4 * SIZE for size in sizes[:-1]))
+        self.assertLess(abs(len(sizes) - 100), 50)
+        self.assertEqual(chunk_bounds("", "", SIZE), [0])
+        self.assertEqual(choose_cut_chars("", SIZE), "")
+
+    def test_bounds_resynchronise_after_an_edit(self):
+        cut_chars = choose_cut_chars(self.text, SIZE)
+        bounds_a = chunk_bounds(self.text, cut_chars, SIZE)
+        edited = self.text[:1000] + self.text[1003:]
+        bounds_b = chunk_bounds(edited, cut_chars, SIZE)
+        shifted = {bound - 3 for bound in bounds_a if bound > 1000}
+        later = [bound for bound in bounds_b if bound > 1000 + 8 * SIZE]
+        self.assertTrue(later)
+        self.assertTrue(shifted.issuperset(later))
+
+    def test_regions_cover_both_texts(self):
+        edited = self.text[:5000] + "天地" + self.text[5000:30000] + self.text[30010:]
+        regions, chunk_count = plan_regions(self.text, edited, SIZE)
+        self.assertEqual(chunk_count, len(index_chunks(self.text, SIZE).bounds))
+        i = j = 0
+        for equal, i1, i2, j1, j2 in regions:
+            self.assertEqual((i1, j1), (i, j))
+            if equal:
+                self.assertEqual(self.text[i1:i2], edited[j1:j2])
+            i, j = i2, j2
+        self.assertEqual((i, j), (len(self.text), len(edited)))
+        differing = [(i2 - i1) for equal, i1, i2, _, _ in regions if not equal]
+        self.assertEqual(len(differing), 2)
+        self.assertLess(sum(differing), 10 * SIZE)
+
+    def test_every_chunk_edited_is_split_at_anchors(self):
+        edited = "".join(self.text[k:k + 100][:-1] + "丽" for k in range(0, len(self.text), 100))
+        regions, _ = plan_regions(self.text, edited, SIZE)
+        self.assertGreater(len(regions), 10)
+
+    def test_same_edits_as_a_full_diff(self):
+        engine = MyersEngine()
+        for case in range(10):
+            text = make_text(self.rng, 20 * SIZE)
+            edited = list(text)
+            for _ in range(case):
+                p = self.rng.randrange(len(edited))
+                if self.rng.random() < 0.5:
+                    del edited[p:p + self.rng.randint(1, 5)]
+                else:
+                    edited.insert(p, chr(0x4e00 + self.rng.randrange(3000)))
+            edited = "".join(edited)
+            with self.subTest(case=case):
+                opcodes, _ = chunked_opcodes(text, edited, SIZE, engine)
+                check_opcodes(self, opcodes, text, edited)
+                self.assertEqual(changed(opcodes), changed(engine.opcodes(text, edited)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""MyersEngine gives valid, minimal opcodes."""
+import random
+import unittest
+
+from textvalid.diffing import MyersEngine, SequenceMatcherEngine, get_engine
+from tests.support import check_opcodes
+
+
+def lcs_length(a, b):
+    row = [0] * (len(b) + 1)
+    for x in a:
+        previous = 0
+        for k, y in enumerate(b, 1):
+            previous, row[k] = row[k], previous + 1 if x == y else max(row[k], row[k - 1])
+    return row[-1]
+
+
+def matched(opcodes):
+    return sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == "equal")
+
+
+class MyersEngineTest(unittest.TestCase):
+
+    def test_default_engine(self):
+        self.assertIsInstance(get_engine(), MyersEngine)
+
+    def test_random_small_inputs_are_minimal(self):
+        rng = random.Random(4)
+        engine = MyersEngine()
+        for _ in range(2000):
+            alphabet = "之不無abc"[:rng.randint(1, 6)]
+            a = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 25)))
+            if rng.random() < 0.5:
+                b = list(a)
+                for _ in range(rng.randint(0, 4)):
+                    p = rng.randint(0, len(b))
+                    if rng.random() < 0.5 and p < len(b):
+                        del b[p]
+                    else:
+                        b.insert(p, rng.choice(alphabet))
+                b = "".join(b)
+            else:
+                b = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 25)))
+            with self.subTest(a=a, b=b):
+                opcodes = engine.opcodes(a, b)
+                check_opcodes(self, opcodes, a, b)
+                self.assertEqual(matched(opcodes), lcs_length(a, b))
+
+    def test_long_input_with_few_edits(self):
+        rng = random.Random(5)
+        a = "".join(rng.choice("天地玄黄宇宙洪荒日月盈昃") for _ in range(20000))
+        b = a[:100] + "X" + a[100:9000] + a[9005:15000] + "YZ" + a[15000:]
+        opcodes = MyersEngine().opcodes(a, b)
+        check_opcodes(self, opcodes, a, b)
+        self.assertEqual(len(a) - matched(opcodes), 5)
+        self.assertEqual(len(b) - matched(opcodes), 3)
+
+    def test_frequent_cjk_characters_are_not_junk(self):
+        # 之, 不 and 無 make up far more than 1% of the text, which makes
+        # difflib's autojunk treat them as junk and skip them as anchors.
+        rng = random.Random(6)
+        a = "".join(rng.choice("之不無" * 6 + "色空受想行識") for _ in range(400))
+        b = a[:200] + "有" + a[201:]
+        opcodes = MyersEngine().opcodes(a, b)
+        check_opcodes(self, opcodes, a, b)
+        self.assertEqual([op[:1] for op in opcodes if op[0] != "equal"], [("replace",)])
+        self.assertEqual(matched(opcodes), len(a) - 1)
+        self.assertLess(matched(SequenceMatcherEngine().opcodes(a, b)), len(a) - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
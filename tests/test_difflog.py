@@ -0,0 +1,65 @@
+"""DifferenceLog keeps the same differences as DiffResult.differences(), in arrays."""
+import random
+import unittest
+
+from textvalid.difflog import DifferenceLog
+from textvalid.engine import MODE_SUMMARY, compare_texts, describe_difference
+from textvalid.summary import describe_region
+
+
+def make_text(rng, lines):
+    return "".join("".join(chr(0x4e00 + rng.randrange(3000)) for _ in range(rng.randint(5, 30))) + "。\n"
+                   for _ in range(lines))
+
+
+def edit(rng, text, edits):
+    for _ in range(edits):
+        p = rng.randrange(len(text))
+        text = text[:p] + rng.choice(["", "天", "地玄", "，"]) + text[p + rng.randint(0, 3):]
+    return text
+
+
+class DifferenceLogTest(unittest.TestCase):
+
+    def test_same_as_differences(self):
+        rng = random.Random(12)
+        for case in range(30):
+            text_a = make_text(rng, 200)
+            result = compare_texts(text_a, edit(rng, text_a, case))
+            log = DifferenceLog(result)
+            differences = list(result.differences())
+            with self.subTest(case=case):
+                self.assertEqual(len(log), len(differences))
+                for i, diff in enumerate(differences):
+                    self.assertEqual(log.offsets(i), (diff.start_a, diff.end_a, diff.start_b, diff.end_b))
+                    self.assertEqual(log.describe(i), describe_difference(diff))
+                    self.assertFalse(log.moved(i))
+
+    def test_moves(self):
+        first, second = "如是我聞，一時佛在舍衛國祇樹給孤獨園。", "與大比丘眾千二百五十人俱，皆是大阿羅漢。"
+        result = compare_texts(first + second, second + first)
+        log = DifferenceLog(result)
+        self.assertEqual(len(log), 1)
+        self.assertTrue(log.moved(0))
+        self.assertIn("Moved:", log.describe(0))
+
+    def test_limit(self):
+        result = compare_texts("天地", "天地" + "玄" * 100)
+        self.assertTrue(DifferenceLog(result, limit=10).describe(0).endswith("'" + "玄" * 10 + "...'"))
+
+    def test_summary_mode(self):
+        text_a = make_text(random.Random(4), 2000)
+        text_b = text_a[:5000] + "天地" + text_a[5000:30000] + text_a[30010:]
+        result = compare_texts(text_a, text_b, mode=MODE_SUMMARY)
+        log = DifferenceLog(result)
+        self.assertEqual(len(log), len(result.regions))
+        for i, region in enumerate(result.regions):
+            self.assertEqual(log.offsets(i), tuple(region[:4]))
+            self.assertEqual(log.describe(i), describe_region(region))
+
+    def test_identical(self):
+        self.assertEqual(len(DifferenceLog(compare_texts("天地，玄黄", "天地玄黄"))), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""compare_texts(), describe_difference() and the command line's exit codes."""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from textvalid.cli import EXIT_DIFFERENT, EXIT_ERROR, EXIT_IDENTICAL, main
+from textvalid.engine import MODE_CHUNKED, MODE_FULL, Difference, compare_texts, describe_difference
+
+SOURCE = "天地玄黄，宇宙洪荒。\n日月盈昃，辰宿列张。\n"
+TARGET = "天地玄黄 宇宙洪荒\n日月盈，辰宿列張。\n"
+
+
+class CompareTextsTest(unittest.TestCase):
+
+    def test_ignores_punctuation_and_whitespace(self):
+        result = compare_texts("天地玄黄，宇宙洪荒。", "天地 玄黄\r\n宇宙洪荒")
+        self.assertTrue(result.identical)
+        self.assertEqual(list(result.differences()), [])
+
+    def test_differences(self):
+        result = compare_texts(SOURCE, TARGET)
+        self.assertEqual(result.mode, MODE_FULL)
+        self.assertFalse(result.identical)
+        self.assertEqual([(d.tag, d.line_a, d.line_b, d.content_a.strip("，。"), d.content_b.strip("，。"))
+                          for d in result.differences()],
+                         [("delete", 2, 2, "昃", ""), ("replace", 2, 2, "张", "張")])
+        for d in result.differences():
+            self.assertEqual(SOURCE[d.start_a:d.end_a], d.content_a)
+            self.assertEqual(TARGET[d.start_b:d.end_b], d.content_b)
+
+    def test_segments_cover_both_texts(self):
+        result = compare_texts(SOURCE, TARGET)
+        end_a = end_b = 0
+        for segment in result.segments():
+            self.assertEqual((segment.start_a, segment.start_b), (end_a, end_b))
+            end_a, end_b = segment.end_a, segment.end_b
+        self.assertEqual((end_a, end_b), (len(SOURCE), len(TARGET)))
+
+    def test_mode_from_size(self):
+        self.assertEqual(compare_texts(SOURCE, TARGET, chunk_size=10).mode, MODE_CHUNKED)
+        with self.assertRaises(ValueError):
+            compare_texts(SOURCE, TARGET, mode="fast")
+
+    def test_describe_difference(self):
+        cases = [
+            (Difference("replace", 0, 1, 0, 1, 3, 4, "天", "地"), "Replaced: '天' with '地'"),
+            (Difference("delete", 0, 1, 0, 0, 3, 4, "天", ""), "Deleted: '天'"),
+            (Difference("insert", 0, 0, 0, 1, 3, 4, "", "地"), "Inserted: '地'"),
+            (Difference("moved", 0, 2, 5, 7, 3, 4, "天地", "天，地"), "Moved: '天地'"),
+            (Difference("moved", 0, 2, 5, 7, 3, 4, "天地", "天玄"), "Moved and edited: '天地' as '天玄'"),
+        ]
+        for diff, expected in cases:
+            with self.subTest(tag=diff.tag):
+                self.assertEqual(describe_difference(diff), "[Line A:3 / B:4] [DIFFERENCE] " + expected)
+        long = Difference("insert", 0, 0, 0, 6, 1, 1, "", "天地玄黄宇宙")
+        self.assertTrue(describe_difference(long, limit=2).endswith("Inserted: '天地...'"))
+
+
+class CommandLineTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.paths = {}
+        for name, text in (("source", SOURCE), ("same", SOURCE.replace("，", " ")), ("target", TARGET)):
+            self.paths[name] = os.path.join(directory.name, name + ".txt")
+            with open(self.paths[name], 'w', encoding='utf-8') as f:
+                f.write(text)
+        self.paths["missing"] = os.path.join(directory.name, "missing.txt")
+
+    def run_main(self, *argv):
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            code = main(list(argv))
+        return code, out.getvalue(), err.getvalue()
+
+    def test_exit_codes(self):
+        for command in ("compare", "verify"):
+            with self.subTest(command=command):
+                code, out, _ = self.run_main(command, self.paths["source"], self.paths["same"])
+                self.assertEqual(code, EXIT_IDENTICAL)
+                self.assertIn("SUCCESS", out)
+                code, out, _ = self.run_main(command, self.paths["source"], self.paths["target"])
+                self.assertEqual(code, EXIT_DIFFERENT)
+                self.assertIn("Line A:2", out)
+                code, _, err = self.run_main(command, self.paths["source"], self.paths["missing"])
+                self.assertEqual(code, EXIT_ERROR)
+                self.assertTrue(err.startswith("Error:"))
+
+    def test_quiet_and_limits(self):
+        code, out, _ = self.run_main("compare", "-q", self.paths["source"], self.paths["target"])
+        self.assertEqual((code, out), (EXIT_DIFFERENT, ""))
+        _, out, _ = self.run_main("compare", "--max-differences", "1", self.paths["source"], self.paths["target"])
+        self.assertEqual(out.splitlines()[1:], ["...", "Comparison complete. Differences found."])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Fingerprint checks agree with a full compare_texts() of the same files."""
+import os
+import random
+import tempfile
+import unittest
+
+from textvalid.engine import compare_texts
+from textvalid.fingerprint import Fingerprint, check_file
+
+
+def clause(rng):
+    # Random ideographs, so that every edit has a single best alignment
+    return "".join(chr(rng.randrange(0x4e00, 0x9fa5)) for _ in range(4))
+
+
+def make_text(rng, clauses, newline):
+    return "".join(clause(rng) + rng.choice("，。") + (newline if rng.random() < 0.2 else "")
+                   for _ in range(clauses))
+
+
+def edit(rng, text, edits):
+    for _ in range(edits):
+        i = rng.randrange(len(text))
+        kind = rng.randrange(3)
+        if kind == 0:
+            text = text[:i] + text[i + rng.randint(1, 20):]
+        elif kind == 1:
+            text = text[:i] + clause(rng) + text[i:]
+        else:
+            text = text[:i] + "丽" + text[i + 1:]
+    return text
+
+
+def differences(items):
+    return [(d.tag, d.start_a, d.end_a, d.start_b, d.end_b, d.line_a, d.line_b) for d in items]
+
+
+class FingerprintTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        return path
+
+    def test_agrees_with_compare_texts(self):
+        rng = random.Random(5)
+        for case in range(30):
+            newline = "\r\n" if case % 2 else "\n"
+            source = make_text(rng, 3000, newline)
+            target = edit(rng, source, case % 6)
+            fingerprint = Fingerprint.from_file(self.write("source.txt", source), block_size=500)
+            checked = check_file(fingerprint, self.write("target.txt", target))
+            expected = compare_texts(source, target, mode="full")
+            with self.subTest(case=case):
+                self.assertEqual(checked.identical, expected.identical)
+                self.assertEqual(differences(checked.differences), differences(expected.differences()))
+                if checked.identical:
+                    self.assertEqual(checked.source_bytes, 0)
+                else:
+                    self.assertLess(checked.source_bytes, len(source.encode('utf-8')))
+
+    def test_save_and_load(self):
+        source = make_text(random.Random(1), 500, "\n")
+        fingerprint = Fingerprint.from_file(self.write("source.txt", source), block_size=300)
+        manifest = os.path.join(self.directory, "source.fingerprint.json")
+        fingerprint.save(manifest)
+        loaded = Fingerprint.load(manifest)
+        self.assertEqual((loaded.digest, loaded.root, loaded.leaves), (fingerprint.digest, fingerprint.root,
+                                                                       fingerprint.leaves))
+        target = self.write("target.txt", source[:100] + source[101:])
+        self.assertEqual(len(check_file(loaded, target).differences), 1)
+
+    def test_changed_source_is_refused(self):
+        source = make_text(random.Random(2), 500, "\n")
+        path = self.write("source.txt", source)
+        fingerprint = Fingerprint.from_file(path, block_size=300)
+        self.write("source.txt", "丽" + source[1:])
+        with self.assertRaises(ValueError):
+            check_file(fingerprint, self.write("target.txt", source[:100]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+"""Cancelling an InstrumentedProgress only stops its own run."""
+import unittest
+
+from textvalid.engine import compare_texts
+from textvalid.instrument import Instrumentation, InstrumentedProgress
+from textvalid.progress import NULL_PROGRESS, Cancelled
+
+
+class InstrumentedProgressTest(unittest.TestCase):
+
+    def test_cancel_leaves_null_progress_alone(self):
+        progress = InstrumentedProgress(Instrumentation())
+        progress.cancel()
+        self.assertTrue(progress.cancelled)
+        self.assertFalse(NULL_PROGRESS.cancelled)
+        with self.assertRaises(Cancelled):
+            compare_texts("a", "b", progress=progress)
+        self.assertFalse(compare_texts("a", "b").identical)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""LineIndex gives the same line and column as counting newlines."""
+import random
+import unittest
+from unittest import mock
+
+from textvalid.lines import LineIndex
+
+
+class LineIndexTest(unittest.TestCase):
+
+    def check(self, text):
+        index = LineIndex(text)
+        self.assertEqual(len(index), text.count("\n") + 1)
+        for offset in range(len(text) + 1):
+            line = text.count("\n", 0, offset) + 1
+            self.assertEqual(index.line(offset), line)
+            self.assertEqual(index.position(offset), (line, offset - text.rfind("\n", 0, offset) - 1))
+
+    def test_random_texts(self):
+        rng = random.Random(20)
+        for case in range(300):
+            text = "".join(rng.choice("天地\n\r，") for _ in range(rng.randint(0, 60)))
+            with self.subTest(text=text):
+                self.check(text)
+
+    def test_blocks_split_lines(self):
+        rng = random.Random(21)
+        for block in (1, 2, 3, 7):
+            text = "".join(rng.choice("天地\n") for _ in range(200))
+            with self.subTest(block=block), mock.patch("textvalid.lines._INDEX_BLOCK", block):
+                self.check(text)
+                self.check("\n" * 10)
+
+    def test_edges(self):
+        self.assertEqual((len(LineIndex("")), LineIndex("").position(0)), (1, (1, 0)))
+        index = LineIndex("天地\n玄黄\n")
+        self.assertEqual(list(index.starts), [0, 3, 6])
+        self.assertEqual(index.position(6), (3, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""find_moves() pairs identical text and keeps the opcodes a valid cover."""
+import random
+import unittest
+
+from textvalid.diffing import MyersEngine
+from textvalid.engine import compare_texts
+from textvalid.moves import find_moves, unmark_moves
+from tests.support import EDIT_TAGS, check_opcodes
+
+
+def shuffled(rng, sentences):
+    """sentences with a few moved, edited, dropped or added."""
+    sentences = list(sentences)
+    for _ in range(rng.randint(1, 4)):
+        k = rng.randrange(len(sentences))
+        kind = rng.random()
+        if kind < 0.5:
+            sentences.insert(rng.randint(0, len(sentences) - 1), sentences.pop(k))
+        elif kind < 0.7:
+            p = rng.randrange(len(sentences[k]))
+            sentences[k] = sentences[k][:p] + rng.choice("之不無") + sentences[k][p + 1:]
+        elif kind < 0.85 and len(sentences) > 1:
+            del sentences[k]
+        else:
+            sentences.insert(k, sentences[k][::-1])
+    return sentences
+
+
+class FindMovesTest(unittest.TestCase):
+
+    def check_moves(self, norm_a, norm_b, opcodes, moves):
+        check_opcodes(self, unmark_moves(opcodes), norm_a, norm_b)
+        check_opcodes(self, opcodes, norm_a, norm_b, EDIT_TAGS + ("moved",))
+        for move in moves:
+            self.assertTrue(move.pieces)
+            for i, j, n in move.pieces:
+                self.assertGreater(n, 0)
+                self.assertEqual(norm_a[i:i + n], norm_b[j:j + n])
+                self.assertTrue(move.i1 <= i and i + n <= move.i2 and move.j1 <= j and j + n <= move.j2)
+        moved_a = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == "moved")
+        self.assertEqual(moved_a, sum(n for move in moves for _, _, n in move.pieces))
+
+    def test_random_reorders(self):
+        rng = random.Random(23)
+        alphabet = "天地玄黄宇宙洪荒日月盈昃辰宿列张寒来暑往秋收冬藏"
+        for trial in range(300):
+            sentences = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 40)))
+                         for _ in range(rng.randint(1, 30))]
+            norm_a = "".join(sentences)
+            norm_b = "".join(shuffled(rng, sentences))
+            with self.subTest(trial=trial):
+                opcodes, moves = find_moves(norm_a, norm_b, MyersEngine().opcodes(norm_a, norm_b))
+                self.check_moves(norm_a, norm_b, opcodes, moves)
+
+    def test_compare_texts(self):
+        rng = random.Random(24)
+        alphabet = "色空受想行識之不無"
+        for trial in range(50):
+            sentences = ["".join(rng.choice(alphabet) for _ in range(rng.randint(5, 60))) + "。"
+                         for _ in range(rng.randint(2, 20))]
+            result = compare_texts("".join(sentences), "\n".join(shuffled(rng, sentences)))
+            with self.subTest(trial=trial):
+                self.check_moves(result.norm_a, result.norm_b, result.opcodes, result.moves)
+
+    def test_clause_reorder_is_one_move(self):
+        a = ("如是我聞，一時佛在舍衛國祇樹給孤獨園。與大比丘眾千二百五十人俱，皆是大阿羅漢。"
+             "爾時世尊食時著衣持鉢，入舍衛大城乞食。")
+        b = ("如是我聞，一時佛在舍衛國祇樹給孤獨園。爾時世尊食時著衣持鉢，入舍衛大城乞食。"
+             "與大比丘眾千二百五十人俱，皆是大阿羅漢。")
+        result = compare_texts(a, b)
+        changes = list(result.changes())
+        self.assertEqual([change.tag for change in changes], ["moved"])
+        self.assertEqual(len(result.moves), 1)
+        (diff,) = result.differences()
+        self.assertEqual(diff.content_a, diff.content_b)
+
+
+if __name__ == "__main__":
+    unittest.main()
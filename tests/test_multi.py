@@ -0,0 +1,88 @@
+"""One source against many targets gives the same results as pairwise comparison."""
+import os
+import pickle
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from textvalid.batch import STATUS_DIFFERENT, STATUS_ERROR, STATUS_IDENTICAL, BatchPair, compare_pair
+from textvalid.engine import MODE_CHUNKED, compare_texts
+from textvalid.multi import SourceIndex, compare_target, compare_targets, format_ranking, preserved, rank_targets
+
+
+def make_text(rng, lines):
+    return "".join("".join(chr(0x4e00 + rng.randrange(3000)) for _ in range(rng.randint(5, 30))) + "。\n"
+                   for _ in range(lines))
+
+
+class MultiTargetTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        rng = random.Random(19)
+        self.source = make_text(rng, 500)
+        self.source_path = self.write("source.txt", self.source)
+        self.targets = [
+            self.write("same.txt", self.source.replace("。", "，")),
+            self.write("many.txt", self.source[:100] + self.source[110:3000] + "天地" + self.source[3000:]),
+            self.write("one.txt", self.source[:5000] + self.source[5001:]),
+        ]
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_same_as_compare_pair(self):
+        expected = [compare_pair(BatchPair(os.path.basename(target), self.source_path, target))
+                    for target in self.targets]
+        source = SourceIndex.load(self.source_path)
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                results = compare_targets(source, self.targets, self.source_path, workers=workers)
+                self.assertEqual([result[:8] for result in results], [result[:8] for result in expected])
+
+    def test_ranking(self):
+        missing = os.path.join(self.root, "missing.txt")
+        results = compare_targets(SourceIndex(self.source), self.targets + [missing], workers=1)
+        ranked = rank_targets(results)
+        self.assertEqual([result.name for result in ranked], ["same.txt", "one.txt", "many.txt", "missing.txt"])
+        self.assertEqual([result.status for result in ranked],
+                         [STATUS_IDENTICAL, STATUS_DIFFERENT, STATUS_DIFFERENT, STATUS_ERROR])
+        length = len(SourceIndex(self.source).normalized[0])
+        self.assertEqual(preserved(ranked[0], length), 1.0)
+        self.assertTrue(0.99 < preserved(ranked[1], length) < 1.0)
+        self.assertIsNone(preserved(ranked[3], length))
+        header, rows = format_ranking(ranked, length)
+        self.assertEqual(header.split()[:3], ["#", "Target", "Result"])
+        self.assertEqual(len(rows), 4)
+
+    def test_names_by_path_when_file_names_repeat(self):
+        other = self.write(os.path.join("other", "same.txt"), self.source)
+        results = compare_targets(SourceIndex(self.source), [self.targets[0], other], workers=1)
+        self.assertEqual([result.name for result in results], [self.targets[0], other])
+
+    def test_source_index(self):
+        source = SourceIndex(self.source)
+        self.assertIs(source.chunks(1000), source.chunks(1000))
+        copy = pickle.loads(pickle.dumps(source))
+        self.assertEqual((copy.text, copy.normalized[0], copy._chunks), (source.text, source.normalized[0], {}))
+        target = self.source[:2000] + "天" + self.source[2000:]
+        with_index = compare_texts(self.source, target, mode=MODE_CHUNKED, chunk_size=1000, source=source)
+        without = compare_texts(self.source, target, mode=MODE_CHUNKED, chunk_size=1000)
+        self.assertEqual(with_index.opcodes, without.opcodes)
+
+    def test_unexpected_error_fails_only_its_target(self):
+        pair = BatchPair("same.txt", self.source_path, self.targets[0])
+        with mock.patch("textvalid.multi.compare_texts", side_effect=RuntimeError("boom")):
+            result = compare_target(SourceIndex(self.source), pair)
+        self.assertEqual((result.status, result.error), (STATUS_ERROR, "RuntimeError: boom"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""normalize_text() and the OffsetMap it returns."""
+import random
+import unittest
+
+from textvalid.engine import (OffsetMap, _bmp_ignored_class, _is_ignored, normalize_in_slices, normalize_text,
+                              strip_ignored)
+
+
+class NormalizeTest(unittest.TestCase):
+
+    def test_astral_ignored_characters(self):
+        for i in range(40):
+            tag = chr(0xE0020 + i)  # Cf tag characters
+            text = f"天{tag}地，\U00020000{tag}玄"
+            norm, mapping = normalize_text(text)
+            self.assertEqual(norm, "天地\U00020000玄")
+            self.assertEqual(strip_ignored(text), norm)
+            self.assertEqual([text[i] for i in mapping], list(norm))
+        self.assertEqual(_bmp_ignored_class.cache_info().misses, 1)
+
+    def test_slices_match_one_call(self):
+        rng = random.Random(7)
+        for case in range(300):
+            text = "".join(rng.choice("天地玄黄，。 \n\U00020000\U000E0021") for _ in range(rng.randint(0, 300)))
+            norm, mapping = normalize_text(text)
+            for slice_chars in (1, 2, 5, 64):
+                with self.subTest(case=case, slice_chars=slice_chars):
+                    sliced_norm, sliced_map = normalize_in_slices(text, slice_chars=slice_chars)
+                    self.assertEqual(sliced_norm, norm)
+                    self.assertEqual((sliced_map.norm_starts, sliced_map.orig_starts), (mapping.norm_starts,
+                                                                                           mapping.orig_starts))
+                    self.assertEqual((sliced_map.length, sliced_map.orig_length), (mapping.length,
+                                                                                  mapping.orig_length))
+
+
+class OffsetMapTest(unittest.TestCase):
+
+    def test_matches_a_list_of_offsets(self):
+        rng = random.Random(3)
+        for case in range(300):
+            text = "".join(rng.choice("天地玄黄，。 \n\U00020000") for _ in range(rng.randint(0, 60)))
+            offsets = [i for i, char in enumerate(text) if not _is_ignored(char)]
+            norm, mapping = normalize_text(text)
+            with self.subTest(case=case, text=text):
+                self.assertEqual(len(mapping), len(offsets))
+                self.assertEqual(list(mapping), offsets)
+                self.assertEqual([mapping[i] for i in range(len(offsets))], offsets)
+                self.assertEqual(mapping.start(len(norm)), len(text))
+                for i1 in range(len(offsets) + 1):
+                    for i2 in range(i1, len(offsets) + 1):
+                        start = offsets[i1] if i1 < len(offsets) else len(text)
+                        end = offsets[i2 - 1] + 1 if i2 > i1 else start
+                        self.assertEqual(mapping.span(i1, i2), (start, end))
+
+    def test_runs(self):
+        norm, mapping = normalize_text("，天地 玄黄。。宇")
+        self.assertEqual((list(mapping.norm_starts), list(mapping.orig_starts)), ([0, 2, 4], [1, 4, 8]))
+        self.assertEqual((mapping[-1], mapping[2]), (8, 4))
+        with self.assertRaises(IndexError):
+            mapping[5]
+        empty = OffsetMap.from_runs([0, 3], [0, 0], 3)
+        self.assertEqual((len(empty), list(empty), empty.start(0), empty.span(0, 0)), (0, [], 3, (3, 3)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""ParallelPool gives the in-process results and leaves nothing mapped in its workers."""
+import os
+import threading
+import time
+import unittest
+
+from textvalid.diffing import get_engine
+from textvalid.engine import compare_texts
+from textvalid.parallel import PARALLEL_MIN_CHARS, ParallelPool, _diff_region, _release, _share
+from textvalid.progress import Cancelled, Progress
+
+from .support import EDIT_TAGS, check_opcodes
+
+
+def shared_mappings():
+    """SharedMemory segments mapped in this process (Linux)."""
+    with open("/proc/self/maps") as f:
+        return sum("/dev/shm/psm_" in line for line in f)
+
+
+def make_text(size):
+    clause = "天地玄黄，宇宙洪荒。日月盈昃，辰宿列张。寒来暑往，秋收冬藏。\n"
+    return (clause * (size // len(clause) + 1))[:size]
+
+
+class ParallelPoolTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ParallelPool(2)
+        cls.text_a = make_text(PARALLEL_MIN_CHARS + 1000)
+        cls.text_b = cls.text_a[:1000] + "閏餘成歲" + cls.text_a[1000:500000] + cls.text_a[500100:]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_same_as_in_process(self):
+        expected = compare_texts(self.text_a, self.text_b)
+        result = compare_texts(self.text_a, self.text_b, pool=self.pool)
+        self.assertEqual(result.mode, expected.mode)
+        self.assertEqual(result.norm_a, expected.norm_a)
+        self.assertEqual(list(result.map_a), list(expected.map_a))
+        self.assertEqual(result.opcodes, expected.opcodes)
+        check_opcodes(self, result.opcodes, result.norm_a, result.norm_b, EDIT_TAGS + ("moved",))
+
+    @unittest.skipUnless(os.path.exists("/proc/self/maps"), "needs /proc")
+    def test_workers_unmap_segments(self):
+        compare_texts(self.text_a, self.text_b, pool=self.pool)
+        for _ in range(self.pool.workers):
+            self.assertEqual(self.pool._executor.submit(shared_mappings).result(), 0)
+
+    def test_cancel_reaches_workers(self):
+        shm_a, shm_b = _share("天地玄黄".encode('utf-32-le')), _share("天地玄".encode('utf-32-le'))
+        flag = _share(b"\0")
+        try:
+            args = (shm_a.name, shm_b.name, flag.name, 0, 4, 0, 3, get_engine())
+            self.assertEqual(_diff_region(*args), [("equal", 0, 3, 0, 3), ("delete", 3, 4, 3, 3)])
+            flag.buf[0] = 1
+            self.assertRaises(Cancelled, _diff_region, *args)
+            _release(flag)
+            self.assertRaises(Cancelled, _diff_region, *args)
+        finally:
+            _release(shm_a)
+            _release(shm_b)
+
+    def test_cancel_while_diffing(self):
+        # Every chunk differs, so the whole text is one region in one worker
+        norm_a = compare_texts(self.text_a, self.text_a).norm_a
+        norm_b = norm_a.replace("日", "月")
+        progress = Progress()
+        threading.Timer(0.5, progress.cancel).start()
+        started = time.perf_counter()
+        with self.assertRaises(Cancelled):
+            self.pool.chunked_opcodes(norm_a, norm_b, 20000, get_engine(), progress)
+        for _ in range(self.pool.workers):
+            self.pool._executor.submit(os.getpid).result()
+        self.assertLess(time.perf_counter() - started, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""Report writers: JSON Lines, JSON, unified diff and HTML."""
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from textvalid.engine import MODE_SUMMARY, compare_texts
+from textvalid.report import (MAX_SHOWN_CHARS, difference_records, export_report, format_for_path, write_html,
+                              write_json, write_jsonl, write_unified)
+
+SOURCE = "天地玄黄，宇宙洪荒。\n日月盈昃，辰宿列张。\n寒来暑往，秋收冬藏。\n"
+TARGET = "天地玄黄，宇宙洪荒。\n日月盈，辰宿列张。\n寒来暑往<b>，秋收冬藏。\n"
+
+
+class ReportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.result = compare_texts(SOURCE, TARGET, mode="full")
+
+    def test_records(self):
+        records = list(difference_records(self.result))
+        self.assertEqual([record["tag"] for record in records], ["delete", "insert"])
+        first = records[0]
+        self.assertEqual((first["source"]["line"], first["source"]["column"], first["source"]["text"]), (2, 4, "昃"))
+        self.assertEqual((first["target"]["line"], first["target"]["column"], first["target"]["text"]), (2, 5, ""))
+        # A changed stretch takes in the ignored characters around it
+        self.assertEqual(records[1]["target"]["text"], "<b>")
+
+    def test_jsonl(self):
+        f = io.StringIO()
+        self.assertEqual(write_jsonl(self.result, f, "a.txt", "b.txt"), 2)
+        lines = [json.loads(line) for line in f.getvalue().splitlines()]
+        self.assertEqual([line["type"] for line in lines], ["comparison", "difference", "difference", "summary"])
+        self.assertEqual((lines[0]["source"], lines[0]["identical"]), ("a.txt", False))
+        self.assertEqual(lines[-1], {"type": "summary", "differences": 2, "changed_chars": 4, "truncated": 0})
+
+    def test_json_matches_jsonl(self):
+        lines, document = io.StringIO(), io.StringIO()
+        write_jsonl(self.result, lines)
+        self.assertEqual(write_json(self.result, document), 2)
+        records = [json.loads(line) for line in lines.getvalue().splitlines()]
+        report = json.loads(document.getvalue())
+        self.assertEqual([report["comparison"], *report["differences"], report["summary"]], records)
+
+    def test_json_without_differences(self):
+        f = io.StringIO()
+        self.assertEqual(write_json(compare_texts(SOURCE, SOURCE), f), 0)
+        report = json.loads(f.getvalue())
+        self.assertEqual((report["differences"], report["summary"]["differences"]), ([], 0))
+        self.assertTrue(report["comparison"]["identical"])
+
+    def test_long_texts_are_capped(self):
+        long = "闰" * (MAX_SHOWN_CHARS + 500)
+        result = compare_texts(SOURCE, SOURCE + long, mode="full")
+        f = io.StringIO()
+        write_jsonl(result, f)
+        lines = [json.loads(line) for line in f.getvalue().splitlines()]
+        target = lines[1]["target"]
+        self.assertEqual((len(target["text"]), target["truncated"], target["end"] - target["start"]),
+                         (MAX_SHOWN_CHARS, True, len(long)))
+        self.assertEqual(lines[-1]["truncated"], 1)
+        complete = next(difference_records(result, max_chars=None))
+        self.assertEqual(complete["target"]["text"], long)
+        self.assertNotIn("truncated", complete["target"])
+
+    def test_summary_mode(self):
+        result = compare_texts(SOURCE * 50, SOURCE * 20 + TARGET + SOURCE * 29, mode=MODE_SUMMARY)
+        records = list(difference_records(result))
+        self.assertEqual(len(records), len(result.regions))
+        self.assertTrue(all("edits" in record for record in records))
+
+    def test_unified(self):
+        f = io.StringIO()
+        self.assertEqual(write_unified(self.result, f, "a.txt", "b.txt"), 2)
+        self.assertEqual(f.getvalue(), "--- a.txt\n+++ b.txt\n"
+                                       "@@ -2,1 +2,1 @@\n-日月盈[-昃-]，辰宿列张。\n+日月盈，辰宿列张。\n"
+                                       "@@ -3,1 +3,1 @@\n-寒来暑往，秋收冬藏。\n+寒来暑往{+<b>+}，秋收冬藏。\n")
+
+    def test_html_escapes(self):
+        f = io.StringIO()
+        self.assertEqual(write_html(self.result, f, "<a>", "b"), 2)
+        page = f.getvalue()
+        self.assertIn("&lt;a&gt;", page)
+        self.assertIn("寒来暑往<ins>&lt;b&gt;</ins>", page)
+        self.assertNotIn("<b>", page)
+
+    def test_format_from_extension(self):
+        for path, fmt in (("r.jsonl", "jsonl"), ("r.ndjson", "jsonl"), ("r.json", "json"), ("r.JSON", "json"),
+                          ("r.diff", "unified"), ("r.txt", "unified"), ("r.htm", "html")):
+            with self.subTest(path=path):
+                self.assertEqual(format_for_path(path), fmt)
+
+    def test_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "report.json")
+            self.assertEqual(export_report(self.result, path), 2)
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(json.load(f)["summary"]["differences"], 2)
+            with self.assertRaises(ValueError):
+                export_report(self.result, path, fmt="pdf")
+
+
+if __name__ == "__main__":
+    unittest.main()
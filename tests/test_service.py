@@ -0,0 +1,108 @@
+"""The HTTP service answers malformed requests with 400, not a dropped connection."""
+import http.client
+import json
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from textvalid.service import CompareJob, ValidationService, make_server, run_job
+
+
+class ServiceRequestTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = ValidationService(workers=1)
+        cls.server = make_server(cls.service, port=0)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.close()
+
+    def post(self, request):
+        data = json.dumps(request).encode('utf-8')
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.url + "/compare", data=data), timeout=60) as r:
+                return r.status, json.load(r)
+        except urllib.error.HTTPError as e:
+            return e.code, json.load(e)
+
+    def test_malformed_fields(self):
+        for request in ({"source": "a", "target": "b", "engine": ["x"]},
+                        {"source": "a", "target": "b", "engine": {"x": 1}},
+                        {"source": "a", "target": "b", "engine": "nope"},
+                        {"source": "a", "target": "b", "mode": ["full"]},
+                        {"source": "a", "target": "b", "mode": 3},
+                        {"source": "a", "target": "b", "max_differences": -1},
+                        {"source": "a", "target": "b", "max_chars": "10"},
+                        {"source": 1, "target": "b"},
+                        {"source": "a"},
+                        {"source_path": "a.txt", "target": "b"},
+                        [1, 2]):
+            with self.subTest(request=request):
+                status, answer = self.post(request)
+                self.assertEqual(status, 400)
+                self.assertIn("error", answer)
+
+    def test_lone_surrogate(self):
+        status, answer = self.post({"source": "天地玄黄", "target": "天地日\ud800月玄黄", "mode": "full"})
+        self.assertEqual(status, 200)
+        self.assertEqual(answer["differences"][0]["target"]["text"], "日\ud800月")
+
+    def test_negative_content_length(self):
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.server_port, timeout=60)
+        try:
+            connection.putrequest("POST", "/compare")
+            connection.putheader("Content-Length", "-1")
+            connection.endheaders()
+            response = connection.getresponse()
+            self.assertEqual(response.status, 400)
+            self.assertIn("error", json.load(response))
+        finally:
+            connection.close()
+
+    def test_compare(self):
+        status, answer = self.post({"source": "天地，玄黄。", "target": "天地玄黄", "engine": None})
+        self.assertEqual(status, 200)
+        self.assertTrue(answer["identical"])
+        status, answer = self.post({"source": "天地玄黄", "target": "天地玄", "mode": "full"})
+        self.assertEqual(status, 200)
+        self.assertEqual(answer["difference_count"], 1)
+        self.assertEqual(answer["differences"][0]["tag"], "delete")
+
+    def test_texts_capped_by_default(self):
+        long = "闰" * 1500
+        status, answer = self.post({"source": "天地", "target": "天地" + long, "mode": "full"})
+        target = answer["differences"][0]["target"]
+        self.assertEqual((status, len(target["text"]), target["truncated"]), (200, 1000, True))
+        status, answer = self.post({"source": "天地", "target": "天地" + long, "mode": "full", "max_chars": None})
+        self.assertEqual(answer["differences"][0]["target"]["text"], long)
+
+    def test_warm_source_sent_by_key(self):
+        source = "天地玄黄，宇宙洪荒。日月盈昃，辰宿列张。" * 50
+        before = self.service.stats.report()
+        for i in range(5):
+            status, answer = self.post({"source": source, "target": source + "寒" * i, "mode": "full"})
+            self.assertEqual(status, 200)
+            self.assertEqual(answer["difference_count"], 1 if i else 0)
+        after = self.service.stats.report()
+        self.assertEqual(after["source_cold"] - before["source_cold"], 1)
+        self.assertEqual(after["source_warm"] - before["source_warm"], 4)
+        self.assertEqual(after["source_resent"], before["source_resent"])
+
+    def test_unknown_key_asks_for_source(self):
+        job = CompareJob("no such key", None, None, "天地", None, "full", None, 10, None, time.time() + 30)
+        self.assertEqual(run_job(job), {"need_source": True})
+        answer = run_job(job._replace(source_text="天地"))
+        self.assertTrue(answer["identical"])
+        self.assertEqual(answer["source_cache"], "cold")
+
+
+if __name__ == "__main__":
+    unittest.main()
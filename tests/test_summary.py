@@ -0,0 +1,66 @@
+"""Summary mode reports each edit as one tight region with its lines and size."""
+import random
+import unittest
+
+from textvalid.engine import MODE_SUMMARY, compare_texts, strip_ignored
+from textvalid.summary import SummaryRegion, describe_region, estimate_edits
+
+
+def make_text(rng, lines):
+    return "".join("".join(chr(0x4e00 + rng.randrange(3000)) for _ in range(rng.randint(5, 30))) + "。\n"
+                   for _ in range(lines))
+
+
+def line_of(text, offset):
+    return text.count("\n", 0, offset) + 1
+
+
+class SummaryTest(unittest.TestCase):
+
+    def test_regions_surround_each_edit(self):
+        rng = random.Random(9)
+        text_a = make_text(rng, 20000)
+        # Well apart, so that each edit is a region of its own
+        edits = [(40000, 40003, ""), (120000, 120000, "天地玄黄"), (250000, 250005, "宇宙")]
+        text_b = text_a
+        for start, end, new in reversed(edits):
+            text_b = text_b[:start] + new + text_b[end:]
+        regions = compare_texts(text_a, text_b, mode=MODE_SUMMARY).regions
+        self.assertEqual(len(regions), len(edits))
+        # Putting each region's target text in place of its source text gives the target back
+        spliced, end_a = [], 0
+        for region in regions:
+            spliced += [text_a[end_a:region.start_a], text_b[region.start_b:region.end_b]]
+            end_a = region.end_a
+        self.assertEqual(strip_ignored("".join(spliced) + text_a[end_a:]), strip_ignored(text_b))
+        shift = 0
+        for region, (start, end, new) in zip(regions, edits):
+            with self.subTest(start=start):
+                self.assertLess(abs(region.start_a - start), 10)
+                self.assertLess(abs(region.start_b - (start + shift)), 10)
+                self.assertLess(region.end_a - region.start_a, 20)
+                self.assertEqual((region.line_a, region.line_b),
+                                 (line_of(text_a, region.start_a), line_of(text_b, region.start_b)))
+                self.assertEqual(region.edits, estimate_edits(strip_ignored(text_a[start:end]), strip_ignored(new)))
+                self.assertNotEqual(strip_ignored(text_a[region.start_a:region.end_a]),
+                                    strip_ignored(text_b[region.start_b:region.end_b]))
+            shift += len(new) - (end - start)
+
+    def test_identical_and_punctuation_only(self):
+        text = make_text(random.Random(2), 2000)
+        self.assertEqual(compare_texts(text, text, mode=MODE_SUMMARY).regions, [])
+        result = compare_texts(text, text.replace("。", "，"), mode=MODE_SUMMARY)
+        self.assertEqual((result.regions, result.diff_count), ([], 0))
+
+    def test_estimate_edits(self):
+        self.assertEqual(estimate_edits("天地玄黄", "天玄黄宇"), 2)
+        self.assertEqual(estimate_edits("", "宇宙"), 2)
+
+    def test_describe_region(self):
+        region = SummaryRegion(10, 14, 20, 21, 3, 4, 3)
+        self.assertEqual(describe_region(region), "[Line A:3 / B:4] [DIFFERENCE] ~3 characters changed "
+                                                  "(4 chars in source, 1 in target)")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""verify_streams() finds the first mismatch, and its line and column, whatever the block size."""
+import io
+import os
+import random
+import tempfile
+import unittest
+
+from textvalid.engine import normalize_text
+from textvalid.verify import Mismatch, describe_mismatch, verify_files, verify_streams
+
+
+def location(text, offset):
+    return text.count("\n", 0, offset) + 1, offset - text.rfind("\n", 0, offset)
+
+
+def expected_mismatch(a, b):
+    """The Mismatch of a and b, worked out on the whole texts."""
+    norm_a, map_a = normalize_text(a)
+    norm_b, map_b = normalize_text(b)
+    if norm_a == norm_b:
+        return None
+    same = next((i for i, (x, y) in enumerate(zip(norm_a, norm_b)) if x != y), min(len(norm_a), len(norm_b)))
+    sides = []
+    for text, norm, mapping in ((a, norm_a, map_a), (b, norm_b, map_b)):
+        offset = mapping.start(same)
+        char = norm[same] if same < len(norm) else None
+        context = text[offset:offset + 20].split("\n", 1)[0] if char else ""
+        sides.append((*location(text, offset), char, context))
+    (line_a, column_a, char_a, context_a), (line_b, column_b, char_b, context_b) = sides
+    return Mismatch(same, line_a, column_a, line_b, column_b, char_a, char_b, context_a, context_b)
+
+
+def verify(a, b, block_size):
+    return verify_streams(io.BytesIO(a.encode('utf-8')), io.BytesIO(b.encode('utf-8')), block_size)
+
+
+class VerifyTest(unittest.TestCase):
+
+    def test_random_edits(self):
+        rng = random.Random(8)
+        for case in range(200):
+            a = "".join(rng.choice("天地玄黄，。 \n\U00020000") for _ in range(rng.randint(0, 80)))
+            b = list(a)
+            for _ in range(rng.randint(0, 2)):
+                p = rng.randint(0, len(b))
+                if rng.random() < 0.5 and p < len(b):
+                    del b[p]
+                else:
+                    b.insert(p, rng.choice("天宇\n，"))
+            b = "".join(b)
+            expected = expected_mismatch(a, b)
+            for block_size in (1, 2, 3, 5, 64):
+                with self.subTest(a=a, b=b, block_size=block_size):
+                    mismatch = verify(a, b, block_size)
+                    if expected is None:
+                        self.assertIsNone(mismatch)
+                        continue
+                    self.assertEqual(mismatch[:7], expected[:7])
+                    # Context stops at the end of the block holding the mismatch
+                    self.assertTrue(expected.context_a.startswith(mismatch.context_a))
+                    self.assertTrue(expected.context_b.startswith(mismatch.context_b))
+
+    def test_mismatch_position(self):
+        a = "天地玄黄，\n宇宙洪荒。\n日月盈昃"
+        b = "天地玄黄\r\n宇宙 洪荒\n日月盈\n昃"
+        self.assertIsNone(verify(a, b, 4))
+        mismatch = verify(a, b.replace("洪", "鸿"), 1024)
+        self.assertEqual(mismatch, Mismatch(6, 2, 3, 2, 4, "洪", "鸿", "洪荒。", "鸿荒"))
+        self.assertEqual(describe_mismatch(mismatch), "[Line A:2 Col:3 / B:2 Col:4] [MISMATCH] Source has '洪', "
+                                                      "target has '鸿' (source: '洪荒。', target: '鸿荒')")
+
+    def test_target_ends_first(self):
+        mismatch = verify("天地\n玄黄", "天地\n玄", 2)
+        self.assertEqual((mismatch.line_b, mismatch.column_b, mismatch.char_a, mismatch.char_b), (2, 2, "黄", None))
+        self.assertIn("target has end of file", describe_mismatch(mismatch))
+
+    def test_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, name) for name in ("a.txt", "b.txt")]
+            for path, text in zip(paths, ("天地玄黄。\n" * 1000, "天地玄黄。\n" * 999 + "天地玄。\n")):
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+            mismatch = verify_files(*paths, block_size=100)
+            self.assertEqual((mismatch.offset, mismatch.line_a, mismatch.column_a), (3999, 1000, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
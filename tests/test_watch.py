@@ -0,0 +1,88 @@
+"""update_result() agrees with comparing the new texts from scratch."""
+import random
+import unittest
+
+from textvalid.engine import compare_texts
+from textvalid.moves import unmark_moves
+from textvalid.watch import update_result
+from tests.support import check_opcodes
+
+CHARS = "天地玄黄宇宙洪荒日月盈昃，。 \n、「」\U00020000"
+
+
+def random_text(rng, size):
+    return "".join(rng.choice(CHARS) for _ in range(size))
+
+
+def edit(rng, text):
+    """text with one random edit, at the start, the end or anywhere."""
+    kind = rng.choice(["start", "end", "middle", "middle", "clear", "punctuation"])
+    if kind == "clear":
+        return ""
+    if kind == "punctuation":
+        p = rng.randint(0, len(text))
+        return text[:p] + "，" + text[p:]
+    size = rng.randint(0, 40)
+    p = {"start": 0, "end": len(text)}.get(kind) or rng.randint(0, len(text))
+    q = min(len(text), p + rng.randint(0, 40)) if kind != "end" else len(text)
+    return text[:p] + random_text(rng, size) + text[q:]
+
+
+class UpdateResultTest(unittest.TestCase):
+
+    def check_update(self, a, b, a2, b2):
+        updated = update_result(compare_texts(a, b), a2, b2)
+        fresh = compare_texts(a2, b2)
+        self.assertEqual(updated.norm_a, fresh.norm_a)
+        self.assertEqual(updated.norm_b, fresh.norm_b)
+        self.assertEqual(list(updated.map_a), list(fresh.map_a))
+        self.assertEqual(list(updated.map_b), list(fresh.map_b))
+        self.assertEqual(updated.map_a.orig_length, len(a2))
+        self.assertEqual(updated.map_b.orig_length, len(b2))
+        self.assertEqual(updated.identical, fresh.identical)
+        check_opcodes(self, unmark_moves(updated.opcodes), updated.norm_a, updated.norm_b)
+        return updated
+
+    def test_random_edits(self):
+        rng = random.Random(16)
+        for trial in range(400):
+            a = random_text(rng, rng.choice([0, 1, 30, 400, 2000]))
+            b = edit(rng, a) if rng.random() < 0.7 else random_text(rng, rng.randint(0, 400))
+            side = rng.choice(["a", "b", "both"])
+            a2 = edit(rng, a) if side != "b" else a
+            b2 = edit(rng, b) if side != "a" else b
+            with self.subTest(trial=trial, side=side):
+                self.check_update(a, b, a2, b2)
+
+    def test_edges(self):
+        a = "天地玄黄，宇宙洪荒。\n日月盈昃，辰宿列张。\n"
+        b = a.replace("洪荒", "洪")
+        cases = [
+            ("X" + a, b), (a, "X" + b),                  # offset 0
+            (a + "X", b), (a, b + "X"), (a[:-1], b),     # end of file
+            ("", b), (a, ""), ("", ""),                  # all text deleted
+            (a, b), (b, b),                              # unchanged / made identical
+            ("，。" + a, b),                              # only ignored characters
+        ]
+        for a2, b2 in cases:
+            with self.subTest(a2=a2, b2=b2):
+                self.check_update(a, b, a2, b2)
+
+    def test_chunked_result(self):
+        rng = random.Random(17)
+        a = random_text(rng, 100000)
+        b = a[:30000] + "改" + a[30010:]
+        result = compare_texts(a, b)
+        self.assertEqual(result.mode, "chunked")
+        for _ in range(5):
+            a2, b2 = edit(rng, a), edit(rng, b)
+            with self.subTest():
+                updated = update_result(result, a2, b2)
+                fresh = compare_texts(a2, b2)
+                self.assertEqual((updated.norm_a, updated.norm_b), (fresh.norm_a, fresh.norm_b))
+                self.assertEqual(list(updated.map_b), list(fresh.map_b))
+                check_opcodes(self, unmark_moves(updated.opcodes), updated.norm_a, updated.norm_b)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Headless text validation: compare texts ignoring punctuation and whitespace."""
+from .batch import BatchPair, BatchResult, pair_directories, read_manifest, run_batch, write_report
+from .cache import ResultCache
+from .diffing import (
+    DEFAULT_ENGINE,
+    ENGINES,
+    DiffEngine,
+    MyersEngine,
+    SequenceMatcherEngine,
+    get_engine,
+)
+from .document import LoadedDocument, compare_documents
+from .engine import (
+    CHUNK_SIZE,
+    SUMMARY_MODE_SIZE,
+    DiffResult,
+    Difference,
+    OffsetMap,
+    Segment,
+    compare_files,
+    compare_texts,
+    describe_difference,
+    normalize_in_slices,
+    normalize_text,
+    read_text,
+    strip_ignored,
+)
+from .fingerprint import Fingerprint, FingerprintCheck, check_file, check_text, fingerprint_corpus
+from .lines import LineIndex
+from .multi import SourceIndex, compare_targets, rank_targets
+from .report import export_report
+from .service import ValidationService, make_server
+from .summary import SummaryRegion, describe_region, summarize
+from .verify import Mismatch, describe_mismatch, verify_files
+
+__all__ = [
+    "CHUNK_SIZE",
+    "DEFAULT_ENGINE",
+    "ENGINES",
+    "SUMMARY_MODE_SIZE",
+    "BatchPair",
+    "BatchResult",
+    "DiffEngine",
+    "DiffResult",
+    "Difference",
+    "Fingerprint",
+    "FingerprintCheck",
+    "LineIndex",
+    "LoadedDocument",
+    "Mismatch",
+    "MyersEngine",
+    "OffsetMap",
+    "ResultCache",
+    "Segment",
+    "SequenceMatcherEngine",
+    "SourceIndex",
+    "SummaryRegion",
+    "ValidationService",
+    "check_file",
+    "check_text",
+    "compare_documents",
+    "compare_files",
+    "compare_targets",
+    "compare_texts",
+    "describe_difference",
+    "describe_mismatch",
+    "describe_region",
+    "export_report",
+    "fingerprint_corpus",
+    "get_engine",
+    "make_server",
+    "normalize_in_slices",
+    "normalize_text",
+    "pair_directories",
+    "read_manifest",
+    "rank_targets",
+    "read_text",
+    "run_batch",
+    "strip_ignored",
+    "summarize",
+    "verify_files",
+    "write_report",
+]
@@ -0,0 +1,222 @@
+"""Compare many source/target pairs at once, on a pool of worker processes.
+
+Pairs come from two directories (matched by relative path) or from a
+manifest listing one "source<TAB>target" pair per line. Each pair is
+compared in a worker process that sends back only a BatchResult (status,
+counts, timing), never the texts or the diff, and at most two pairs per
+worker are in flight, so memory stays bounded however many pairs there
+are. Large pairs use summary mode and files over VERIFY_SIZE are verified
+by streaming, as in the GUI.
+"""
+import csv
+import json
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .engine import MODE_SUMMARY, SUMMARY_MODE_SIZE, compare_files
+from .progress import NULL_PROGRESS
+from .verify import verify_files
+
+VERIFY_SIZE = 256 * 1024 * 1024  # 256MB - larger files are verified by streaming
+DEFAULT_SUFFIXES = (".txt",)  # Files paired in directory mode
+
+STATUS_IDENTICAL = "identical"
+STATUS_DIFFERENT = "different"
+STATUS_MISSING = "missing"
+STATUS_ERROR = "error"
+
+# A pair to compare; path_a or path_b is None when the file has no partner.
+BatchPair = namedtuple("BatchPair", "name path_a path_b")
+
+# Outcome of one pair. differences counts differences (summary mode:
+# regions), changed_chars the characters involved; line_a/line_b locate the
+# first difference. seconds is the time the worker spent on the pair.
+BatchResult = namedtuple("BatchResult",
+                         "name path_a path_b status differences changed_chars line_a line_b seconds error")
+
+
+def _text_files(root, suffixes):
+    found = {}
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith(suffixes):
+                path = os.path.join(directory, name)
+                found[os.path.relpath(path, root).replace(os.sep, "/")] = path
+    return found
+
+
+def pair_directories(dir_a, dir_b, suffixes=DEFAULT_SUFFIXES):
+    """BatchPairs for the files of two directory trees, matched by relative path."""
+    files_a = _text_files(dir_a, suffixes)
+    files_b = _text_files(dir_b, suffixes)
+    return [BatchPair(name, files_a.get(name), files_b.get(name)) for name in sorted(files_a.keys() | files_b.keys())]
+
+
+def read_manifest(path):
+    """BatchPairs listed in a manifest: "source<TAB>target" (or comma separated) per line.
+
+    Relative paths are relative to the manifest; blank lines and lines
+    starting with # are skipped.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    pairs = []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = [field.strip() for field in (line.split("\t") if "\t" in line else line.split(","))]
+            if len(fields) != 2 or not all(fields):
+                raise ValueError(f"{path}:{number}: expected 'source<TAB>target'")
+            path_a, path_b = (os.path.join(base, field) for field in fields)
+            pairs.append(BatchPair(fields[1], path_a, path_b))
+    return pairs
+
+
+def _outcome(pair, result, started):
+    """BatchResult of a pair from its DiffResult; started is its time.perf_counter() start."""
+    seconds = time.perf_counter() - started
+    if result.identical:
+        return BatchResult(*pair, STATUS_IDENTICAL, 0, 0, None, None, seconds, None)
+    if result.mode == MODE_SUMMARY:
+        first = next(iter(result.regions), None)
+        return BatchResult(*pair, STATUS_DIFFERENT, len(result.regions), result.diff_count,
+                           *_first_lines(first), seconds, None)
+    differences = changed = 0
+    for tag, i1, i2, j1, j2 in result.opcodes:
+        if tag not in ("equal", "moved"):
+            differences += 1
+            changed += max(i2 - i1, j2 - j1)
+    for move in result.moves:
+        differences += 1
+        changed += max(move.i2 - move.i1, move.j2 - move.j1)
+    first = next(iter(result.differences()), None)
+    return BatchResult(*pair, STATUS_DIFFERENT, differences, changed, *_first_lines(first), seconds, None)
+
+
+def _first_lines(first):
+    """(line_a, line_b) of the first difference or region; (None, None) if there is none."""
+    return (None, None) if first is None else (first.line_a, first.line_b)
+
+
+def _failed(pair, status, error, started):
+    """BatchResult of a pair that could not be compared."""
+    return BatchResult(*pair, status, 0, 0, None, None, time.perf_counter() - started, error)
+
+
+def compare_pair(pair, mode=None, engine=None):
+    """Compare one BatchPair; never raises."""
+    _, path_a, path_b = pair
+    started = time.perf_counter()
+    if path_a is None or path_b is None:
+        return _failed(pair, STATUS_MISSING, "no source file" if path_a is None else "no target file", started)
+    try:
+        size_a, size_b = os.path.getsize(path_a), os.path.getsize(path_b)
+        if size_a > VERIFY_SIZE or size_b > VERIFY_SIZE:
+            mismatch = verify_files(path_a, path_b)
+            if mismatch is None:
+                return BatchResult(*pair, STATUS_IDENTICAL, 0, 0, None, None, time.perf_counter() - started, None)
+            return BatchResult(*pair, STATUS_DIFFERENT, 1, 1, mismatch.line_a, mismatch.line_b,
+                               time.perf_counter() - started, None)
+        if mode is None and size_a + size_b > SUMMARY_MODE_SIZE:
+            mode = MODE_SUMMARY
+        return _outcome(pair, compare_files(path_a, path_b, mode=mode, engine=engine), started)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return _failed(pair, STATUS_ERROR, str(e), started)
+    except Exception as e:  # A bug or MemoryError fails this pair, not the whole batch
+        return _failed(pair, STATUS_ERROR, f"{type(e).__name__}: {e}", started)
+
+
+def map_pairs(function, pairs, args=(), workers=None, progress=None, initializer=None, initargs=()):
+    """[function(pair, *args) for pair in pairs], computed on a process pool.
+
+    At most two pairs per worker are in flight, and progress gets one
+    update per finished pair and can cancel the run. initializer(*initargs)
+    runs once in each worker process (or here, without a pool).
+    """
+    progress = progress or NULL_PROGRESS
+    pairs = list(pairs)
+    workers = workers or os.cpu_count() or 1
+    results = [None] * len(pairs)
+    if workers < 2 or len(pairs) < 2:
+        if initializer is not None:
+            initializer(*initargs)
+        for i, pair in enumerate(pairs):
+            progress.check()
+            results[i] = function(pair, *args)
+            progress.update(i + 1, len(pairs))
+        return results
+
+    # spawn, as in parallel.ParallelPool: safe from a process that runs threads
+    with ProcessPoolExecutor(max_workers=min(workers, len(pairs)), mp_context=multiprocessing.get_context("spawn"),
+                             initializer=initializer, initargs=initargs) as executor:
+        pending = {}
+        queued = iter(enumerate(pairs))
+        done = 0
+        try:
+            while True:
+                for i, pair in queued:
+                    pending[executor.submit(function, pair, *args)] = i
+                    if len(pending) >= 2 * workers:
+                        break
+                if not pending:
+                    break
+                finished, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                progress.check()
+                for future in finished:
+                    results[pending.pop(future)] = future.result()
+                    done += 1
+                    progress.update(done, len(pairs))
+        finally:
+            for future in pending:
+                future.cancel()
+    return results
+
+
+def run_batch(pairs, workers=None, mode=None, engine=None, progress=None):
+    """Compare every pair on a process pool; returns BatchResults in the order of pairs.
+
+    progress gets one update per finished pair and can cancel the batch.
+    """
+    progress = progress or NULL_PROGRESS
+    pairs = list(pairs)
+    progress.stage("Comparing pairs", len(pairs))
+    return map_pairs(compare_pair, pairs, (mode, engine), workers, progress)
+
+
+def summarize_batch(results):
+    """Counts per status, total differences and total seconds."""
+    counts = {status: 0 for status in (STATUS_IDENTICAL, STATUS_DIFFERENT, STATUS_MISSING, STATUS_ERROR)}
+    for result in results:
+        counts[result.status] += 1
+    return {"pairs": len(results), **counts,
+            "differences": sum(result.differences for result in results),
+            "seconds": sum(result.seconds for result in results)}
+
+
+def describe_result(result):
+    """One-line description of a BatchResult."""
+    if result.status == STATUS_IDENTICAL:
+        return f"PASS  {result.name} ({result.seconds:.2f}s)"
+    if result.status == STATUS_DIFFERENT:
+        return (f"FAIL  {result.name}: {result.differences} differences, ~{result.changed_chars} characters, "
+                f"first at line A:{result.line_a} / B:{result.line_b} ({result.seconds:.2f}s)")
+    if result.status == STATUS_MISSING:
+        return f"MISSING {result.name}: {result.error}"
+    return f"ERROR {result.name}: {result.error}"
+
+
+def write_report(results, path):
+    """Save the results as JSON, or as CSV when path ends in .csv."""
+    if path.lower().endswith(".csv"):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(BatchResult._fields)
+            writer.writerows(results)
+        return
+    report = {"summary": summarize_batch(results), "pairs": [result._asdict() for result in results]}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,250 @@
+"""Content-addressed cache of normalized texts and diffs.
+
+Re-comparing the same source while only the target changes, or going back
+to a target compared before, repeats work whose inputs have not changed.
+A ResultCache keys that work by content: a normalization by the SHA-256 of
+the text, a diff by the hashes of both texts plus the settings that shape
+it (mode, chunk size, engine). Entries live in an in-memory LRU and, when
+a directory is given, in an on-disk store; each drops its least recently
+used entries once it grows past its byte budget.
+
+Pass a cache to compare_texts()/compare_files(); the engine asks it before
+normalizing or diffing and stores what it computed. Disk entries are
+pickles, so the directory must only be writable by the user running the
+comparison. A disk error never fails a comparison; the entry just is not
+cached.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+
+from .progress import NULL_PROGRESS
+
+logger = logging.getLogger(__name__)
+
+# Part of every key; bump when normalization or the cached layout changes so
+# stale entries are simply never found again.
+CACHE_VERSION = 1
+
+MEMORY_BYTES = 256 * 1024 * 1024  # 256MB of normalizations and diffs kept in memory
+DISK_BYTES = 1024 * 1024 * 1024  # 1GB on-disk budget
+
+_SUFFIX = ".pickle"
+# Eviction frees the store down to this share of its budget, so the stores
+# right after it do not each rescan the directory.
+_EVICT_TO = 0.9
+
+
+def default_cache_dir():
+    """Per-user cache directory for textvalid."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "textvalid")
+
+
+def text_key(text):
+    """Content hash of a text."""
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def approximate_size(value):
+    """Rough bytes held by a cached value: texts, offset maps, opcode and region lists."""
+    if isinstance(value, list):
+        # Opcodes and regions are records of one shape; size the first
+        return sys.getsizeof(value) + (len(value) * approximate_size(value[0]) if value else 0)
+    if isinstance(value, tuple):
+        return sys.getsizeof(value) + sum(approximate_size(item) for item in value)
+    if isinstance(value, (str, array)):
+        return sys.getsizeof(value)
+    slots = getattr(type(value), "__slots__", ())
+    return sys.getsizeof(value) + sum(approximate_size(getattr(value, name)) for name in slots)
+
+
+class ResultCache:
+    """LRU memory cache in front of an optional size-bounded disk store."""
+
+    def __init__(self, directory=None, memory_bytes=MEMORY_BYTES, disk_bytes=DISK_BYTES):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._memory = OrderedDict()  # key -> (value, approximate size)
+        self._memory_size = 0
+        self._disk_size = None  # Running total of the store; None until it is first scanned
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    # -- keys --------------------------------------------------------------
+
+    @staticmethod
+    def normalized_key(key):
+        return f"norm-{CACHE_VERSION}-{key}"
+
+    @staticmethod
+    def diff_key(key_a, key_b, mode, chunk_size, engine_name):
+        settings = f"{CACHE_VERSION}|{key_a}|{key_b}|{mode}|{chunk_size}|{engine_name}"
+        return "diff-" + hashlib.sha256(settings.encode('ascii')).hexdigest()
+
+    # -- lookups -----------------------------------------------------------
+
+    def get(self, key, progress=None):
+        """The cached value for key, or None.
+
+        Hits and misses are also noted on progress, if given.
+        """
+        progress = progress or NULL_PROGRESS
+        with self._lock:
+            value, _ = self._memory.get(key, (None, 0))
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+        if value is None:
+            value = self._load(key)
+            with self._lock:
+                if value is None:
+                    self.stats["misses"] += 1
+                else:
+                    self.stats["disk_hits"] += 1
+                    self._remember(key, value)
+        progress.note("cache_misses" if value is None else "cache_hits", 1)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self.stats["stores"] += 1
+            self._remember(key, value)
+        self._store(key, value)
+
+    def normalized(self, text, normalize, key=None, progress=None):
+        """normalize(text), from the cache when the same text was seen before."""
+        entry_key = self.normalized_key(key or text_key(text))
+        cached = self.get(entry_key, progress)
+        if cached is not None:
+            return cached
+        value = normalize(text)
+        self.put(entry_key, value)
+        return value
+
+    def clear(self):
+        """Drop every entry, in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            self._disk_size = None
+        for path, _, _ in self._disk_entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def describe(self):
+        """One human readable line of hit/miss statistics."""
+        stats = self.stats
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        rate = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0
+        return (f"Cache: {stats['memory_hits']} memory hits, {stats['disk_hits']} disk hits, "
+                f"{stats['misses']} misses ({rate:.0%} hit rate), {stats['evictions']} evicted")
+
+    def _remember(self, key, value):
+        size = approximate_size(value)
+        if key in self._memory:
+            self._memory_size -= self._memory.pop(key)[1]
+        if size > self.memory_bytes:
+            return  # Would push out everything else; left to the disk store
+        self._memory[key] = (value, size)
+        self._memory_size += size
+        while self._memory_size > self.memory_bytes:
+            self._memory_size -= self._memory.popitem(last=False)[1][1]
+
+    # -- disk store --------------------------------------------------------
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)  # Mark as recently used for eviction
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as e:  # Truncated or foreign file: treat as a miss
+            logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+    def _store(self, key, value):
+        if self.directory is None:
+            return
+        path = self._path(key)
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    size = f.tell()
+                try:
+                    size -= os.stat(path).st_size
+                except FileNotFoundError:
+                    pass
+                os.replace(tmp, path)
+            except BaseException:
+                os.remove(tmp)
+                raise
+            with self._lock:
+                if self._disk_size is not None:
+                    self._disk_size += size
+                full = self._disk_size is None or self._disk_size > self.disk_bytes
+            if full:
+                self._evict()
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {key}: {e}")
+
+    def _disk_entries(self):
+        """(path, size, mtime) of every entry on disk."""
+        if self.directory is None:
+            return []
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(_SUFFIX):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((entry.path, st.st_size, st.st_mtime))
+        return entries
+
+    def _evict(self):
+        """Rescan the store and, if it is over its budget, remove the least recently used files.
+
+        Stores only keep a running total, so the directory is listed here
+        and not on every store; the rescan also picks up entries written by
+        other processes sharing the directory.
+        """
+        entries = self._disk_entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.disk_bytes:
+            for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                with self._lock:
+                    self.stats["evictions"] += 1
+                if total <= self.disk_bytes * _EVICT_TO:
+                    break
+        with self._lock:
+            self._disk_size = total
@@ -0,0 +1,214 @@
+"""Content-defined chunking for comparing large normalized texts.
+
+Cutting both texts at the same fixed offsets means one dropped character
+shifts every later chunk. Instead, chunks end at occurrences of a few "cut
+characters" chosen from the source's own character frequencies, so a cut
+depends only on nearby content and both texts fall back into step shortly
+after an edit. The two chunk sequences are aligned by hash with a diff
+engine, and only the runs of chunks that did not match are diffed
+character by character.
+"""
+import re
+from bisect import bisect_right
+from collections import Counter, namedtuple
+
+from .diffing import MyersEngine
+from .progress import NULL_PROGRESS
+
+# Characters sampled when estimating frequencies for choosing cut characters.
+_SAMPLE_SIZE = 200_000
+
+# Length of the k-grams used to anchor long differing regions, and how far
+# (in characters) the target is searched around the expected position.
+_ANCHOR_K = 16
+_ANCHOR_WINDOW = 2000
+
+# The source side of a chunk alignment: cut characters, chunk end offsets
+# and chunk hashes. It only depends on the source and the target chunk
+# size, so one index serves every text compared against the same source.
+# Hashes of str are salted per process; rebuild the index in each process.
+SourceChunks = namedtuple("SourceChunks", "cut_chars bounds hashes")
+
+
+def choose_cut_chars(norm, target_size):
+    """Pick characters whose occurrences split norm into ~target_size chunks.
+
+    Only the source text is used, so the same cut characters can be
+    applied to every text compared against it.
+    """
+    if not norm:
+        return ""
+    step = max(1, len(norm) // _SAMPLE_SIZE)
+    counts = Counter(norm[::step])
+    wanted = len(norm) / target_size
+    chosen = []
+    total = 0
+    # Most frequent characters first (their estimate is the most reliable),
+    # skipping any that on their own would cut far more often than wanted.
+    for char, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+        estimate = count * step
+        if total + estimate > wanted:
+            continue
+        chosen.append(char)
+        total += estimate
+        if total >= wanted / 2:
+            break
+    if not chosen:
+        # Every character is too frequent; min_size keeps chunks apart.
+        chosen.append(min(counts, key=lambda c: (counts[c], c)))
+    return "".join(sorted(chosen))
+
+
+def chunk_bounds(norm, cut_chars, target_size):
+    """End offsets of the content-defined chunks of norm.
+
+    A chunk ends just after a cut character once it holds at least
+    target_size // 4 characters, or is forced to end at 4 * target_size.
+    """
+    min_size = max(1, target_size // 4)
+    max_size = max(min_size + 1, target_size * 4)
+    cut = re.compile("[" + "".join(re.escape(c) for c in cut_chars) + "]") if cut_chars else None
+    bounds = []
+    start = 0
+    # One C-level search per chunk; a single lazy regex over the whole text
+    # is retried at every offset of a tail that has no cut character left.
+    while len(norm) - start >= min_size:
+        match = cut.search(norm, start + min_size - 1, start + max_size) if cut else None
+        if match:
+            start = match.end()
+        elif start + max_size <= len(norm):
+            start += max_size
+        else:
+            break
+        bounds.append(start)
+    if not bounds or bounds[-1] < len(norm):
+        bounds.append(len(norm))
+    return bounds
+
+
+def chunk_hashes(norm, bounds):
+    start = 0
+    hashes = []
+    for end in bounds:
+        hashes.append(hash(norm[start:end]))
+        start = end
+    return hashes
+
+
+def index_chunks(norm, target_size):
+    """SourceChunks of a normalized source text."""
+    cut_chars = choose_cut_chars(norm, target_size)
+    bounds = chunk_bounds(norm, cut_chars, target_size)
+    return SourceChunks(cut_chars, bounds, chunk_hashes(norm, bounds))
+
+
+def align_chunks(norm_a, norm_b, bounds_a, bounds_b, hashes_a=None, hashes_b=None):
+    """Align two chunk sequences by content.
+
+    Returns (equal, i1, i2, j1, j2) regions in character offsets that cover
+    both texts in order; equal regions are verified to be identical.
+    """
+    if hashes_a is None:
+        hashes_a = chunk_hashes(norm_a, bounds_a)
+    if hashes_b is None:
+        hashes_b = chunk_hashes(norm_b, bounds_b)
+    starts_a = [0] + bounds_a
+    starts_b = [0] + bounds_b
+
+    regions = []
+    for tag, c1, c2, d1, d2 in MyersEngine().opcodes(hashes_a, hashes_b):
+        i1, i2 = starts_a[c1], starts_a[c2]
+        j1, j2 = starts_b[d1], starts_b[d2]
+        equal = tag == "equal" and norm_a[i1:i2] == norm_b[j1:j2]
+        if regions and not equal and not regions[-1][0]:
+            # Merge neighbouring differing runs into one region.
+            regions[-1] = (False, regions[-1][1], i2, regions[-1][3], j2)
+        else:
+            regions.append((equal, i1, i2, j1, j2))
+    return regions
+
+
+def split_region(norm_a, norm_b, i1, i2, j1, j2, bounds_a):
+    """Split a differing region at anchors so each piece is diffed separately.
+
+    When every chunk in a stretch contains an edit, aligned chunks never
+    hash equal. Each chunk boundary of a inside the region is tried as an
+    anchor: the k-gram starting there is looked up in b near the expected
+    position and used if it occurs exactly once in that window.
+    """
+    pieces = []
+    start_a, start_b = i1, j1
+    k = bisect_right(bounds_a, i1)
+    while k < len(bounds_a) and bounds_a[k] < i2:
+        p = bounds_a[k]
+        k += 1
+        gram = norm_a[p:p + _ANCHOR_K]
+        if len(gram) < _ANCHOR_K or p + _ANCHOR_K > i2:
+            break
+        expected = start_b + (p - start_a)
+        lo = max(start_b + 1, expected - _ANCHOR_WINDOW)
+        hi = min(j2, expected + _ANCHOR_WINDOW + _ANCHOR_K)
+        q = norm_b.find(gram, lo, hi)
+        if q < 0 or norm_b.find(gram, q + 1, hi) >= 0:
+            continue
+        pieces.append((start_a, p, start_b, q))
+        start_a, start_b = p, q
+    pieces.append((start_a, i2, start_b, j2))
+    return pieces
+
+
+def merge_equal_opcodes(opcodes):
+    merged = []
+    for op in opcodes:
+        if merged and op[0] == "equal" and merged[-1][0] == "equal":
+            prev = merged[-1]
+            merged[-1] = ("equal", prev[1], op[2], prev[3], op[4])
+        else:
+            merged.append(op)
+    return merged
+
+
+def plan_regions(norm_a, norm_b, target_size, progress=None, source=None):
+    """Cut, align and split both texts into regions that can be diffed independently.
+
+    source is the SourceChunks of norm_a for target_size, if already built.
+    Returns (regions, chunk_count); regions are (equal, i1, i2, j1, j2)
+    tuples covering both texts in order.
+    """
+    progress = progress or NULL_PROGRESS
+    if source is None:
+        source = index_chunks(norm_a, target_size)
+    bounds_a = source.bounds
+    bounds_b = chunk_bounds(norm_b, source.cut_chars, target_size)
+    progress.check()
+
+    regions = []
+    for equal, i1, i2, j1, j2 in align_chunks(norm_a, norm_b, bounds_a, bounds_b, hashes_a=source.hashes):
+        if equal:
+            regions.append((True, i1, i2, j1, j2))
+        else:
+            regions.extend((False,) + piece for piece in split_region(norm_a, norm_b, i1, i2, j1, j2, bounds_a))
+    progress.check()
+    return regions, len(bounds_a)
+
+
+def chunked_opcodes(norm_a, norm_b, target_size, differ, progress=None, source=None):
+    """Diff two normalized texts chunk by chunk.
+
+    Returns (opcodes, chunk_count). Matching chunks are skipped after an
+    equality check; only differing regions are passed to differ. source is
+    as for plan_regions().
+    """
+    progress = progress or NULL_PROGRESS
+    regions, chunk_count = plan_regions(norm_a, norm_b, target_size, progress, source)
+
+    opcodes = []
+    for done, (equal, i1, i2, j1, j2) in enumerate(regions, 1):
+        if equal:
+            opcodes.append(("equal", i1, i2, j1, j2))
+            continue
+        for tag, a1, a2, b1, b2 in differ.opcodes(norm_a[i1:i2], norm_b[j1:j2], progress):
+            opcodes.append((tag, i1 + a1, i1 + a2, j1 + b1, j1 + b2))
+        progress.update(done, len(regions))
+    progress.update(len(regions), len(regions))
+    return merge_equal_opcodes(opcodes), chunk_count
@@ -0,0 +1,416 @@
+"""Command-line entry point: ``python -m textvalid compare SOURCE TARGET``.
+
+``verify`` answers the same question without building a diff: it streams
+both files and stops at the first mismatch, so it works on files of any size.
+``watch`` compares once, then updates the comparison whenever a file changes.
+``batch`` compares every pair of two directories (or of a manifest) on a
+pool of worker processes and prints a pass/fail report. ``rank`` compares one
+source with many targets, indexing the source once, and ranks the targets.
+``compare --export`` also writes the differences as JSON Lines, JSON, a
+unified diff or an HTML page. ``fingerprint`` writes a manifest (digest and block
+tree) of each source of a corpus; ``check`` validates targets against a
+manifest, reading only the blocks of the source that differ. ``serve`` runs
+the comparison as a local HTTP service answering in JSON.
+
+Exit codes: 0 when the texts are identical (ignoring punctuation and
+whitespace), 1 when they differ, 2 when the comparison could not run.
+"""
+import argparse
+import sys
+import time
+
+from .batch import (
+    DEFAULT_SUFFIXES,
+    STATUS_DIFFERENT,
+    STATUS_ERROR,
+    STATUS_IDENTICAL,
+    STATUS_MISSING,
+    describe_result,
+    pair_directories,
+    read_manifest,
+    run_batch,
+    summarize_batch,
+    write_report,
+)
+from .cache import ResultCache, default_cache_dir
+from .diffing import DEFAULT_ENGINE, ENGINES
+from .engine import MODES, compare_files, describe_difference, read_text
+from .fingerprint import BLOCK_SIZE, Fingerprint, check_file, fingerprint_corpus
+from .instrument import Instrumentation, InstrumentedProgress
+from .multi import SourceIndex, compare_targets, format_ranking, rank_targets
+from .parallel import ParallelPool
+from .progress import NULL_PROGRESS
+from .report import REPORT_FORMATS, export_report
+from .service import DEFAULT_HOST, DEFAULT_PORT, REQUEST_TIMEOUT, SOURCE_CACHE_ENTRIES, ValidationService, make_server
+from .summary import describe_region
+from .verify import describe_mismatch, verify_files
+from .watch import POLL_INTERVAL, FileWatcher, update_result
+
+EXIT_IDENTICAL = 0
+EXIT_DIFFERENT = 1
+EXIT_ERROR = 2
+
+
+def _instrumentation(args):
+    """An Instrumentation and Progress for the run if --stats was asked for."""
+    if not (args.stats or args.stats_json):
+        return None, None
+    instrumentation = Instrumentation(memory=args.trace_memory)
+    instrumentation.start()
+    return instrumentation, InstrumentedProgress(instrumentation)
+
+
+def _report_stats(args, instrumentation):
+    if instrumentation is None:
+        return
+    instrumentation.finish()
+    if args.stats:
+        for line in instrumentation.describe():
+            print(line, file=sys.stderr)
+    if args.stats_json:
+        with open(args.stats_json, 'w', encoding='utf-8') as f:
+            f.write(instrumentation.to_json())
+
+
+def _cmd_compare(args):
+    instrumentation, progress = _instrumentation(args)
+    cache = None
+    if args.cache or args.cache_dir:
+        cache = ResultCache(args.cache_dir or default_cache_dir())
+    if args.workers > 1:
+        with ParallelPool(args.workers) as pool:
+            result = compare_files(args.source, args.target, mode=args.mode, engine=args.engine,
+                                   progress=progress, pool=pool, cache=cache)
+    else:
+        result = compare_files(args.source, args.target, mode=args.mode, engine=args.engine, progress=progress,
+                               cache=cache)
+    if args.export:
+        export_report(result, args.export, fmt=args.export_format, source=args.source, target=args.target,
+                      progress=progress)
+    _report_stats(args, instrumentation)
+    if cache is not None and args.stats:
+        print(cache.describe(), file=sys.stderr)
+    return _print_result(args, result)
+
+
+def _print_result(args, result):
+    """List the differences of result as asked by args; returns the exit code."""
+    if result.identical:
+        if not args.quiet:
+            print("SUCCESS: Files are identical (ignoring punctuation/whitespace).")
+        return EXIT_IDENTICAL
+
+    if not args.quiet:
+        if result.mode == "summary":
+            lines = map(describe_region, result.regions)
+        else:
+            lines = (describe_difference(diff, limit=args.truncate) for diff in result.differences())
+        shown = 0
+        for line in lines:
+            if args.max_differences is not None and shown >= args.max_differences:
+                print("...")
+                break
+            print(line)
+            shown += 1
+        if result.mode == "summary":
+            print(f"Files are DIFFERENT: approximately {result.diff_count} characters differ "
+                  f"in {len(result.regions)} regions.")
+        else:
+            print("Comparison complete. Differences found.")
+    return EXIT_DIFFERENT
+
+
+def _cmd_watch(args):
+    result = compare_files(args.source, args.target, mode=args.mode, engine=args.engine)
+    status = _print_result(args, result)
+    watcher = FileWatcher([args.source, args.target])
+    try:
+        while True:
+            time.sleep(args.interval)
+            changed = watcher.changed()
+            if not changed:
+                continue
+            try:
+                text_a, text_b = read_text(args.source), read_text(args.target)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Error: {e}; waiting for the next change", file=sys.stderr)
+                continue
+            start = time.perf_counter()
+            result = update_result(result, text_a, text_b, engine=args.engine)
+            print(f"--- {', '.join(changed)} changed; updated in {time.perf_counter() - start:.3f}s")
+            status = _print_result(args, result)
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        return status
+
+
+def _cmd_batch(args):
+    if args.manifest:
+        if args.source or args.target:
+            raise ValueError("give either --manifest or SOURCE_DIR TARGET_DIR, not both")
+        pairs = read_manifest(args.manifest)
+    elif args.source and args.target:
+        pairs = pair_directories(args.source, args.target, tuple(args.suffix or DEFAULT_SUFFIXES))
+    else:
+        raise ValueError("batch needs SOURCE_DIR TARGET_DIR or --manifest")
+    instrumentation, progress = _instrumentation(args)
+    results = run_batch(pairs, workers=args.workers, mode=args.mode, engine=args.engine, progress=progress)
+    _report_stats(args, instrumentation)
+    if args.report:
+        write_report(results, args.report)
+    summary = summarize_batch(results)
+    if not args.quiet:
+        for result in results:
+            if result.status != STATUS_IDENTICAL or not args.failures_only:
+                print(describe_result(result))
+        print(f"{summary['pairs']} pairs: {summary['identical']} identical, {summary['different']} different, "
+              f"{summary['missing']} missing, {summary['error']} errors ({summary['seconds']:.2f}s of work)")
+    if summary[STATUS_ERROR]:
+        return EXIT_ERROR
+    if summary[STATUS_DIFFERENT] or summary[STATUS_MISSING]:
+        return EXIT_DIFFERENT
+    return EXIT_IDENTICAL
+
+
+def _cmd_rank(args):
+    instrumentation, progress = _instrumentation(args)
+    (progress or NULL_PROGRESS).stage("Indexing source")
+    source = SourceIndex.load(args.source)
+    results = compare_targets(source, args.targets, source_path=args.source, workers=args.workers,
+                              mode=args.mode, engine=args.engine, progress=progress)
+    _report_stats(args, instrumentation)
+    ranked = rank_targets(results)
+    if args.report:
+        write_report(ranked, args.report)
+    summary = summarize_batch(results)
+    if not args.quiet:
+        header, rows = format_ranking(ranked, len(source.normalized[0]))
+        print(header)
+        for row in rows:
+            print(row)
+        print(f"{summary['pairs']} targets: {summary['identical']} identical, {summary['different']} different, "
+              f"{summary['error']} errors")
+    if summary[STATUS_ERROR]:
+        return EXIT_ERROR
+    if summary[STATUS_DIFFERENT]:
+        return EXIT_DIFFERENT
+    return EXIT_IDENTICAL
+
+
+def _cmd_fingerprint(args):
+    instrumentation, progress = _instrumentation(args)
+    written = fingerprint_corpus(args.paths, output_dir=args.output, suffixes=tuple(args.suffix or DEFAULT_SUFFIXES),
+                                 block_size=args.block_size, workers=args.workers, progress=progress)
+    _report_stats(args, instrumentation)
+    failed = 0
+    for name, manifest, blocks, error in written:
+        if error:
+            failed += 1
+            print(f"ERROR {name}: {error}", file=sys.stderr)
+        elif not args.quiet:
+            print(f"{manifest} ({blocks} blocks)")
+    if not args.quiet:
+        print(f"{len(written) - failed} manifests written, {failed} errors")
+    return EXIT_ERROR if failed else EXIT_IDENTICAL
+
+
+def _cmd_check(args):
+    instrumentation, progress = _instrumentation(args)
+    fingerprint = Fingerprint.load(args.manifest)
+    status = EXIT_IDENTICAL
+    for target in args.targets:
+        checked = check_file(fingerprint, target, engine=args.engine, progress=progress, source_path=args.source)
+        if checked.identical:
+            if not args.quiet:
+                print(f"PASS  {target}")
+            continue
+        status = EXIT_DIFFERENT
+        if args.quiet:
+            continue
+        print(f"FAIL  {target}: {len(checked.differences)} differences in {len(checked.regions)} regions "
+              f"({checked.source_bytes} bytes of the source read)")
+        for shown, diff in enumerate(checked.differences):
+            if args.max_differences is not None and shown >= args.max_differences:
+                print("...")
+                break
+            print(describe_difference(diff, limit=args.truncate))
+    _report_stats(args, instrumentation)
+    return status
+
+
+def _cmd_serve(args):
+    with ValidationService(workers=args.workers, max_pending=args.max_pending, timeout=args.timeout,
+                           source_entries=args.source_cache, root=args.root) as service:
+        server = make_server(service, args.host, args.port)
+        service.warm_up()
+        print(f"Serving on http://{args.host}:{server.server_port} with {service.workers} workers "
+              f"(at most {service.max_pending} comparisons at once); Ctrl+C to stop")
+        sys.stdout.flush()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    return EXIT_IDENTICAL
+
+
+def _cmd_verify(args):
+    instrumentation, progress = _instrumentation(args)
+    mismatch = verify_files(args.source, args.target, progress=progress)
+    _report_stats(args, instrumentation)
+    if mismatch is None:
+        if not args.quiet:
+            print("SUCCESS: Files are identical (ignoring punctuation/whitespace).")
+        return EXIT_IDENTICAL
+    if not args.quiet:
+        print(describe_mismatch(mismatch))
+    return EXIT_DIFFERENT
+
+
+def _add_stats_arguments(parser):
+    parser.add_argument("--stats", action="store_true", help="Print per-stage timings and counters to stderr")
+    parser.add_argument("--stats-json", metavar="PATH", help="Write per-stage timings and counters as JSON")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Also record peak memory per stage (tracemalloc; slows the run down)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="textvalid",
+                                     description="Compare texts ignoring punctuation, whitespace and control characters.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compare = commands.add_parser("compare", help="Compare a source file with a target file")
+    compare.add_argument("source")
+    compare.add_argument("target")
+    compare.add_argument("--mode", choices=MODES, default=None,
+                         help="Comparison mode (default: full or chunked depending on size)")
+    compare.add_argument("--engine", choices=sorted(ENGINES), default=DEFAULT_ENGINE,
+                         help="Diff algorithm (default: %(default)s)")
+    compare.add_argument("--workers", type=int, default=1, metavar="N",
+                         help="Worker processes for normalizing and diffing large files (default: 1)")
+    compare.add_argument("-q", "--quiet", action="store_true", help="Only set the exit code")
+    compare.add_argument("--max-differences", type=int, default=None, metavar="N",
+                         help="Stop listing after N differences")
+    compare.add_argument("--truncate", type=int, default=None, metavar="N",
+                         help="Truncate each difference to N characters")
+    compare.add_argument("--cache", action="store_true",
+                         help="Reuse normalizations and diffs of unchanged inputs from the on-disk cache")
+    compare.add_argument("--cache-dir", metavar="DIR", help="Cache directory (implies --cache)")
+    compare.add_argument("--export", metavar="PATH", help="Also write the differences to a report file")
+    compare.add_argument("--export-format", choices=REPORT_FORMATS, default=None,
+                         help="Report format (default: from the extension of PATH; .jsonl, .json, .diff or .html)")
+    _add_stats_arguments(compare)
+    compare.set_defaults(func=_cmd_compare)
+
+    watch = commands.add_parser("watch", help="Compare, then re-compare incrementally whenever either file changes")
+    watch.add_argument("source")
+    watch.add_argument("target")
+    watch.add_argument("--mode", choices=MODES, default=None,
+                       help="Comparison mode (default: full or chunked depending on size)")
+    watch.add_argument("--engine", choices=sorted(ENGINES), default=DEFAULT_ENGINE,
+                       help="Diff algorithm (default: %(default)s)")
+    watch.add_argument("--interval", type=float, default=POLL_INTERVAL, metavar="SECONDS",
+                       help="How often to check the files for changes (default: %(default)s)")
+    watch.add_argument("-q", "--quiet", action="store_true", help="Only report that the files changed")
+    watch.add_argument("--max-differences", type=int, default=None, metavar="N",
+                       help="Stop listing after N differences")
+    watch.add_argument("--truncate", type=int, default=None, metavar="N",
+                       help="Truncate each difference to N characters")
+    watch.set_defaults(func=_cmd_watch)
+
+    batch = commands.add_parser("batch", help="Compare every file of a directory with its namesake in another")
+    batch.add_argument("source", nargs="?", metavar="SOURCE_DIR")
+    batch.add_argument("target", nargs="?", metavar="TARGET_DIR")
+    batch.add_argument("--manifest", metavar="PATH",
+                       help="Compare the pairs listed in PATH ('source<TAB>target' per line) instead of two directories")
+    batch.add_argument("--suffix", action="append", default=None, metavar="EXT",
+                       help="File extension to pair in directory mode; repeatable (default: .txt)")
+    batch.add_argument("--mode", choices=MODES, default=None,
+                       help="Comparison mode (default: full, chunked or summary depending on size)")
+    batch.add_argument("--engine", choices=sorted(ENGINES), default=DEFAULT_ENGINE,
+                       help="Diff algorithm (default: %(default)s)")
+    batch.add_argument("--workers", type=int, default=None, metavar="N",
+                       help="Worker processes comparing pairs (default: one per CPU)")
+    batch.add_argument("--report", metavar="PATH", help="Write the per-pair report as JSON, or CSV if PATH ends in .csv")
+    batch.add_argument("--failures-only", action="store_true", help="Only list pairs that did not pass")
+    batch.add_argument("-q", "--quiet", action="store_true", help="Only set the exit code")
+    _add_stats_arguments(batch)
+    batch.set_defaults(func=_cmd_batch)
+
+    rank = commands.add_parser("rank", help="Compare one source with many targets and rank the targets")
+    rank.add_argument("source")
+    rank.add_argument("targets", nargs="+", metavar="target")
+    rank.add_argument("--mode", choices=MODES, default=None,
+                      help="Comparison mode (default: full, chunked or summary depending on size)")
+    rank.add_argument("--engine", choices=sorted(ENGINES), default=DEFAULT_ENGINE,
+                      help="Diff algorithm (default: %(default)s)")
+    rank.add_argument("--workers", type=int, default=None, metavar="N",
+                      help="Worker processes comparing targets (default: one per CPU)")
+    rank.add_argument("--report", metavar="PATH",
+                      help="Write the ranking as JSON, or CSV if PATH ends in .csv")
+    rank.add_argument("-q", "--quiet", action="store_true", help="Only set the exit code")
+    _add_stats_arguments(rank)
+    rank.set_defaults(func=_cmd_rank)
+
+    fingerprint = commands.add_parser("fingerprint", help="Write the fingerprint manifest of every source file")
+    fingerprint.add_argument("paths", nargs="+", metavar="PATH", help="Source files, or directories to walk")
+    fingerprint.add_argument("--output", metavar="DIR",
+                             help="Write manifests under DIR instead of beside their sources")
+    fingerprint.add_argument("--suffix", action="append", default=None, metavar="EXT",
+                             help="File extension to fingerprint in directories; repeatable (default: .txt)")
+    fingerprint.add_argument("--block-size", type=int, default=BLOCK_SIZE, metavar="N",
+                             help="Target block size in normalized characters (default: %(default)s)")
+    fingerprint.add_argument("--workers", type=int, default=None, metavar="N",
+                             help="Worker processes fingerprinting files (default: one per CPU)")
+    fingerprint.add_argument("-q", "--quiet", action="store_true", help="Only report errors")
+    _add_stats_arguments(fingerprint)
+    fingerprint.set_defaults(func=_cmd_fingerprint)
+
+    check = commands.add_parser("check", help="Check targets against a source's fingerprint manifest")
+    check.add_argument("manifest")
+    check.add_argument("targets", nargs="+", metavar="target")
+    check.add_argument("--source", metavar="PATH",
+                       help="Read differing blocks from PATH instead of the source named in the manifest")
+    check.add_argument("--engine", choices=sorted(ENGINES), default=DEFAULT_ENGINE,
+                       help="Diff algorithm (default: %(default)s)")
+    check.add_argument("-q", "--quiet", action="store_true", help="Only set the exit code")
+    check.add_argument("--max-differences", type=int, default=None, metavar="N",
+                       help="Stop listing after N differences per target")
+    check.add_argument("--truncate", type=int, default=None, metavar="N",
+                       help="Truncate each difference to N characters")
+    _add_stats_arguments(check)
+    check.set_defaults(func=_cmd_check)
+
+    serve = commands.add_parser("serve", help="Answer comparison requests over HTTP (POST /compare, GET /stats)")
+    serve.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on (default: %(default)s)")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on (default: %(default)s)")
+    serve.add_argument("--workers", type=int, default=None, metavar="N",
+                       help="Worker processes running comparisons (default: one per CPU)")
+    serve.add_argument("--max-pending", type=int, default=None, metavar="N",
+                       help="Comparisons queued or running before requests are refused (default: 2 per worker)")
+    serve.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT, metavar="SECONDS",
+                       help="Cancel comparisons running longer than this (default: %(default)s)")
+    serve.add_argument("--source-cache", type=int, default=SOURCE_CACHE_ENTRIES, metavar="N",
+                       help="Normalized sources each worker keeps warm (default: %(default)s)")
+    serve.add_argument("--root", metavar="DIR",
+                       help="Accept source_path/target_path below DIR (default: texts only)")
+    serve.set_defaults(func=_cmd_serve)
+
+    verify = commands.add_parser("verify", help="Stream both files and stop at the first difference")
+    verify.add_argument("source")
+    verify.add_argument("target")
+    verify.add_argument("-q", "--quiet", action="store_true", help="Only set the exit code")
+    _add_stats_arguments(verify)
+    verify.set_defaults(func=_cmd_verify)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_ERROR
@@ -0,0 +1,309 @@
+"""Pluggable diff engines producing difflib-style opcodes.
+
+Every engine takes two sequences (normally normalized strings, but any
+sliceable sequence works) and returns (tag, i1, i2, j1, j2) opcodes, so the
+rest of the app does not care which algorithm produced them. An optional
+progress.Progress is checked for cancellation where the engine can stop.
+
+``myers`` is the default: Myers' O(ND) algorithm with the linear-space
+middle-snake refinement. Common prefixes, suffixes and long snakes are
+matched with slice comparisons, so when only a few characters changed the
+cost follows the number of edits rather than the size of the text.
+``difflib`` keeps SequenceMatcher available for comparison; its autojunk
+heuristic tends to misalign texts dominated by a few very common CJK
+characters.
+"""
+import difflib
+
+# Snakes shorter than this are followed one element at a time; longer ones
+# switch to galloping slice comparisons.
+_SHORT_SNAKE = 8
+
+# When a middle-snake search runs out of budget on a region larger than
+# this, the region is checked for shared k-grams; if it has (next to)
+# nothing in common it is reported as replaced instead of being split and
+# searched again piece by piece.
+_SIMILARITY_CHECK_SIZE = 2048
+_SIMILARITY_K = 8
+
+
+def _forward_match(a, i, i_end, b, j, j_end):
+    """Length of the common run starting at a[i] and b[j]."""
+    limit = min(i_end - i, j_end - j)
+    n = 0
+    while n < limit and n < _SHORT_SNAKE and a[i + n] == b[j + n]:
+        n += 1
+    if n < _SHORT_SNAKE or n == limit:
+        return n
+    step = _SHORT_SNAKE
+    while n < limit:
+        size = min(step, limit - n)
+        if a[i + n:i + n + size] != b[j + n:j + n + size]:
+            break
+        n += size
+        step *= 2
+    else:
+        return n
+    # The mismatch lies within the last block; bisect it.
+    lo, hi = 0, size
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[i + n + lo:i + n + mid] == b[j + n + lo:j + n + mid]:
+            lo = mid
+        else:
+            hi = mid
+    return n + lo
+
+
+def _backward_match(a, i_start, i, b, j_start, j):
+    """Length of the common run ending just before a[i] and b[j]."""
+    limit = min(i - i_start, j - j_start)
+    n = 0
+    while n < limit and n < _SHORT_SNAKE and a[i - n - 1] == b[j - n - 1]:
+        n += 1
+    if n < _SHORT_SNAKE or n == limit:
+        return n
+    step = _SHORT_SNAKE
+    while n < limit:
+        size = min(step, limit - n)
+        if a[i - n - size:i - n] != b[j - n - size:j - n]:
+            break
+        n += size
+        step *= 2
+    else:
+        return n
+    lo, hi = 0, size
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[i - n - mid:i - n - lo] == b[j - n - mid:j - n - lo]:
+            lo = mid
+        else:
+            hi = mid
+    return n + lo
+
+
+def _shares_content(a, a0, a1, b, b0, b1, k=_SIMILARITY_K):
+    """True if a[a0:a1] and b[b0:b1] share a meaningful number of k-grams.
+
+    b is sampled at stride k and a at every position, so any common run of
+    2k-1 or more elements is guaranteed to be seen.
+    """
+    # Slices of lists are unhashable; compare them as tuples.
+    key = (lambda s: s) if isinstance(a, (str, bytes)) else tuple
+    grams = {key(b[j:j + k]) for j in range(b0, b1 - k + 1, k)}
+    needed = max(1, (a1 - a0 + b1 - b0) // (64 * k))
+    hits = 0
+    for i in range(a0, a1 - k + 1):
+        if key(a[i:i + k]) in grams:
+            hits += 1
+            if hits >= needed:
+                return True
+    return False
+
+
+def opcodes_from_blocks(blocks, len_a, len_b):
+    """Turn ordered (i, j, size) matching blocks into difflib opcodes."""
+    opcodes = []
+    i = j = 0
+    for ai, bj, size in blocks + [(len_a, len_b, 0)]:
+        tag = ''
+        if i < ai and j < bj:
+            tag = 'replace'
+        elif i < ai:
+            tag = 'delete'
+        elif j < bj:
+            tag = 'insert'
+        if tag:
+            opcodes.append((tag, i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            opcodes.append(('equal', ai, i, bj, j))
+    return opcodes
+
+
+class DiffEngine:
+    """Base class for diff algorithms."""
+
+    name = None
+
+    def opcodes(self, a, b, progress=None):
+        raise NotImplementedError
+
+
+class SequenceMatcherEngine(DiffEngine):
+    """difflib.SequenceMatcher, as the app originally used it."""
+
+    name = "difflib"
+
+    def __init__(self, autojunk=True):
+        self.autojunk = autojunk
+
+    def opcodes(self, a, b, progress=None):
+        return difflib.SequenceMatcher(None, a, b, autojunk=self.autojunk).get_opcodes()
+
+
+class MyersEngine(DiffEngine):
+    """Myers' O(ND) difference algorithm in linear space.
+
+    max_cost bounds the number of edit steps explored per middle-snake
+    search. Past it the search splits at the furthest-reaching point found
+    so far (as GNU diff does), trading minimality for bounded time on
+    texts that share almost nothing.
+    """
+
+    name = "myers"
+
+    def __init__(self, max_cost=None):
+        self.max_cost = max_cost
+
+    def opcodes(self, a, b, progress=None):
+        return opcodes_from_blocks(self.matching_blocks(a, b, progress), len(a), len(b))
+
+    def matching_blocks(self, a, b, progress=None):
+        max_cost = self.max_cost
+        if max_cost is None:
+            max_cost = max(256, int((len(a) + len(b)) ** 0.5))
+
+        blocks = []
+        # Regions are processed left to right; a pending suffix match is
+        # pushed before the region's halves so it is emitted after them.
+        stack = [("region", 0, len(a), 0, len(b))]
+        while stack:
+            item = stack.pop()
+            if item[0] == "block":
+                blocks.append(item[1:])
+                continue
+            _, a0, a1, b0, b1 = item
+            if progress is not None:
+                progress.check()
+
+            prefix = _forward_match(a, a0, a1, b, b0, b1)
+            if prefix:
+                blocks.append((a0, b0, prefix))
+                a0 += prefix
+                b0 += prefix
+            suffix = _backward_match(a, a0, a1, b, b0, b1)
+            if suffix:
+                a1 -= suffix
+                b1 -= suffix
+                stack.append(("block", a1, b1, suffix))
+            if a0 == a1 or b0 == b1:
+                continue
+
+            x, y, exhausted = self._middle_snake(a, a0, a1, b, b0, b1, max_cost, progress)
+            if (exhausted and a1 - a0 + b1 - b0 > _SIMILARITY_CHECK_SIZE
+                    and not _shares_content(a, a0, a1, b, b0, b1)):
+                continue
+            stack.append(("region", a0 + x, a1, b0 + y, b1))
+            stack.append(("region", a0, a0 + x, b0, b0 + y))
+
+        merged = []
+        for i, j, size in blocks:
+            if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+                merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + size)
+            else:
+                merged.append((i, j, size))
+        return merged
+
+    @staticmethod
+    def _middle_snake(a, a0, a1, b, b0, b1, max_cost, progress=None):
+        """Find a split point (x, y) of a[a0:a1] / b[b0:b1] on an optimal path.
+
+        The region must be non-empty on both sides and have no common
+        prefix or suffix. Returns (x, y, exhausted); exhausted is True when
+        max_cost ran out and (x, y) is only the furthest point reached.
+        """
+        n = a1 - a0
+        m = b1 - b0
+        max_d = min((n + m + 1) // 2, max_cost)
+        offset = max_d + 1
+        size = 2 * max_d + 3
+        v1 = [-1] * size
+        v2 = [-1] * size
+        v1[offset + 1] = 0
+        v2[offset + 1] = 0
+        delta = n - m
+        front = delta % 2 != 0
+        k1start = k1end = k2start = k2end = 0
+
+        for d in range(max_d):
+            if progress is not None and d % 64 == 63:
+                progress.check()
+            # Forward path, one more edit.
+            for k1 in range(-d + k1start, d + 1 - k1end, 2):
+                k1_offset = offset + k1
+                if k1 == -d or (k1 != d and v1[k1_offset - 1] < v1[k1_offset + 1]):
+                    x1 = v1[k1_offset + 1]
+                else:
+                    x1 = v1[k1_offset - 1] + 1
+                y1 = x1 - k1
+                if x1 < n and y1 < m and a[a0 + x1] == b[b0 + y1]:
+                    snake = _forward_match(a, a0 + x1, a1, b, b0 + y1, b1)
+                    x1 += snake
+                    y1 += snake
+                v1[k1_offset] = x1
+                if x1 > n:
+                    k1end += 2
+                elif y1 > m:
+                    k1start += 2
+                elif front:
+                    k2_offset = offset + delta - k1
+                    if 0 <= k2_offset < size and v2[k2_offset] != -1:
+                        if x1 >= n - v2[k2_offset]:
+                            return x1, y1, False
+
+            # Reverse path, one more edit.
+            for k2 in range(-d + k2start, d + 1 - k2end, 2):
+                k2_offset = offset + k2
+                if k2 == -d or (k2 != d and v2[k2_offset - 1] < v2[k2_offset + 1]):
+                    x2 = v2[k2_offset + 1]
+                else:
+                    x2 = v2[k2_offset - 1] + 1
+                y2 = x2 - k2
+                if x2 < n and y2 < m and a[a1 - x2 - 1] == b[b1 - y2 - 1]:
+                    snake = _backward_match(a, a0, a1 - x2, b, b0, b1 - y2)
+                    x2 += snake
+                    y2 += snake
+                v2[k2_offset] = x2
+                if x2 > n:
+                    k2end += 2
+                elif y2 > m:
+                    k2start += 2
+                elif not front:
+                    k1_offset = offset + delta - k2
+                    if 0 <= k1_offset < size and v1[k1_offset] != -1:
+                        x1 = v1[k1_offset]
+                        y1 = offset + x1 - k1_offset
+                        if x1 >= n - x2:
+                            return x1, y1, False
+
+        # Too expensive: split at the furthest-reaching forward point.
+        best = None
+        for k1 in range(-max_d + 1, max_d, 2):
+            x1 = v1[offset + k1]
+            y1 = x1 - k1
+            if 0 <= x1 <= n and 0 <= y1 <= m and 0 < x1 + y1 < n + m:
+                if best is None or x1 + y1 > best[0] + best[1]:
+                    best = (x1, y1)
+        # Nothing in common was reached: delete all of a, then insert all of b.
+        if best is None:
+            best = (n, 0)
+        return best[0], best[1], True
+
+
+ENGINES = {
+    MyersEngine.name: MyersEngine,
+    SequenceMatcherEngine.name: SequenceMatcherEngine,
+}
+DEFAULT_ENGINE = MyersEngine.name
+
+
+def get_engine(engine=None):
+    """Return a DiffEngine for a name, an instance, or None (the default)."""
+    if isinstance(engine, DiffEngine):
+        return engine
+    name = engine or DEFAULT_ENGINE
+    try:
+        return ENGINES[name]()
+    except KeyError:
+        raise ValueError(f"Unknown diff engine: {name}") from None
@@ -0,0 +1,61 @@
+"""Compact list of the differences of a comparison, for the GUI log.
+
+A diff of two large texts can have tens of thousands of differences.
+Instead of a tuple (or a Tk tag) per difference, their original offsets
+are kept in parallel arrays, and the one-line description of an entry is
+only built when that entry is shown.
+"""
+from array import array
+
+from .engine import MODE_SUMMARY, Segment, describe_difference
+from .summary import describe_region
+
+# Tag codes stored per entry.
+_TAGS = ("replace", "delete", "insert", "changed", "moved")
+_TAG_CODES = {tag: code for code, tag in enumerate(_TAGS)}
+
+
+class DifferenceLog:
+    """The differences of a DiffResult, in text order.
+
+    Entry i covers text_a[starts_a[i]:ends_a[i]] and
+    text_b[starts_b[i]:ends_b[i]]. Summary-mode results list their regions.
+    """
+
+    def __init__(self, result, limit=None):
+        self.result = result
+        self.limit = limit  # Truncate described content to this many chars
+        typecode = 'I' if max(len(result.text_a), len(result.text_b)) < 2 ** 32 else 'Q'
+        self.starts_a = array(typecode)
+        self.ends_a = array(typecode)
+        self.starts_b = array(typecode)
+        self.ends_b = array(typecode)
+        self.tags = bytearray()
+        for tag, start_a, end_a, start_b, end_b in result.changes():
+            self.tags.append(_TAG_CODES[tag])
+            self.starts_a.append(start_a)
+            self.ends_a.append(end_a)
+            self.starts_b.append(start_b)
+            self.ends_b.append(end_b)
+        if self.tags and result.mode != MODE_SUMMARY:
+            # Index the line starts now, where the log is built (the GUI's
+            # worker thread), rather than on the first describe()
+            result.lines
+
+    def __len__(self):
+        return len(self.tags)
+
+    def offsets(self, i):
+        """(start_a, end_a, start_b, end_b) of entry i in the original texts."""
+        return self.starts_a[i], self.ends_a[i], self.starts_b[i], self.ends_b[i]
+
+    def moved(self, i):
+        """Whether entry i is a move, whose two places are far apart."""
+        return _TAGS[self.tags[i]] == "moved"
+
+    def describe(self, i):
+        """One-line description of entry i."""
+        if self.result.mode == MODE_SUMMARY:
+            return describe_region(self.result.regions[i])
+        segment = Segment(_TAGS[self.tags[i]], *self.offsets(i))
+        return describe_difference(self.result.difference_for(segment), limit=self.limit)
@@ -0,0 +1,110 @@
+"""A text file decoded once and normalized ahead of time.
+
+The GUI shows a file as soon as it is dropped, and compares it later. A
+LoadedDocument keeps the decoded text for both, so the file is read and
+decoded once, and normalizes it on a background thread straight after
+loading: by the time Compare is pressed the normalized text and OffsetMap
+are usually ready and the comparison goes straight to diffing. The same
+str backs the preview, the DiffResult and the rendered rows. Normalizing
+goes in slices (engine.normalize_in_slices()) so the Tk main loop keeps
+getting the GIL meanwhile.
+"""
+import os
+import threading
+
+from .engine import compare_texts, normalize_in_slices, read_text
+from .progress import NULL_PROGRESS
+
+# How often a wait for the background normalization checks for cancellation.
+_WAIT_SLICE = 0.05
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class LoadedDocument:
+    """The decoded text of a file, plus its normalization once computed.
+
+    text may be None until refresh() loads it.
+    """
+
+    def __init__(self, path, text=None, stamp=None):
+        self.path = path
+        self.text = text
+        self.stamp = stamp
+        self._normalized = None
+        self._error = None
+        self._done = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def load(cls, path):
+        stamp = _stamp(path)
+        return cls(path, read_text(path), stamp)
+
+    @property
+    def is_current(self):
+        """Whether the file on disk still has the size and mtime it was loaded with."""
+        try:
+            return self.stamp is not None and _stamp(self.path) == self.stamp
+        except OSError:
+            return False
+
+    def refresh(self):
+        """Re-read the file if it changed on disk since it was loaded (or was never loaded)."""
+        if not self.is_current:
+            if self._thread is not None:
+                self._done.wait()
+            self.stamp = _stamp(self.path)
+            self.text = read_text(self.path)
+            self._normalized = self._error = self._thread = None
+            self._done.clear()
+        return self
+
+    def start_normalizing(self):
+        """Normalize on a daemon thread; normalized() picks up the result."""
+        if self._thread is None and not self._done.is_set():
+            self._thread = threading.Thread(target=self._normalize, daemon=True)
+            self._thread.start()
+        return self
+
+    def _normalize(self):
+        try:
+            self._normalized = normalize_in_slices(self.text)
+        except Exception as e:  # Re-raised by normalized() in the caller's thread
+            self._error = e
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self):
+        return self._done.is_set()
+
+    def normalized(self, progress=None):
+        """(norm, OffsetMap) of the text, waiting for the background run if needed.
+
+        Without a background run the text is normalized in the calling thread.
+        """
+        progress = progress or NULL_PROGRESS
+        if self._thread is None and not self._done.is_set():
+            self._normalize()
+        while not self._done.wait(_WAIT_SLICE):
+            progress.check()
+        if self._error is not None:
+            raise self._error
+        return self._normalized
+
+
+def compare_documents(doc_a, doc_b, mode=None, engine=None, progress=None, pool=None, cache=None):
+    """compare_texts() for two LoadedDocuments, reusing their normalizations."""
+    progress = progress or NULL_PROGRESS
+    # Usually done already; otherwise wait for (or run) the normalization
+    progress.stage("Finishing normalization", 2)
+    normalized_a = doc_a.normalized(progress)
+    progress.update(1, 2)
+    normalized_b = doc_b.normalized(progress)
+    progress.update(2, 2)
+    return compare_texts(doc_a.text, doc_b.text, mode=mode, engine=engine, progress=progress, pool=pool,
+                         cache=cache, normalized_a=normalized_a, normalized_b=normalized_b)
@@ -0,0 +1,441 @@
+"""GUI-free comparison engine.
+
+Everything in here works on plain strings and returns plain objects, so the
+same comparison can run inside the Tk app, from the command line or in a
+batch job without ever starting a GUI.
+"""
+import functools
+import logging
+import operator
+import re
+import unicodedata
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from itertools import accumulate, chain, compress, islice, repeat
+
+from .cache import text_key
+from .chunking import chunked_opcodes
+from .diffing import get_engine
+from .lines import LineIndex
+from .moves import find_moves
+from .progress import NULL_PROGRESS
+from .summary import SUMMARY_CHUNK_SIZE, summarize
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MODE_SIZE = 5 * 1024 * 1024  # 5MB - use summary mode instead of full diff
+CHUNK_SIZE = 50000  # Target size of content-defined chunks (normalized chars)
+NORMALIZE_SLICE = 1 << 16  # Characters per step of normalize_in_slices()
+
+MODE_FULL = "full"
+MODE_CHUNKED = "chunked"
+MODE_SUMMARY = "summary"
+MODES = (MODE_FULL, MODE_CHUNKED, MODE_SUMMARY)
+
+# A stretch of both original texts. tag is one of the difflib opcode tags
+# ('equal', 'replace', 'delete', 'insert'), 'moved' for one place of a
+# moved block (see moves.py), or 'ignored' for the punctuation and
+# whitespace that normalization dropped between two opcodes.
+Segment = namedtuple("Segment", "tag start_a end_a start_b end_b")
+
+# A meaningful difference, with its text and 1-based line numbers.
+Difference = namedtuple("Difference", "tag start_a end_a start_b end_b line_a line_b content_a content_b")
+
+
+def _is_ignored(char):
+    # P* = Punctuation, Z* = Separator, C* = Control (incl. format/unassigned)
+    return unicodedata.category(char)[0] in 'PZC'
+
+
+@functools.cache
+def _bmp_ignored_class():
+    """Regex character-class body covering every ignored BMP code point (scanned once)."""
+    ranges = []
+    start = None
+    for cp in range(0x10000):
+        if _is_ignored(chr(cp)):
+            if start is None:
+                start = cp
+        elif start is not None:
+            ranges.append((start, cp - 1))
+            start = None
+    if start is not None:
+        ranges.append((start, 0xFFFF))
+    return "".join(f"\\u{a:04x}" if a == b else f"\\u{a:04x}-\\u{b:04x}" for a, b in ranges)
+
+
+_ASTRAL_RE = re.compile('[\U00010000-\U0010FFFF]')
+
+
+@functools.lru_cache(maxsize=256)
+def _ignored_runs_re(astral_ignored):
+    # The BMP class is built once and shared; only the (rare) astral
+    # characters a text actually contains are classified on demand and
+    # appended to it, so a new set of them costs one compile, not a rescan.
+    extra = "".join(re.escape(c) for c in astral_ignored)
+    return re.compile(f"([{_bmp_ignored_class()}{extra}]+)")
+
+
+def _astral_ignored(text):
+    return "".join(sorted(c for c in set(_ASTRAL_RE.findall(text)) if _is_ignored(c)))
+
+
+def _split_runs(text):
+    """Split text into alternating kept/ignored runs.
+
+    Returns (pieces, offsets): pieces[0::2] are the kept runs, pieces[1::2]
+    the ignored runs between them, and offsets[k] is where pieces[k] starts
+    in text (with a final entry equal to len(text)).
+    """
+    pieces = _ignored_runs_re(_astral_ignored(text)).split(text)
+    offsets = list(accumulate(map(len, pieces), initial=0))
+    return pieces, offsets
+
+
+class OffsetMap:
+    """Normalized -> original offset mapping, stored as runs of kept characters.
+
+    Run k starts at norm_starts[k] in the normalized text and at
+    orig_starts[k] in the original text; characters inside a run are
+    contiguous in both, so a lookup is one bisect. This costs a few bytes
+    per run instead of a Python int per character.
+    """
+
+    __slots__ = ("norm_starts", "orig_starts", "length", "orig_length")
+
+    def __init__(self, norm_starts, orig_starts, length, orig_length):
+        self.norm_starts = norm_starts
+        self.orig_starts = orig_starts
+        self.length = length
+        self.orig_length = orig_length
+
+    @classmethod
+    def from_runs(cls, orig_starts, run_lengths, orig_length):
+        """Build from the original start and length of each kept run."""
+        typecode = 'I' if orig_length < 2 ** 32 else 'Q'
+        keep = list(map(bool, run_lengths))
+        run_lengths = list(compress(run_lengths, keep))
+        norm_starts = array(typecode, accumulate(run_lengths, initial=0))
+        length = norm_starts.pop()
+        return cls(norm_starts, array(typecode, compress(orig_starts, keep)), length, orig_length)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError("OffsetMap index out of range")
+        k = bisect_right(self.norm_starts, i) - 1
+        return self.orig_starts[k] + i - self.norm_starts[k]
+
+    def __iter__(self):
+        run_ends = chain(islice(self.norm_starts, 1, None), (self.length,))
+        lengths = map(operator.sub, run_ends, self.norm_starts)
+        return chain.from_iterable(map(range, self.orig_starts, map(operator.add, self.orig_starts, lengths)))
+
+    def start(self, i):
+        """Original offset of normalized character i (len(text) past the end)."""
+        return self[i] if i < self.length else self.orig_length
+
+    def span(self, i1, i2):
+        """Original (start, end) covering normalized characters [i1, i2)."""
+        start = self.start(i1)
+        end = self[i2 - 1] + 1 if i2 > i1 else start
+        return start, end
+
+
+def normalize_text(text):
+    # Remove all punctuation (half-width and full-width) and whitespace
+    # Unicode categories: P* (Punctuation), Z* (Separator/Space), C* (Control)
+    # Return tuple: (normalized_string, OffsetMap)
+    # mapping[i] is the index in 'text' corresponding to normalized_string[i]
+    pieces, offsets = _split_runs(text)
+    kept = pieces[0::2]
+    mapping = OffsetMap.from_runs(offsets[0:-1:2], list(map(len, kept)), len(text))
+    return "".join(kept), mapping
+
+
+def normalize_in_slices(text, progress=None, slice_chars=NORMALIZE_SLICE):
+    """normalize_text() in steps of slice_chars characters.
+
+    A single normalize_text() call on a large text holds the GIL from start
+    to end, so a thread running it freezes every other thread (the Tk main
+    loop). Each step here is short, and other threads get the GIL between
+    steps. progress is checked for cancellation between steps.
+    """
+    progress = progress or NULL_PROGRESS
+    if len(text) <= slice_chars:
+        return normalize_text(text)
+    typecode = 'I' if len(text) < 2 ** 32 else 'Q'
+    norm_starts = array(typecode)
+    orig_starts = array(typecode)
+    pieces = []
+    length = 0
+    run_end = -1  # Original end of the last kept run
+    for start in range(0, len(text), slice_chars):
+        progress.check()
+        norm, mapping = normalize_text(text[start:start + slice_chars])
+        if not norm:
+            continue
+        # A kept run cut by the slice boundary continues the previous one
+        first = 1 if run_end == start and mapping.orig_starts[0] == 0 else 0
+        norm_starts.extend(map(operator.add, islice(mapping.norm_starts, first, None), repeat(length)))
+        orig_starts.extend(map(operator.add, islice(mapping.orig_starts, first, None), repeat(start)))
+        run_end = start + mapping.orig_starts[-1] + mapping.length - mapping.norm_starts[-1]
+        length += mapping.length
+        pieces.append(norm)
+    return "".join(pieces), OffsetMap(norm_starts, orig_starts, length, len(text))
+
+
+def strip_ignored(text):
+    """The normalized text alone, without building an OffsetMap."""
+    return _ignored_runs_re(_astral_ignored(text)).sub("", text)
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+class DiffResult:
+    """Outcome of comparing two texts.
+
+    opcodes are difflib-style (tag, i1, i2, j1, j2) tuples in normalized
+    coordinates; map_a/map_b (OffsetMap) translate them back to the
+    original texts. moves (moves.Move) pair the 'moved' opcodes where a
+    block was deleted with those where it was inserted.
+    """
+
+    def __init__(self, text_a, text_b, norm_a, norm_b, map_a, map_b, opcodes, mode, chunks=0, diff_count=0,
+                 regions=(), moves=()):
+        self.text_a = text_a
+        self.text_b = text_b
+        self.norm_a = norm_a
+        self.norm_b = norm_b
+        self.map_a = map_a
+        self.map_b = map_b
+        self.opcodes = opcodes
+        self.mode = mode
+        self.chunks = chunks
+        self.diff_count = diff_count
+        # summary mode: the differing stretches (summary.SummaryRegion)
+        self.regions = regions
+        self.moves = moves
+        self._lines = None
+
+    @property
+    def lines(self):
+        """(LineIndex, LineIndex) of the original texts, built on first use."""
+        if self._lines is None:
+            self._lines = (LineIndex(self.text_a), LineIndex(self.text_b))
+        return self._lines
+
+    @property
+    def identical(self):
+        return self.norm_a == self.norm_b
+
+    def segments(self):
+        """Walk both original texts, yielding a Segment for every opcode and
+        for the ignored characters in front of it."""
+        text_a, text_b = self.text_a, self.text_b
+        map_a, map_b = self.map_a, self.map_b
+        curr_a = 0
+        curr_b = 0
+        for tag, i1, i2, j1, j2 in self.opcodes:
+            # Determine start/end in original text
+            start_a, end_a = map_a.span(i1, i2)
+            start_b, end_b = map_b.span(j1, j2)
+
+            if curr_a < start_a or curr_b < start_b:
+                yield Segment("ignored", curr_a, start_a, curr_b, start_b)
+            yield Segment(tag, start_a, end_a, start_b, end_b)
+            curr_a = end_a
+            curr_b = end_b
+
+        if curr_a < len(text_a) or curr_b < len(text_b):
+            yield Segment("ignored", curr_a, len(text_a), curr_b, len(text_b))
+
+    def difference_for(self, segment):
+        text_a, text_b = self.text_a, self.text_b
+        lines_a, lines_b = self.lines
+        return Difference(segment.tag, segment.start_a, segment.end_a, segment.start_b, segment.end_b,
+                          lines_a.line(segment.start_a),
+                          lines_b.line(segment.start_b),
+                          text_a[segment.start_a:segment.end_a],
+                          text_b[segment.start_b:segment.end_b])
+
+    def changes(self):
+        """Segment of every difference in text order; summary-mode regions are tagged 'changed'.
+
+        A move is one 'moved' Segment spanning both of its places, listed
+        where the first of them is.
+        """
+        if self.mode == MODE_SUMMARY:
+            return (Segment("changed", *region[:4]) for region in self.regions)
+        if self.moves:
+            return self._changes_with_moves()
+        return (segment for segment in self.segments() if segment.tag not in ("equal", "ignored"))
+
+    def _changes_with_moves(self):
+        map_a, map_b = self.map_a, self.map_b
+        # Each 'moved' opcode lies within a piece of a move; find it by its start
+        pieces_a = sorted((i, k) for k, move in enumerate(self.moves) for i, _, _ in move.pieces)
+        pieces_b = sorted((j, k) for k, move in enumerate(self.moves) for _, j, _ in move.pieces)
+        starts_a = [i for i, _ in pieces_a]
+        starts_b = [j for j, _ in pieces_b]
+        listed = set()
+        for tag, i1, i2, j1, j2 in self.opcodes:
+            if tag == "equal":
+                continue
+            if tag != "moved":
+                yield Segment(tag, *map_a.span(i1, i2), *map_b.span(j1, j2))
+                continue
+            if i1 < i2:
+                k = pieces_a[bisect_right(starts_a, i1) - 1][1]
+            else:
+                k = pieces_b[bisect_right(starts_b, j1) - 1][1]
+            if k not in listed:
+                listed.add(k)
+                move = self.moves[k]
+                yield Segment("moved", *map_a.span(move.i1, move.i2), *map_b.span(move.j1, move.j2))
+
+    def differences(self):
+        if self.mode == MODE_SUMMARY:
+            return
+        for segment in self.changes():
+            yield self.difference_for(segment)
+
+
+def describe_difference(diff, limit=None):
+    """One-line, human readable description of a Difference."""
+    content_a, content_b = diff.content_a, diff.content_b
+    if limit is not None:
+        if len(content_a) > limit:
+            content_a = content_a[:limit] + "..."
+        if len(content_b) > limit:
+            content_b = content_b[:limit] + "..."
+    prefix = f"[Line A:{diff.line_a} / B:{diff.line_b}] [DIFFERENCE]"
+    if diff.tag == "moved":
+        if strip_ignored(diff.content_a) == strip_ignored(diff.content_b):
+            return f"{prefix} Moved: '{content_a}'"
+        return f"{prefix} Moved and edited: '{content_a}' as '{content_b}'"
+    if diff.tag == "replace":
+        return f"{prefix} Replaced: '{content_a}' with '{content_b}'"
+    if diff.tag == "delete":
+        return f"{prefix} Deleted: '{content_a}'"
+    return f"{prefix} Inserted: '{content_b}'"
+
+
+def _normalize(text, normalize, cache, key, progress):
+    if cache is None:
+        return normalize(text)
+    return cache.normalized(text, normalize, key, progress)
+
+
+def compare_texts(text_a, text_b, mode=None, chunk_size=CHUNK_SIZE, engine=None, progress=None, pool=None,
+                  cache=None, normalized_a=None, normalized_b=None, source=None):
+    """Compare two texts, ignoring punctuation, whitespace and control characters.
+
+    mode is one of MODES; None picks chunked or full comparison based on the
+    normalized length. engine is a diff engine name (see diffing.ENGINES)
+    or DiffEngine instance; None uses the default. progress (a
+    progress.Progress) receives stage updates and can cancel the run.
+    pool (a parallel.ParallelPool) spreads normalization and chunked
+    diffing of large texts over several processes. cache (a
+    cache.ResultCache) returns normalizations and diffs of texts seen
+    before, and keeps the ones computed here. normalized_a/normalized_b are
+    (norm, OffsetMap) pairs already computed for the texts, e.g. by a
+    document.LoadedDocument. source (a multi.SourceIndex of text_a) supplies
+    the normalization and chunk index of text_a, built once for all the
+    texts compared against it.
+    """
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"Unknown comparison mode: {mode}")
+    differ = get_engine(engine)
+    progress = progress or NULL_PROGRESS
+    if pool is None:
+        # In slices, so a GUI running this on a worker thread stays responsive
+        normalize = functools.partial(normalize_in_slices, progress=progress)
+    else:
+        normalize = pool.normalize
+
+    progress.stage("Normalizing", 2)
+    key_a = key_b = None
+    if cache is not None:
+        key_a, key_b = text_key(text_a), text_key(text_b)
+    if source is not None:
+        normalized_a = source.normalized
+    if normalized_a is None:
+        normalized_a = _normalize(text_a, normalize, cache, key_a, progress)
+    norm_a, map_a = normalized_a
+    progress.update(1, 2)
+    progress.check()
+    if normalized_b is None:
+        normalized_b = _normalize(text_b, normalize, cache, key_b, progress)
+    norm_b, map_b = normalized_b
+    progress.update(2, 2)
+    progress.check()
+    progress.note("normalized_chars", len(norm_a) + len(norm_b))
+
+    if mode is None:
+        mode = MODE_CHUNKED if len(norm_a) > chunk_size or len(norm_b) > chunk_size else MODE_FULL
+    cached = None
+    if cache is not None and norm_a != norm_b:
+        diff_key = cache.diff_key(key_a, key_b, mode, chunk_size, differ.name)
+        cached = cache.get(diff_key, progress)
+
+    if mode == MODE_SUMMARY:
+        progress.stage("Summarizing")
+        regions = []
+        if cached is not None:
+            regions = cached
+        elif norm_a != norm_b:
+            regions = summarize(text_a, text_b, norm_a, norm_b, map_a, map_b, progress=progress,
+                                source=None if source is None else source.chunks(SUMMARY_CHUNK_SIZE))
+            if cache is not None:
+                cache.put(diff_key, regions)
+        progress.note("regions", len(regions))
+        return DiffResult(text_a, text_b, norm_a, norm_b, map_a, map_b, [], MODE_SUMMARY,
+                          diff_count=sum(region.edits for region in regions), regions=regions)
+
+    logger.info(f"Comparing {len(norm_a)} + {len(norm_b)} normalized chars ({mode}, {differ.name})")
+
+    if norm_a == norm_b:
+        opcodes = [("equal", 0, len(norm_a), 0, len(norm_b))] if norm_a else []
+        return DiffResult(text_a, text_b, norm_a, norm_b, map_a, map_b, opcodes, mode, chunks=1)
+
+    if cached is not None:
+        opcodes, chunks = cached
+    else:
+        progress.stage("Diffing")
+        if mode == MODE_CHUNKED and pool is not None:
+            opcodes, chunks = pool.chunked_opcodes(norm_a, norm_b, chunk_size, differ, progress)
+        elif mode == MODE_CHUNKED:
+            opcodes, chunks = chunked_opcodes(norm_a, norm_b, chunk_size, differ, progress,
+                                              source=None if source is None else source.chunks(chunk_size))
+        else:
+            opcodes, chunks = differ.opcodes(norm_a, norm_b, progress), 1
+        progress.note("opcodes", len(opcodes))
+        progress.note("chunks", chunks)
+        if cache is not None:
+            cache.put(diff_key, (opcodes, chunks))
+    # Moves are found again rather than cached: it is linear in the changed text
+    opcodes, moves = find_moves(norm_a, norm_b, opcodes, progress)
+    progress.note("moves", len(moves))
+    return DiffResult(text_a, text_b, norm_a, norm_b, map_a, map_b, opcodes, mode, chunks=chunks, moves=moves)
+
+
+def compare_files(path_a, path_b, mode=None, engine=None, progress=None, pool=None, cache=None):
+    progress = progress or NULL_PROGRESS
+    progress.stage("Reading files", 2)
+    text_a = read_text(path_a)
+    progress.update(1, 2)
+    progress.check()
+    text_b = read_text(path_b)
+    progress.update(2, 2)
+    progress.check()
+    progress.note("chars_read", len(text_a) + len(text_b))
+    return compare_texts(text_a, text_b, mode=mode, engine=engine, progress=progress, pool=pool, cache=cache)
@@ -0,0 +1,318 @@
+"""Fingerprint manifests: check targets against a source without reading it all.
+
+A manifest records, for one source file, the digest of its normalized text
+and a Merkle tree over content-defined blocks of it (cut as in
+chunking.py). For each block it keeps the position where the block starts
+in the file (byte offset, character offset and line), so a block can be
+read back on its own.
+
+Checking a target against a manifest normalizes and hashes only the
+target:
+
+1. Equal digests mean the texts are identical; the source is not opened.
+2. Otherwise the target is cut with the source's cut characters and the
+   two trees are compared from the root down. Only subtrees whose hashes
+   differ are entered, so k differing blocks out of n are found in
+   O(k log n) comparisons. When an edit changed the number of blocks, the
+   leaf hashes are aligned instead.
+3. Only the source blocks that differ are read from the source file and
+   diffed against the matching stretch of the target.
+
+Both files are decoded without newline translation, the same way, so
+that byte and character offsets of the source agree and the offsets and
+lines in the results refer to the files as stored.
+"""
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+from .batch import DEFAULT_SUFFIXES, _text_files, map_pairs
+from .cache import text_key
+from .chunking import choose_cut_chars, chunk_bounds, chunked_opcodes
+from .diffing import MyersEngine, get_engine
+from .engine import CHUNK_SIZE, Difference, normalize_text
+from .lines import LineIndex
+from .progress import NULL_PROGRESS
+
+FORMAT = "textvalid-fingerprint"
+VERSION = 1
+BLOCK_SIZE = 8192  # Target size of a block (normalized chars)
+MANIFEST_SUFFIX = ".fingerprint.json"
+
+_DIGEST_SIZE = 16  # Bytes per block and tree node hash
+
+# Outcome of checking a target against a Fingerprint. regions are the
+# (start_a, end_a, start_b, end_b) stretches, in original offsets, that
+# were diffed; differences lists their Differences; source_bytes is how
+# much of the source file had to be read.
+FingerprintCheck = namedtuple("FingerprintCheck", "identical regions differences source_bytes")
+
+
+def _read_stored(path):
+    """A file's text as stored: decoded as UTF-8, line endings left as they are."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+def _hash(data):
+    return hashlib.blake2b(data, digest_size=_DIGEST_SIZE).digest()
+
+
+def block_hashes(norm, bounds):
+    """Hash of every block of norm; bounds are the blocks' end offsets."""
+    start = 0
+    hashes = []
+    for end in bounds:
+        hashes.append(_hash(norm[start:end].encode('utf-8', 'surrogatepass')))
+        start = end
+    return hashes
+
+
+def merkle_levels(leaves):
+    """The levels of the Merkle tree over leaves, from the leaves up to [root].
+
+    A node hashes its two children; the last node of an odd level moves up
+    unchanged.
+    """
+    levels = [list(leaves) or [_hash(b"")]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_hash(level[k] + level[k + 1]) for k in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def differing_leaves(levels_a, levels_b):
+    """Indexes of the leaves that differ between two trees with as many leaves, top-down."""
+    found = []
+    stack = [(len(levels_a) - 1, 0)]
+    while stack:
+        depth, k = stack.pop()
+        if levels_a[depth][k] == levels_b[depth][k]:
+            continue
+        if depth == 0:
+            found.append(k)
+            continue
+        for child in (2 * k + 1, 2 * k):
+            if child < len(levels_a[depth - 1]):
+                stack.append((depth - 1, child))
+    return found
+
+
+class Fingerprint:
+    """Digest and block tree of a normalized source text.
+
+    Block k covers normalized characters [ends[k-1], ends[k]) (from 0 for
+    the first). It starts at char_starts[k], byte_starts[k] and line
+    line_starts[k] of the source file; each of these lists ends with one
+    entry for the end of the file.
+    """
+
+    def __init__(self, source, digest, block_size, cut_chars, ends, char_starts, byte_starts, line_starts, leaves):
+        self.source = source
+        self.digest = digest
+        self.block_size = block_size
+        self.cut_chars = cut_chars
+        self.ends = ends
+        self.char_starts = char_starts
+        self.byte_starts = byte_starts
+        self.line_starts = line_starts
+        self.leaves = leaves
+        self._tree = None
+
+    @property
+    def tree(self):
+        """merkle_levels() of the blocks, built on first use."""
+        if self._tree is None:
+            self._tree = merkle_levels(self.leaves)
+        return self._tree
+
+    @property
+    def root(self):
+        return self.tree[-1][0]
+
+    @property
+    def normalized_chars(self):
+        return self.ends[-1] if self.ends else 0
+
+    @classmethod
+    def from_text(cls, text, block_size=BLOCK_SIZE, source=None, normalized=None):
+        """Fingerprint of text, as decoded from the file without newline translation."""
+        norm, mapping = normalized or normalize_text(text)
+        cut_chars = choose_cut_chars(norm, block_size)
+        ends = chunk_bounds(norm, cut_chars, block_size) if norm else []
+        # Ignored characters after a block's last kept one belong to it
+        char_starts = [0] + [mapping.start(end) for end in ends[:-1]] + [len(text)]
+        byte_starts = [0]
+        line_starts = [1]
+        for start, end in zip(char_starts, char_starts[1:]):
+            byte_starts.append(byte_starts[-1] + len(text[start:end].encode('utf-8', 'surrogatepass')))
+            line_starts.append(line_starts[-1] + text.count('\n', start, end))
+        return cls(source, text_key(norm), block_size, cut_chars, ends, char_starts, byte_starts, line_starts,
+                   block_hashes(norm, ends))
+
+    @classmethod
+    def from_file(cls, path, block_size=BLOCK_SIZE):
+        return cls.from_text(_read_stored(path), block_size, source=os.path.abspath(path))
+
+    def to_json(self):
+        return json.dumps({
+            "format": FORMAT, "version": VERSION, "source": self.source, "digest": self.digest,
+            "normalized_chars": self.normalized_chars, "block_size": self.block_size,
+            "cut_chars": self.cut_chars, "root": self.root.hex(), "ends": self.ends,
+            "char_starts": self.char_starts, "byte_starts": self.byte_starts, "line_starts": self.line_starts,
+            "hashes": [leaf.hex() for leaf in self.leaves],
+        }, ensure_ascii=False)
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json())
+
+    @classmethod
+    def load(cls, path):
+        """Read a manifest; raises ValueError if it is not one or is damaged."""
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}: not a fingerprint manifest ({e})") from None
+        if not isinstance(data, dict) or data.get("format") != FORMAT:
+            raise ValueError(f"{path}: not a fingerprint manifest")
+        if data.get("version") != VERSION:
+            raise ValueError(f"{path}: unsupported manifest version {data.get('version')}")
+        fingerprint = cls(data["source"], data["digest"], data["block_size"], data["cut_chars"], data["ends"],
+                          data["char_starts"], data["byte_starts"], data["line_starts"],
+                          [bytes.fromhex(leaf) for leaf in data["hashes"]])
+        if fingerprint.root.hex() != data["root"]:
+            raise ValueError(f"{path}: block hashes do not match the manifest root")
+        return fingerprint
+
+    def read_blocks(self, c1, c2, path=None):
+        """Original text of blocks [c1, c2), read from the source file (or path)."""
+        with open(path or self.source, 'rb') as f:
+            f.seek(self.byte_starts[c1])
+            return f.read(self.byte_starts[c2] - self.byte_starts[c1]).decode('utf-8')
+
+
+def mismatched_blocks(fingerprint, leaves):
+    """(c1, c2, d1, d2) runs of source blocks [c1, c2) that differ from target blocks [d1, d2)."""
+    ranges = []
+    if len(leaves) == len(fingerprint.leaves):
+        for k in differing_leaves(fingerprint.tree, merkle_levels(leaves)):
+            if ranges and ranges[-1][1] == k:
+                ranges[-1] = (ranges[-1][0], k + 1, ranges[-1][2], k + 1)
+            else:
+                ranges.append((k, k + 1, k, k + 1))
+        return ranges
+    # Blocks were added or removed: later blocks moved to other leaves
+    for tag, c1, c2, d1, d2 in MyersEngine().opcodes(fingerprint.leaves, leaves):
+        if tag != "equal":
+            ranges.append((c1, c2, d1, d2))
+    return ranges
+
+
+def check_text(fingerprint, text, engine=None, progress=None, source_path=None):
+    """FingerprintCheck of a target text against a Fingerprint.
+
+    source_path overrides the source file named in the manifest. Raises
+    ValueError when the blocks read back no longer match the manifest.
+    """
+    progress = progress or NULL_PROGRESS
+    progress.stage("Normalizing", 1)
+    norm_b, map_b = normalize_text(text)
+    progress.update(1, 1)
+    progress.check()
+    if text_key(norm_b) == fingerprint.digest:
+        return FingerprintCheck(True, [], [], 0)
+
+    progress.stage("Hashing blocks")
+    bounds = chunk_bounds(norm_b, fingerprint.cut_chars, fingerprint.block_size) if norm_b else []
+    ranges = mismatched_blocks(fingerprint, block_hashes(norm_b, bounds))
+    progress.note("mismatched_blocks", sum(c2 - c1 for c1, c2, _, _ in ranges))
+    starts_b = [0] + bounds
+    norm_starts = [0] + fingerprint.ends
+    differ = get_engine(engine)
+    lines_b = LineIndex(text)
+    regions = []
+    differences = []
+    source_bytes = 0
+
+    progress.stage("Diffing mismatched blocks", len(ranges))
+    for done, (c1, c2, d1, d2) in enumerate(ranges, 1):
+        part = fingerprint.read_blocks(c1, c2, source_path) if c1 < c2 else ""
+        source_bytes += fingerprint.byte_starts[c2] - fingerprint.byte_starts[c1]
+        norm_a, map_a = normalize_text(part)
+        ends = [end - norm_starts[c1] for end in fingerprint.ends[c1:c2]]
+        if block_hashes(norm_a, ends) != fingerprint.leaves[c1:c2]:
+            raise ValueError(f"{source_path or fingerprint.source} changed since it was fingerprinted")
+        j1, j2 = starts_b[d1], starts_b[d2]
+        if max(len(norm_a), j2 - j1) > CHUNK_SIZE:
+            opcodes, _ = chunked_opcodes(norm_a, norm_b[j1:j2], CHUNK_SIZE, differ, progress)
+        else:
+            opcodes = differ.opcodes(norm_a, norm_b[j1:j2], progress)
+        offset_a, line_a = fingerprint.char_starts[c1], fingerprint.line_starts[c1]
+        lines_a = LineIndex(part)
+        regions.append((offset_a, fingerprint.char_starts[c2], map_b.start(j1), map_b.start(j2)))
+        for tag, i1, i2, k1, k2 in opcodes:
+            if tag == "equal":
+                continue
+            start_a, end_a = map_a.span(i1, i2)
+            start_b, end_b = map_b.span(j1 + k1, j1 + k2)
+            differences.append(Difference(tag, offset_a + start_a, offset_a + end_a, start_b, end_b,
+                                          line_a + lines_a.line(start_a) - 1, lines_b.line(start_b),
+                                          part[start_a:end_a], text[start_b:end_b]))
+        progress.update(done, len(ranges))
+        progress.check()
+    progress.note("source_bytes_read", source_bytes)
+    return FingerprintCheck(not differences, regions, differences, source_bytes)
+
+
+def check_file(fingerprint, path, engine=None, progress=None, source_path=None):
+    """FingerprintCheck of a target file against a Fingerprint."""
+    progress = progress or NULL_PROGRESS
+    progress.stage("Reading files", 1)
+    text = _read_stored(path)
+    progress.update(1, 1)
+    return check_text(fingerprint, text, engine=engine, progress=progress, source_path=source_path)
+
+
+def manifest_path(path, output_dir=None, name=None):
+    """Where the manifest of source path goes: beside it, or at name under output_dir."""
+    if output_dir is None:
+        return path + MANIFEST_SUFFIX
+    return os.path.join(output_dir, (name or os.path.basename(path)) + MANIFEST_SUFFIX)
+
+
+def _write_fingerprint(task, block_size):
+    """Fingerprint one (name, source, manifest) task; returns (name, manifest, blocks, error)."""
+    name, path, target = task
+    try:
+        fingerprint = Fingerprint.from_file(path, block_size)
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        fingerprint.save(target)
+        return name, target, len(fingerprint.leaves), None
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return name, target, 0, str(e)
+
+
+def fingerprint_corpus(paths, output_dir=None, suffixes=DEFAULT_SUFFIXES, block_size=BLOCK_SIZE, workers=None,
+                       progress=None):
+    """Write the manifest of every file in paths (directories are walked) on a process pool.
+
+    Manifests go beside their sources, or under output_dir at the path of
+    the source relative to the directory it was found in. Returns
+    (name, manifest, blocks, error) tuples in order.
+    """
+    progress = progress or NULL_PROGRESS
+    tasks = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name, found in sorted(_text_files(path, suffixes).items()):
+                tasks.append((name, found, manifest_path(found, output_dir, name)))
+        else:
+            tasks.append((os.path.basename(path), path, manifest_path(path, output_dir)))
+    progress.stage("Fingerprinting", len(tasks))
+    return map_pairs(_write_fingerprint, tasks, (block_size,), workers, progress)
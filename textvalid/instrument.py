@@ -0,0 +1,139 @@
+"""Opt-in timing, counters and peak memory for comparison runs.
+
+An Instrumentation records how long each stage took and, when memory
+tracing is on, the peak traced memory (tracemalloc) during it. Engine
+stages are picked up by wrapping the run's Progress in an
+InstrumentedProgress; counters arrive through Progress.note(). Nothing is
+measured unless a run is given one, so the normal path pays nothing.
+
+Memory tracing slows Python allocations down noticeably, so timings taken
+with memory=True run slower than without. Worker processes of a
+ParallelPool are not traced.
+"""
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from .progress import Progress
+
+
+class Instrumentation:
+    """Stage timings, counters and peak memory of one run."""
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.stages = []    # (name, seconds, peak_bytes or None)
+        self.counters = {}
+        self.total_seconds = None
+        self.peak_bytes = None
+        self._current = None
+        self._started = None
+        self._owns_tracing = False
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        self._started = time.perf_counter()
+
+    def begin(self, name):
+        """Start timing a stage, ending the current one."""
+        self.end()
+        if self.memory:
+            tracemalloc.reset_peak()
+        self._current = (name, time.perf_counter())
+
+    def end(self):
+        if self._current is None:
+            return
+        name, started = self._current
+        self._current = None
+        peak = tracemalloc.get_traced_memory()[1] if self.memory else None
+        self.stages.append((name, time.perf_counter() - started, peak))
+
+    @contextmanager
+    def measure(self, name):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end()
+
+    def count(self, name, value):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def finish(self):
+        """End the run: close the last stage and stop tracing if we started it."""
+        self.end()
+        if self._started is not None:
+            self.total_seconds = time.perf_counter() - self._started
+        if self.memory:
+            self.peak_bytes = max((peak for _, _, peak in self.stages), default=0)
+            if self._owns_tracing:
+                tracemalloc.stop()
+                self._owns_tracing = False
+
+    def report(self):
+        """The measurements as a JSON-serialisable dict."""
+        return {
+            "total_seconds": self.total_seconds,
+            "peak_bytes": self.peak_bytes,
+            "memory_traced": self.memory,
+            "stages": [{"name": name, "seconds": seconds, "peak_bytes": peak}
+                       for name, seconds, peak in self.stages],
+            "counters": dict(self.counters),
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.report(), indent=indent, ensure_ascii=False)
+
+    def describe(self):
+        """Human readable lines, one per stage, then counters and totals."""
+        lines = []
+        for name, seconds, peak in self.stages:
+            line = f"{name}: {seconds:.3f}s"
+            if peak is not None:
+                line += f", peak {peak / (1024 * 1024):.1f}MB"
+            lines.append(line)
+        if self.counters:
+            lines.append(", ".join(f"{name}={value}" for name, value in self.counters.items()))
+        total = f"Total: {self.total_seconds:.3f}s" if self.total_seconds is not None else "Total: n/a"
+        if self.peak_bytes is not None:
+            total += f", peak traced memory {self.peak_bytes / (1024 * 1024):.1f}MB"
+        lines.append(total)
+        return lines
+
+
+class InstrumentedProgress(Progress):
+    """Progress that times each stage and forwards everything to inner.
+
+    Cancellation goes through inner, so cancelling either one stops the run.
+    """
+
+    def __init__(self, instrumentation, inner=None):
+        super().__init__()
+        self.instrumentation = instrumentation
+        # A fresh Progress, not NULL_PROGRESS: cancelling must not stop every other run
+        self.inner = inner or Progress()
+
+    def stage(self, name, total=None):
+        self.instrumentation.begin(name)
+        self.inner.stage(name, total)
+
+    def update(self, done, total):
+        self.inner.update(done, total)
+
+    def note(self, name, value):
+        self.instrumentation.count(name, value)
+        self.inner.note(name, value)
+
+    def cancel(self):
+        self.inner.cancel()
+
+    @property
+    def cancelled(self):
+        return self.inner.cancelled
+
+    def check(self):
+        self.inner.check()
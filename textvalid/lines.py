@@ -0,0 +1,44 @@
+"""Offset -> line/column lookups through an index of line starts.
+
+Counting the newlines in front of an offset rescans the text from the
+start, so numbering k differences of an n-character text costs O(n*k). A
+LineIndex records where every line starts, in one pass over the text, and
+answers each lookup with one bisect.
+"""
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, islice
+
+# Characters split per step while indexing, so indexing a large text never
+# holds all of its lines as separate strings.
+_INDEX_BLOCK = 1 << 20
+
+
+class LineIndex:
+    """Start offset of every line of a text; line numbers are 1-based."""
+
+    __slots__ = ("starts", "length")
+
+    def __init__(self, text):
+        typecode = 'I' if len(text) < 2 ** 32 else 'Q'
+        starts = array(typecode, [0])
+        for p in range(0, len(text), _INDEX_BLOCK):
+            block = text[p:p + _INDEX_BLOCK]
+            # Each piece's length plus its newline gives the next line start
+            next_starts = accumulate(map((1).__add__, map(len, block.split('\n'))), initial=p)
+            starts.extend(islice(next_starts, 1, block.count('\n') + 1))
+        self.starts = starts
+        self.length = len(text)
+
+    def __len__(self):
+        """Number of lines."""
+        return len(self.starts)
+
+    def line(self, offset):
+        """Line of the character at offset."""
+        return bisect_right(self.starts, offset)
+
+    def position(self, offset):
+        """(line, column) of the character at offset; columns are 0-based, as in Tk."""
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1]
@@ -0,0 +1,298 @@
+"""Moved-block detection: pair deleted text with the same text inserted elsewhere.
+
+When a target reorders sentences, the diff shows each moved sentence as a
+deletion at its old place and an insertion at its new one. find_moves()
+indexes the deleted (and replaced) normalized text by k-grams, looks up
+every k-gram of the inserted text, and extends each hit to the longest
+common run. Runs of at least MIN_MOVED_CHARS become 'moved' opcodes, and
+runs a few edited characters apart form one near-identical move; the edits
+between them stay deletions and insertions.
+
+Only every MOVE_GRAM-th k-gram of the deleted text is indexed, which still
+finds every common run of 2 * MOVE_GRAM - 1 characters or more, so the
+index and the scan are both linear in the size of the changed text.
+"""
+from bisect import bisect_right
+from collections import namedtuple
+
+from .chunking import merge_equal_opcodes
+from .diffing import _backward_match, _forward_match
+from .progress import NULL_PROGRESS
+
+MOVE_GRAM = 6  # Characters per indexed k-gram
+MIN_MOVED_CHARS = 2 * MOVE_GRAM  # Shortest move reported (identical characters)
+MOVE_GAP = 16  # Most edited characters between the identical runs of one move
+MAX_MOVE_SCAN = 2_000_000  # Larger changed texts are rewrites, not moves: not scanned
+
+_MIN_PIECE = 3  # Shortest identical run taken into a move across an edit
+_MAX_PLACES = 8  # Indexed places kept per k-gram, so repeated phrases stay cheap
+_CHECK_EVERY = 1 << 16  # Positions scanned between cancellation checks
+
+# A moved block in normalized coordinates: norm_a[i1:i2] reappears as
+# norm_b[j1:j2]. pieces are its identical (i, j, length) runs; anything
+# between them was edited.
+Move = namedtuple("Move", "i1 i2 j1 j2 pieces")
+
+
+def _changed_blocks(opcodes):
+    """[i1, i2, j1, j2, first, last] of every changed stretch opcodes[first:last].
+
+    Equal runs shorter than MOVE_GRAM between two changes are taken in: a
+    character diff matches stray characters inside moved text, which would
+    otherwise cut it into pieces too short to find.
+    """
+    blocks = []
+    for k, (tag, i1, i2, j1, j2) in enumerate(opcodes):
+        if tag == "equal":
+            continue
+        if blocks and (blocks[-1][5] == k or blocks[-1][5] == k - 1 and opcodes[k - 1][2] - opcodes[k - 1][1] < MOVE_GRAM):
+            blocks[-1][1], blocks[-1][3], blocks[-1][5] = i2, j2, k + 1
+        else:
+            blocks.append([i1, i2, j1, j2, k, k + 1])
+    return blocks
+
+
+def _index(norm_a, blocks):
+    """{k-gram: place or [places]} of the k-grams at every MOVE_GRAM-th deleted position."""
+    index = {}
+    for i1, i2, *_ in blocks:
+        for p in range(i1, i2 - MOVE_GRAM + 1, MOVE_GRAM):
+            gram = norm_a[p:p + MOVE_GRAM]
+            places = index.setdefault(gram, p)
+            if places == p:
+                continue
+            if isinstance(places, int):
+                index[gram] = places = [places]
+            if len(places) < _MAX_PLACES:
+                places.append(p)
+    return index
+
+
+def _runs(norm_a, norm_b, blocks, progress):
+    """(i, j, length, block_a, block_b) of the common runs, in target order."""
+    index = _index(norm_a, blocks)
+    starts = [block[0] for block in blocks]
+    used = bytearray(len(norm_a))  # Deleted characters already paired
+    runs = []
+    scanned = 0
+    for block_b, (_, _, j1, j2, _, _) in enumerate(blocks):
+        floor = j1  # Target characters before this are paired or passed
+        q = j1
+        while q <= j2 - MOVE_GRAM:
+            scanned += 1
+            if scanned % _CHECK_EVERY == 0:
+                progress.check()
+            places = index.get(norm_b[q:q + MOVE_GRAM])
+            if places is None:
+                q += 1
+                continue
+            best = None
+            for p in ((places,) if isinstance(places, int) else places):
+                if used[p]:
+                    continue
+                block_a = bisect_right(starts, p) - 1
+                # The run can reach back to floor and on to j2, but not into paired text
+                lo = max(blocks[block_a][0], p - (q - floor))
+                lo = max(lo, used.rfind(1, lo, p) + 1)
+                hi = min(blocks[block_a][1], p + j2 - q)
+                paired = used.find(1, p, hi)
+                if paired >= 0:
+                    hi = paired
+                back = _backward_match(norm_a, lo, p, norm_b, floor, q)
+                length = back + _forward_match(norm_a, p, hi, norm_b, q, j2)
+                if best is None or length > best[2]:
+                    best = (p - back, q - back, length, block_a, block_b)
+            if best is None or best[2] < MOVE_GRAM:
+                q += 1
+                continue
+            block_a = best[3]
+            a_lo, a_hi = blocks[block_a][:2]
+            pieces = [best[:3]]
+            # Runs a few edited characters away belong to the same (near-identical) move
+            while True:
+                i, j, length = pieces[0]
+                piece = _nearby(norm_a, norm_b, used, i, j, a_lo, floor, False)
+                if piece is None:
+                    break
+                pieces.insert(0, piece)
+            while True:
+                i, j, length = pieces[-1]
+                piece = _nearby(norm_a, norm_b, used, i + length, j + length, a_hi, j2, True)
+                if piece is None:
+                    break
+                pieces.append(piece)
+            for i, j, length in pieces:
+                used[i:i + length] = b'\x01' * length
+                runs.append((i, j, length, block_a, block_b))
+            q = floor = j + length
+    return runs
+
+
+def _nearby(norm_a, norm_b, used, i, j, a_bound, b_bound, forward):
+    """(i, j, length) of the longest identical run starting at most MOVE_GAP
+    characters after (i, j) (forward) or ending at most MOVE_GAP before it,
+    within the bounds; or None. Runs shorter than _MIN_PIECE, or than the
+    edit they are apart, do not count."""
+    best = None
+    for gap_a in range(MOVE_GAP + 1):
+        for gap_b in range(MOVE_GAP + 1):
+            if forward:
+                a, b = i + gap_a, j + gap_b
+                if a + _MIN_PIECE > a_bound or b + _MIN_PIECE > b_bound:
+                    continue
+                if norm_a[a:a + _MIN_PIECE] != norm_b[b:b + _MIN_PIECE] or used.find(1, a, a + _MIN_PIECE) >= 0:
+                    continue
+                end = min(a_bound, a + b_bound - b)
+                paired = used.find(1, a, end)
+                length = _forward_match(norm_a, a, end if paired < 0 else paired, norm_b, b, b_bound)
+                run = (a, b, length)
+            else:
+                a, b = i - gap_a, j - gap_b
+                if a - _MIN_PIECE < a_bound or b - _MIN_PIECE < b_bound:
+                    continue
+                if norm_a[a - _MIN_PIECE:a] != norm_b[b - _MIN_PIECE:b] or used.find(1, a - _MIN_PIECE, a) >= 0:
+                    continue
+                start = max(a_bound, a - (b - b_bound))
+                start = max(start, used.rfind(1, start, a) + 1)
+                length = _backward_match(norm_a, start, a, norm_b, b_bound, b)
+                run = (a - length, b - length, length)
+            if (gap_a or gap_b) and length >= max(gap_a, gap_b) and (best is None or length > best[2]):
+                best = run
+    return best
+
+
+def _group(runs):
+    """Moves made of runs close together on both sides, with enough identical characters."""
+    moves = []
+    group = []
+    for run in runs + [None]:
+        if group:
+            i, j, length, block_a, block_b = group[-1]
+            if (run is not None and run[3] == block_a and run[4] == block_b
+                    and 0 <= run[0] - (i + length) <= MOVE_GAP and 0 <= run[1] - (j + length) <= MOVE_GAP):
+                group.append(run)
+                continue
+            if sum(piece[2] for piece in group) >= MIN_MOVED_CHARS:
+                first, last = group[0], group[-1]
+                moves.append(Move(first[0], last[0] + last[2], first[1], last[1] + last[2],
+                                  tuple(piece[:3] for piece in group)))
+        group = [run]
+    return moves
+
+
+def _covered(spans, starts, lo, hi):
+    """The parts of the sorted, disjoint (start, end) spans within [lo, hi)."""
+    k = max(0, bisect_right(starts, lo) - 1)
+    parts = []
+    while k < len(spans) and spans[k][0] < hi:
+        start, end = max(spans[k][0], lo), min(spans[k][1], hi)
+        if start < end:
+            parts.append((start, end))
+        k += 1
+    return parts
+
+
+def _split(start, end, parts, plain):
+    """(tag, start, end) covering [start, end): parts are 'moved', the rest plain."""
+    position = start
+    for part_start, part_end in parts:
+        if position < part_start:
+            yield plain, position, part_start
+        yield "moved", part_start, part_end
+        position = part_end
+    if position < end:
+        yield plain, position, end
+
+
+def _split_change(opcode, parts_a, parts_b):
+    """A changed opcode as its deleted side, then its inserted side, with moved parts split out."""
+    tag, i1, i2, j1, j2 = opcode
+    for tag, start, end in _split(i1, i2, parts_a, "delete"):
+        yield tag, start, end, j1, j1
+    for tag, start, end in _split(j1, j2, parts_b, "insert"):
+        yield tag, i2, i2, start, end
+
+
+def _split_equal(opcode, parts_a, parts_b):
+    """An equal opcode that moves took characters of: what is left on both sides stays equal."""
+    _, i1, i2, j1, j2 = opcode
+    offsets_a = [(start - i1, end - i1) for start, end in parts_a]
+    offsets_b = [(start - j1, end - j1) for start, end in parts_b]
+    cuts = sorted({0, i2 - i1}.union(*offsets_a, *offsets_b))
+    for t1, t2 in zip(cuts, cuts[1:]):
+        moved_a = any(start <= t1 < end for start, end in offsets_a)
+        moved_b = any(start <= t1 < end for start, end in offsets_b)
+        if not (moved_a or moved_b):
+            yield "equal", i1 + t1, i1 + t2, j1 + t1, j1 + t2
+            continue
+        yield "moved" if moved_a else "delete", i1 + t1, i1 + t2, j1 + t1, j1 + t1
+        yield "moved" if moved_b else "insert", i1 + t2, i1 + t2, j1 + t1, j1 + t2
+
+
+def find_moves(norm_a, norm_b, opcodes, progress=None):
+    """(opcodes, moves): opcodes with moved runs tagged 'moved', and the Moves.
+
+    A moved run becomes ('moved', i1, i2, j, j) where it was deleted and
+    ('moved', i, i, j1, j2) where it was inserted. A changed opcode holding
+    part of a move becomes its deleted side followed by its inserted side,
+    and stray equal characters taken into a move become a deletion or an
+    insertion on the other side; all other opcodes are kept.
+    """
+    progress = progress or NULL_PROGRESS
+    blocks = _changed_blocks(opcodes)
+    deleted = sum(i2 - i1 for i1, i2, *_ in blocks)
+    inserted = sum(j2 - j1 for _, _, j1, j2, *_ in blocks)
+    if min(deleted, inserted) < MIN_MOVED_CHARS or max(deleted, inserted) > MAX_MOVE_SCAN:
+        return opcodes, []
+    progress.stage("Finding moved text")
+    moves = _group(_runs(norm_a, norm_b, blocks, progress))
+    if not moves:
+        return opcodes, []
+    spans_a = sorted((i, i + length) for move in moves for i, _, length in move.pieces)
+    spans_b = sorted((j, j + length) for move in moves for _, j, length in move.pieces)
+    starts_a = [start for start, _ in spans_a]
+    starts_b = [start for start, _ in spans_b]
+    result = []
+    for opcode in opcodes:
+        tag, i1, i2, j1, j2 = opcode
+        parts_a = _covered(spans_a, starts_a, i1, i2)
+        parts_b = _covered(spans_b, starts_b, j1, j2)
+        if not (parts_a or parts_b):
+            result.append(opcode)
+        elif tag == "equal":
+            result.extend(_split_equal(opcode, parts_a, parts_b))
+        else:
+            result.extend(_split_change(opcode, parts_a, parts_b))
+    return merge_equal_opcodes(_rejoin(result, norm_a, norm_b)), moves
+
+
+def _rejoin(opcodes, norm_a, norm_b):
+    """opcodes with a deletion and an insertion of the same text made equal
+    again, where at most moved text of one side lies between them."""
+    joined = []
+    for opcode in opcodes:
+        tag, i1, i2, j1, j2 = opcode
+        if tag in ("delete", "insert"):
+            # Look back past the opcodes that only take up this opcode's side
+            side = 3 if tag == "delete" else 1
+            k = len(joined) - 1
+            while k >= 0 and joined[k][0] == "moved" and joined[k][side] == joined[k][side + 1]:
+                k -= 1
+            if k >= 0 and joined[k][0] == ("insert" if tag == "delete" else "delete"):
+                _, a1, a2, b1, b2 = joined[k]
+                if tag == "delete" and norm_a[i1:i2] == norm_b[b1:b2]:
+                    joined[k:] = [(t, c1, c2, b1, b1) for t, c1, c2, _, _ in joined[k + 1:]]
+                    joined.append(("equal", i1, i2, b1, b2))
+                    continue
+                if tag == "insert" and norm_a[a1:a2] == norm_b[j1:j2]:
+                    joined[k:] = [(t, a1, a1, d1, d2) for t, _, _, d1, d2 in joined[k + 1:]]
+                    joined.append(("equal", a1, a2, j1, j2))
+                    continue
+        joined.append(opcode)
+    return joined
+
+
+def unmark_moves(opcodes):
+    """opcodes with their 'moved' halves back as deletions and insertions."""
+    return [opcode if opcode[0] != "moved" else ("delete" if opcode[1] < opcode[2] else "insert",) + opcode[1:]
+            for opcode in opcodes]
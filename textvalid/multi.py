@@ -0,0 +1,128 @@
+"""Compare one source with many targets, indexing the source once.
+
+Validating the outputs of several models or prompts for the same source
+would otherwise normalize the source and cut it into content-defined chunks
+(see chunking) again for every output. A SourceIndex keeps both: the source
+is normalized once, each worker process receives the index once when it
+starts, and the chunk index of the source is built there on first use and
+shared by every target that worker compares. rank_targets() orders the
+results from the best preserved output down.
+"""
+import os
+import time
+
+from .batch import STATUS_DIFFERENT, STATUS_ERROR, STATUS_IDENTICAL, BatchPair, _failed, _outcome, map_pairs
+from .chunking import index_chunks
+from .engine import MODE_SUMMARY, SUMMARY_MODE_SIZE, compare_texts, normalize_text, read_text
+from .progress import NULL_PROGRESS
+
+# Order of statuses in a ranking; missing and error results come last.
+_STATUS_RANK = {STATUS_IDENTICAL: 0, STATUS_DIFFERENT: 1}
+
+# SourceIndex installed in a worker process by _install()
+_source = None
+
+
+class SourceIndex:
+    """A source text with its normalization and, per chunk size, its chunk index."""
+
+    def __init__(self, text, normalized=None):
+        self.text = text
+        self.normalized = normalized if normalized is not None else normalize_text(text)
+        self.size = len(text.encode('utf-8', 'surrogatepass'))
+        self._chunks = {}
+
+    @classmethod
+    def load(cls, path):
+        return cls(read_text(path))
+
+    def chunks(self, target_size):
+        """chunking.SourceChunks of the source for target_size, built on first use."""
+        chunks = self._chunks.get(target_size)
+        if chunks is None:
+            chunks = self._chunks[target_size] = index_chunks(self.normalized[0], target_size)
+        return chunks
+
+    def __getstate__(self):
+        # Chunk hashes are salted per process; each worker builds its own
+        return self.text, self.normalized
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+
+def compare_target(source, pair, mode=None, engine=None):
+    """Compare a SourceIndex with the target file of a BatchPair; never raises."""
+    started = time.perf_counter()
+    try:
+        text_b = read_text(pair.path_b)
+        if mode is None and source.size + os.path.getsize(pair.path_b) > SUMMARY_MODE_SIZE:
+            mode = MODE_SUMMARY
+        return _outcome(pair, compare_texts(source.text, text_b, mode=mode, engine=engine, source=source), started)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return _failed(pair, STATUS_ERROR, str(e), started)
+    except Exception as e:  # As in batch.compare_pair: fail this target, not the ranking
+        return _failed(pair, STATUS_ERROR, f"{type(e).__name__}: {e}", started)
+
+
+def _install(source):
+    global _source
+    _source = source
+
+
+def _compare_installed(pair, mode, engine):
+    return compare_target(_source, pair, mode, engine)
+
+
+def compare_targets(source, targets, source_path=None, workers=None, mode=None, engine=None, progress=None):
+    """Compare a SourceIndex with every target file on a process pool.
+
+    Returns BatchResults in the order of targets, named by file name (by
+    path when file names repeat).
+    """
+    progress = progress or NULL_PROGRESS
+    targets = list(targets)
+    names = [os.path.basename(target) for target in targets]
+    if len(set(names)) < len(names):
+        names = targets
+    pairs = [BatchPair(name, source_path, target) for name, target in zip(names, targets)]
+    progress.stage("Comparing targets", len(pairs))
+    try:
+        return map_pairs(_compare_installed, pairs, (mode, engine), workers, progress,
+                         initializer=_install, initargs=(source,))
+    finally:
+        _install(None)  # Without a pool the index was installed in this process
+
+
+def rank_targets(results):
+    """Results ordered from the best preserved target down."""
+    return sorted(results, key=lambda result: (_STATUS_RANK.get(result.status, 2), result.changed_chars,
+                                               result.differences, result.name))
+
+
+def preserved(result, source_length):
+    """Approximate share of the source's normalized characters that a target kept, or None."""
+    if result.status == STATUS_IDENTICAL:
+        return 1.0
+    if result.status != STATUS_DIFFERENT:
+        return None
+    # Never round a differing target up to 100%
+    return min(max(0.0, 1 - result.changed_chars / max(1, source_length)), 0.99999)
+
+
+def format_ranking(results, source_length):
+    """(header, rows) of a table of results, one row per result in the given order."""
+    width = max([len("Target")] + [len(result.name) for result in results])
+    header = (f"{'#':>3}  {'Target':<{width}}  {'Result':<9}  {'Preserved':>9}  {'Diffs':>6}  {'Changed':>8}  "
+              f"{'First difference':<18}  {'Time':>7}")
+    rows = []
+    for rank, result in enumerate(results, 1):
+        kept = preserved(result, source_length)
+        kept = "-" if kept is None else f"{kept:.3%}"
+        if result.line_a is not None:
+            first = f"A:{result.line_a} / B:{result.line_b}"
+        else:
+            first = result.error or ""
+        rows.append(f"{rank:>3}  {result.name:<{width}}  {result.status:<9}  {kept:>9}  {result.differences:>6}  "
+                    f"{result.changed_chars:>8}  {first:<18}  {result.seconds:>6.2f}s")
+    return header, rows
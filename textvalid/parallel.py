@@ -0,0 +1,220 @@
+"""Process-pool execution: normalize and diff large texts on all cores.
+
+Normalization is independent per character and the regions produced by
+chunking.plan_regions() are diffed independently, so both stages split
+cleanly across worker processes. Texts are handed over through shared
+memory and tasks only carry offsets; workers send back normalized pieces
+and opcodes, which are merged in order. A comparison that is cancelled
+sets a shared flag that its diff tasks check as they run, so workers stop
+rather than finish tasks nobody waits for.
+
+Originals are shared as UTF-8 (split on character boundaries) and
+normalized texts as UTF-32 so a region's slice is a fixed-width byte range.
+"""
+import multiprocessing
+import operator
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from itertools import repeat
+from multiprocessing import shared_memory
+
+from .chunking import chunked_opcodes, merge_equal_opcodes, plan_regions
+from .engine import OffsetMap, normalize_text
+from .progress import NULL_PROGRESS, Cancelled, Progress
+
+# Texts shorter than this are normalized in-process; the pool's overhead
+# would outweigh the gain.
+PARALLEL_MIN_CHARS = 1_000_000
+
+# Seconds between cancellation checks while waiting for a worker.
+_POLL_SECONDS = 0.1
+
+
+def _read(name, start, end):
+    """Bytes [start, end) of a shared memory segment.
+
+    The segment is unmapped again at once: a mapping kept after the parent
+    unlinked the segment would hold on to a whole copy of the text.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(shm.buf[start:end])
+    finally:
+        shm.close()
+
+
+def _normalize_slice(name, start, end):
+    """Worker: normalize bytes [start, end) of a shared UTF-8 buffer."""
+    text = _read(name, start, end).decode('utf-8')
+    norm, mapping = normalize_text(text)
+    return norm, mapping, len(text)
+
+
+class _FlagProgress(Progress):
+    """Worker-side Progress cancelled by the parent through a shared flag byte."""
+
+    def __init__(self, flag):
+        super().__init__()
+        self.flag = flag
+
+    def check(self):
+        if self.flag.buf[0]:
+            raise Cancelled()
+
+
+def _diff_region(name_a, name_b, flag_name, i1, i2, j1, j2, differ):
+    """Worker: diff region [i1, i2) x [j1, j2) of two shared UTF-32 buffers.
+
+    Raises Cancelled once the shared flag flag_name is set, or is gone
+    because the parent already gave up on the comparison.
+    """
+    try:
+        flag = shared_memory.SharedMemory(name=flag_name)
+    except FileNotFoundError:
+        raise Cancelled() from None
+    try:
+        progress = _FlagProgress(flag)
+        progress.check()
+        a = _read(name_a, 4 * i1, 4 * i2).decode('utf-32-le')
+        b = _read(name_b, 4 * j1, 4 * j2).decode('utf-32-le')
+        return [(tag, i1 + a1, i1 + a2, j1 + b1, j1 + b2)
+                for tag, a1, a2, b1, b2 in differ.opcodes(a, b, progress)]
+    finally:
+        flag.close()
+
+
+def _result(future, progress):
+    """future.result(), checking progress for cancellation while waiting."""
+    while True:
+        progress.check()
+        try:
+            return future.result(timeout=_POLL_SECONDS)
+        except FutureTimeout:
+            pass
+
+
+def _share(data):
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    shm.buf[:len(data)] = data
+    return shm
+
+
+def _release(shm):
+    shm.close()
+    shm.unlink()
+
+
+def _char_boundaries(data, parts):
+    """Split points in UTF-8 data, moved forward onto character starts."""
+    points = [0]
+    for k in range(1, parts):
+        p = len(data) * k // parts
+        while p < len(data) and (data[p] & 0xC0) == 0x80:
+            p += 1
+        if p > points[-1]:
+            points.append(p)
+    if points[-1] < len(data):
+        points.append(len(data))
+    return points
+
+
+def _join_maps(pieces, orig_length):
+    """Concatenate per-piece OffsetMaps into one map over the whole text."""
+    typecode = 'I' if orig_length < 2 ** 32 else 'Q'
+    norm_starts = array(typecode)
+    orig_starts = array(typecode)
+    norm_base = 0
+    orig_base = 0
+    for mapping, char_count in pieces:
+        norm_starts.extend(map(operator.add, mapping.norm_starts, repeat(norm_base)))
+        orig_starts.extend(map(operator.add, mapping.orig_starts, repeat(orig_base)))
+        norm_base += mapping.length
+        orig_base += char_count
+    return OffsetMap(norm_starts, orig_starts, norm_base, orig_length)
+
+
+class ParallelPool:
+    """A reusable process pool for normalizing and diffing large texts.
+
+    Use as a context manager, or call close() when done. workers defaults
+    to the number of CPUs.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        # spawn behaves the same on every platform and is safe to use from
+        # a process that already runs threads (the Tk app's worker).
+        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+    def warm_up(self):
+        """Start every worker process now rather than on first use."""
+        for future in [self._executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def normalize(self, text, progress=None):
+        """normalize_text(), split across the pool for large texts."""
+        progress = progress or NULL_PROGRESS
+        if len(text) < PARALLEL_MIN_CHARS or self.workers < 2:
+            return normalize_text(text)
+
+        data = text.encode('utf-8')
+        shm = _share(data)
+        futures = []
+        try:
+            points = _char_boundaries(data, self.workers * 2)
+            del data
+            futures = [self._executor.submit(_normalize_slice, shm.name, start, end)
+                       for start, end in zip(points, points[1:])]
+            pieces = [_result(future, progress) for future in futures]
+        finally:
+            for future in futures:
+                future.cancel()
+            _release(shm)
+        norm = "".join(piece[0] for piece in pieces)
+        return norm, _join_maps([(piece[1], piece[2]) for piece in pieces], len(text))
+
+    def chunked_opcodes(self, norm_a, norm_b, target_size, differ, progress=None):
+        """chunking.chunked_opcodes() with the differing regions diffed in the pool."""
+        progress = progress or NULL_PROGRESS
+        if self.workers < 2:
+            return chunked_opcodes(norm_a, norm_b, target_size, differ, progress)
+        regions, chunk_count = plan_regions(norm_a, norm_b, target_size, progress)
+
+        shm_a = _share(norm_a.encode('utf-32-le'))
+        shm_b = _share(norm_b.encode('utf-32-le'))
+        flag = _share(b"\0")
+        futures = []
+        try:
+            for equal, i1, i2, j1, j2 in regions:
+                if not equal:
+                    futures.append(self._executor.submit(_diff_region, shm_a.name, shm_b.name, flag.name,
+                                                         i1, i2, j1, j2, differ))
+            opcodes = []
+            pending = iter(futures)
+            for done, (equal, i1, i2, j1, j2) in enumerate(regions, 1):
+                if equal:
+                    opcodes.append(("equal", i1, i2, j1, j2))
+                else:
+                    opcodes.extend(_result(next(pending), progress))
+                progress.update(done, len(regions))
+        finally:
+            # Tasks already handed to a worker cannot be cancelled; the flag stops them
+            flag.buf[0] = 1
+            for future in futures:
+                future.cancel()
+            _release(flag)
+            _release(shm_a)
+            _release(shm_b)
+        return merge_equal_opcodes(opcodes), chunk_count
@@ -0,0 +1,81 @@
+"""Progress reporting and cancellation for long-running comparisons.
+
+The engine calls stage() when it moves to a new step, update() as it works
+through one, and check() at safe points; check() raises Cancelled once
+cancel() has been called, possibly from another thread. note() reports a
+count (characters normalized, opcodes, ...) for instrumentation.
+"""
+import threading
+import time
+
+
+class Cancelled(Exception):
+    """The comparison was cancelled through its Progress."""
+
+
+class Progress:
+    """Base progress sink: ignores updates but supports cancellation."""
+
+    def __init__(self):
+        self._cancel_event = threading.Event()
+
+    def stage(self, name, total=None):
+        """A new stage started; total is its number of steps if known."""
+
+    def update(self, done, total):
+        """done out of total steps of the current stage are finished."""
+
+    def note(self, name, value):
+        """Add value to the counter name; ignored unless instrumented."""
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check(self):
+        if self._cancel_event.is_set():
+            raise Cancelled()
+
+
+class QueueProgress(Progress):
+    """Forwards progress to a queue.Queue as ("progress", (stage, done, total)).
+
+    Updates within the same stage are throttled to whole percent steps so a
+    GUI polling the queue is not flooded.
+    """
+
+    def __init__(self, queue):
+        super().__init__()
+        self.queue = queue
+        self._stage = None
+        self._percent = -1
+
+    def stage(self, name, total=None):
+        self._stage = name
+        self._percent = -1
+        self.queue.put(("progress", (name, 0, total)))
+
+    def update(self, done, total):
+        percent = done * 100 // total if total else 100
+        if percent != self._percent:
+            self._percent = percent
+            self.queue.put(("progress", (self._stage, done, total)))
+
+
+class DeadlineProgress(Progress):
+    """Cancels the run once seconds have passed, at the next check()."""
+
+    def __init__(self, seconds):
+        super().__init__()
+        self.deadline = time.monotonic() + seconds
+
+    def check(self):
+        if time.monotonic() > self.deadline:
+            self.cancel()
+        super().check()
+
+
+NULL_PROGRESS = Progress()
@@ -0,0 +1,179 @@
+"""Side-by-side layout of a DiffResult as display rows, built without touching Tk.
+
+The GUI used to insert every segment into the Text panes separately and ask
+Tk for "end-1c" around each difference. Instead, RowModel describes each
+pane as display rows (offsets into the original text, long lines cut into
+ROW_WIDTH pieces, blank rows keeping both panes aligned), computed once by
+build_rows(). The GUI materialises only the rows around the viewport: one
+insert per window and one tag_add call per tag and batch of ranges, with Tk
+"line.column" indices computed here.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+
+from .engine import MODE_SUMMARY, Segment
+
+ROW_WIDTH = 1000  # Longest display row; longer lines are soft-segmented
+TAG_BATCH = 1000  # Ranges passed to a single Text.tag_add call
+# Rows a pane holds at a time; the GUI moves this window as the view scrolls.
+WINDOW_ROWS = 600
+
+# Characters split per step while laying out rows.
+_LAYOUT_BLOCK = 1 << 20
+
+# Tags used for each side of a segment.
+SEGMENT_TAGS = {
+    "ignored": ("header", "header"),
+    "equal": (None, None),
+    "replace": ("removed", "added"),
+    "delete": ("removed", None),
+    "insert": (None, "added"),
+    "changed": ("changed", "changed"),
+    "moved": ("moved", "moved"),
+}
+
+
+class RowModel:
+    """One pane's text as display rows.
+
+    Row k shows text[starts[k]:ends[k]]; alignment rows are empty. Tagged
+    stretches are kept as parallel (start, end, tag) lists in text order.
+    """
+
+    __slots__ = ("text", "starts", "ends", "tag_starts", "tag_ends", "tag_names")
+
+    def __init__(self, text, starts, ends, tag_starts, tag_ends, tag_names):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+        self.tag_starts = tag_starts
+        self.tag_ends = tag_ends
+        self.tag_names = tag_names
+
+    @classmethod
+    def for_text(cls, text, tag=None, width=ROW_WIDTH):
+        """Rows for a single text, optionally tagged as a whole."""
+        builder = _RowBuilder(text, width)
+        builder.add(0, len(text), tag)
+        return builder.finish()
+
+    def __len__(self):
+        return len(self.starts)
+
+    def position(self, offset, end=False):
+        """(row, column) of a text offset; with end=True an exclusive end offset
+        stays on the row it ends rather than moving to the next one."""
+        if end:
+            row = max(0, bisect_left(self.starts, offset) - 1)
+        else:
+            row = max(0, bisect_right(self.starts, offset) - 1)
+        return row, offset - self.starts[row]
+
+    def window(self, first, last, origin=None):
+        """Content of rows [first, last) and its tag ranges as Tk indices
+        counted from row origin (line 1; default first), so rows appended
+        below an earlier window are tagged in its coordinates."""
+        if origin is None:
+            origin = first
+        starts, ends, text = self.starts, self.ends, self.text
+        content = "\n".join([text[starts[k]:ends[k]] for k in range(first, last)])
+        tags = {}
+        if first >= last:
+            return content, tags
+        lo, hi = starts[first], ends[last - 1]
+        k = bisect_right(self.tag_ends, lo)
+        while k < len(self.tag_starts) and self.tag_starts[k] < hi:
+            start, end = max(self.tag_starts[k], lo), min(self.tag_ends[k], hi)
+            if start < end:
+                row1, col1 = self.position(start)
+                row2, col2 = self.position(end, end=True)
+                tags.setdefault(self.tag_names[k], []).extend(
+                    (f"{row1 - origin + 1}.{col1}", f"{row2 - origin + 1}.{col2}"))
+            k += 1
+        return content, tags
+
+
+class _RowBuilder:
+    """Lays out a pane's rows segment by segment."""
+
+    def __init__(self, text, width):
+        self.text = text
+        self.width = width
+        typecode = 'I' if len(text) < 2 ** 32 else 'Q'
+        self.starts = array(typecode)
+        self.ends = array(typecode)
+        self.tag_starts = array(typecode)
+        self.tag_ends = array(typecode)
+        self.tag_names = []
+        self.row_start = 0   # Start of the row being filled
+        self.position = 0    # End of the text laid out so far
+
+    def add(self, start, end, tag):
+        """Lay out text[start:end]; returns the number of rows it closed."""
+        if tag is not None and start < end:
+            self.tag_starts.append(start)
+            self.tag_ends.append(end)
+            self.tag_names.append(tag)
+        closed = len(self.starts)
+        for p in range(start, end, _LAYOUT_BLOCK):
+            q = min(end, p + _LAYOUT_BLOCK)
+            block = self.text[p:q]
+            newline = block.find('\n')
+            while newline >= 0:
+                self._close(p + newline)
+                self.row_start = p + newline + 1
+                newline = block.find('\n', newline + 1)
+            while q - self.row_start > self.width:
+                self._close(self.row_start + self.width)
+                self.row_start = self.ends[-1]
+        self.position = end
+        return len(self.starts) - closed
+
+    def _close(self, end):
+        row_start, width = self.row_start, self.width
+        while end - row_start > width:
+            self.starts.append(row_start)
+            self.ends.append(row_start + width)
+            row_start += width
+        self.starts.append(row_start)
+        self.ends.append(end)
+
+    def pad(self, rows):
+        """Break the current row and add blank rows: rows line breaks in all."""
+        if rows <= 0:
+            return
+        end = self.position
+        self.starts.append(self.row_start)
+        self.ends.append(end)
+        self.starts.extend([end] * (rows - 1))
+        self.ends.extend([end] * (rows - 1))
+        self.row_start = end
+
+    def finish(self):
+        self.starts.append(self.row_start)
+        self.ends.append(len(self.text))
+        return RowModel(self.text, self.starts, self.ends, self.tag_starts, self.tag_ends, self.tag_names)
+
+
+def _summary_segments(result):
+    """Segments for a summary-mode result: its regions, marked 'changed'."""
+    pos_a = pos_b = 0
+    for region in result.regions:
+        yield Segment("equal", pos_a, region.start_a, pos_b, region.start_b)
+        yield Segment("changed", region.start_a, region.end_a, region.start_b, region.end_b)
+        pos_a, pos_b = region.end_a, region.end_b
+    yield Segment("equal", pos_a, len(result.text_a), pos_b, len(result.text_b))
+
+
+def build_rows(result, width=ROW_WIDTH):
+    """Aligned (RowModel, RowModel) for both panes of a DiffResult."""
+    pane_a = _RowBuilder(result.text_a, width)
+    pane_b = _RowBuilder(result.text_b, width)
+    segments = _summary_segments(result) if result.mode == MODE_SUMMARY else result.segments()
+    for segment in segments:
+        tag_a, tag_b = SEGMENT_TAGS[segment.tag]
+        rows_a = pane_a.add(segment.start_a, segment.end_a, tag_a)
+        rows_b = pane_b.add(segment.start_b, segment.end_b, tag_b)
+        pane_a.pad(rows_b - rows_a)
+        pane_b.pad(rows_a - rows_b)
+    return pane_a.finish(), pane_b.finish()
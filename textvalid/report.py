@@ -0,0 +1,285 @@
+"""Machine-readable reports of a comparison, written as a stream.
+
+Four formats: JSON Lines (one record per difference, for pipelines), the
+same records as one JSON document, a unified-diff-style text (for review
+and archiving) and a standalone HTML page showing both sides. Each writer walks the differences of a DiffResult
+in text order and writes each one as soon as it is reached, so memory stays
+bounded however many differences there are: one hunk of nearby differences
+is held at a time, and the text shown for a single difference is capped.
+
+Positions are 1-based lines and columns of the original texts, as in
+verify.Mismatch.
+"""
+import html
+import json
+import os
+
+from .engine import MODE_SUMMARY
+from .progress import NULL_PROGRESS
+
+REPORT_FORMATS = ("jsonl", "json", "unified", "html")
+_EXTENSIONS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "json", ".diff": "unified", ".patch": "unified",
+               ".html": "html", ".htm": "html"}
+
+MAX_HUNK_CHARS = 2000  # Widest stretch of either text one hunk covers
+MAX_SHOWN_CHARS = 1000  # Text shown of one difference, unless a JSON report asks for more
+CONTEXT_CHARS = 80  # Unchanged text shown either side of a hunk within a long line
+_PROGRESS_STEP = 1000  # Differences written between progress updates
+
+
+def format_for_path(path):
+    """Report format implied by a file name's extension (unified when unknown)."""
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower(), "unified")
+
+
+def _location(lines, offset):
+    line, column = lines.position(offset)
+    return line, column + 1
+
+
+def _clip(text, limit):
+    """text cut to limit characters, and whether it was cut."""
+    if limit is None or len(text) <= limit:
+        return text, False
+    return text[:limit], True
+
+
+def _counted(result, progress):
+    """result.changes(), with progress updates and cancellation checks."""
+    total = len(result.regions) if result.mode == MODE_SUMMARY else None
+    progress.stage("Writing report", total)
+    for count, change in enumerate(result.changes(), 1):
+        if count % _PROGRESS_STEP == 0:
+            progress.check()
+            if total:
+                progress.update(count, total)
+        yield change
+
+
+def _hunks(result, progress):
+    """Lists of nearby differences: those on touching lines, within MAX_HUNK_CHARS.
+
+    A move, whose two places are apart, is a hunk of its own.
+    """
+    lines_a, lines_b = result.lines
+    hunk = []
+    last_a = last_b = 0
+    for change in _counted(result, progress):
+        if hunk and (change.tag == "moved" or hunk[0].tag == "moved"):
+            yield hunk
+            hunk = []
+        if hunk:
+            first = hunk[0]
+            near = (lines_a.line(change.start_a) <= last_a or lines_b.line(change.start_b) <= last_b)
+            small = (change.end_a - first.start_a <= MAX_HUNK_CHARS and change.end_b - first.start_b <= MAX_HUNK_CHARS)
+            if not (near and small):
+                yield hunk
+                hunk = []
+        hunk.append(change)
+        last_a = lines_a.line(max(change.start_a, change.end_a - 1))
+        last_b = lines_b.line(max(change.start_b, change.end_b - 1))
+    if hunk:
+        yield hunk
+
+
+def _excerpt(text, lines, spans):
+    """The lines around spans [(start, end), ...] of text, as (first_line, pieces).
+
+    pieces are (text, changed) pairs; lines longer than the context are
+    cut CONTEXT_CHARS from the hunk and marked with an ellipsis, and
+    changed pieces longer than MAX_SHOWN_CHARS are cut and say so.
+    """
+    start, end = spans[0][0], spans[-1][1]
+    first_line = lines.line(start)
+    line_start = lines.starts[first_line - 1]
+    line_end = text.find('\n', end)
+    if line_end < 0:
+        line_end = len(text)
+    pieces = []
+    if start - line_start > CONTEXT_CHARS:
+        line_start = start - CONTEXT_CHARS
+        pieces.append(("…", False))
+    position = line_start
+    for span_start, span_end in spans:
+        pieces.append((text[position:span_start], False))
+        shown, cut = _clip(text[span_start:span_end], MAX_SHOWN_CHARS)
+        if cut:
+            shown += f"…[{span_end - span_start - MAX_SHOWN_CHARS} more characters]"
+        pieces.append((shown, True))
+        position = span_end
+    pieces.append((text[position:min(line_end, position + CONTEXT_CHARS)], False))
+    if line_end - position > CONTEXT_CHARS:
+        pieces.append(("…", False))
+    return first_line, [piece for piece in pieces if piece[0]]
+
+
+def difference_records(result, max_chars=MAX_SHOWN_CHARS, progress=None):
+    """A JSON-ready dict per difference of result, in text order.
+
+    Difference texts are cut to max_chars (None: complete), since one
+    difference, or a summary-mode region, can span most of a file; a cut
+    text is flagged with "truncated". Summary-mode records also hold the
+    region's estimated "edits".
+    """
+    progress = progress or NULL_PROGRESS
+    lines_a, lines_b = result.lines
+
+    def side(text, lines, start, end):
+        line, column = _location(lines, start)
+        content, cut = _clip(text[start:end], max_chars)
+        record = {"start": start, "end": end, "line": line, "column": column, "text": content}
+        if cut:
+            record["truncated"] = True
+        return record
+
+    for count, (tag, start_a, end_a, start_b, end_b) in enumerate(_counted(result, progress), 1):
+        record = {"type": "difference", "index": count, "tag": tag,
+                  "source": side(result.text_a, lines_a, start_a, end_a),
+                  "target": side(result.text_b, lines_b, start_b, end_b)}
+        if result.mode == MODE_SUMMARY:
+            record["edits"] = result.regions[count - 1].edits
+        yield record
+
+
+def _header(result, source, target):
+    return {"type": "comparison", "source": source, "target": target, "mode": result.mode,
+            "identical": result.identical, "normalized_chars": [len(result.norm_a), len(result.norm_b)]}
+
+
+def _summed(records, summary):
+    """records, counted into summary as they pass: differences, changed and truncated texts."""
+    for record in records:
+        summary["differences"] += 1
+        summary["changed_chars"] += max(record["source"]["end"] - record["source"]["start"],
+                                        record["target"]["end"] - record["target"]["start"])
+        summary["truncated"] += "truncated" in record["source"] or "truncated" in record["target"]
+        yield record
+
+
+def write_jsonl(result, f, source="source", target="target", max_chars=MAX_SHOWN_CHARS, progress=None):
+    """One JSON object per line: a header, every difference, then a summary.
+
+    See difference_records() for max_chars; the summary counts the records
+    whose texts were cut. Returns the number of differences written.
+    """
+    f.write(json.dumps(_header(result, source, target), ensure_ascii=False) + "\n")
+    summary = {"type": "summary", "differences": 0, "changed_chars": 0, "truncated": 0}
+    for record in _summed(difference_records(result, max_chars, progress), summary):
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    f.write(json.dumps(summary) + "\n")
+    return summary["differences"]
+
+
+def write_json(result, f, source="source", target="target", max_chars=MAX_SHOWN_CHARS, progress=None):
+    """The records of write_jsonl() as one JSON object, still written one difference at a time.
+
+    {"comparison": header, "differences": [...], "summary": {...}}.
+    Returns the number of differences written.
+    """
+    f.write('{"comparison": ' + json.dumps(_header(result, source, target), ensure_ascii=False)
+            + ',\n"differences": [')
+    summary = {"type": "summary", "differences": 0, "changed_chars": 0, "truncated": 0}
+    separator = "\n"
+    for record in _summed(difference_records(result, max_chars, progress), summary):
+        f.write(separator + json.dumps(record, ensure_ascii=False))
+        separator = ",\n"
+    f.write('\n],\n"summary": ' + json.dumps(summary) + "}\n")
+    return summary["differences"]
+
+
+def _unified_lines(sign, first_line, pieces, open_mark, close_mark):
+    text = "".join(open_mark + piece + close_mark if changed else piece for piece, changed in pieces)
+    lines = text.split('\n')
+    return first_line, len(lines), "".join(f"{sign}{line}\n" for line in lines)
+
+
+def write_unified(result, f, source="source", target="target", progress=None):
+    """A unified-diff-style text: one hunk per group of nearby differences.
+
+    Each hunk shows the source lines ('-') and target lines ('+') holding
+    the differences, with the changed characters marked [-...-] and {+...+}
+    (lines that differ only in ignored characters are not hunks). The
+    header of a moved block's hunk ends in "moved". Returns the number of
+    hunks written.
+    """
+    progress = progress or NULL_PROGRESS
+    lines_a, lines_b = result.lines
+    f.write(f"--- {source}\n+++ {target}\n")
+    count = 0
+    for count, hunk in enumerate(_hunks(result, progress), 1):
+        line_a, span_a, removed = _unified_lines(
+            "-", *_excerpt(result.text_a, lines_a, [(change.start_a, change.end_a) for change in hunk]), "[-", "-]")
+        line_b, span_b, added = _unified_lines(
+            "+", *_excerpt(result.text_b, lines_b, [(change.start_b, change.end_b) for change in hunk]), "{+", "+}")
+        moved = " moved" if hunk[0].tag == "moved" else ""
+        f.write(f"@@ -{line_a},{span_a} +{line_b},{span_b} @@{moved}\n{removed}{added}")
+    return count
+
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html lang="zh">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: -apple-system, "Helvetica Neue", sans-serif; margin: 2em; color: #222; }}
+table {{ border-collapse: collapse; width: 100%; table-layout: fixed; }}
+th, td {{ border: 1px solid #ddd; padding: 6px 8px; vertical-align: top; }}
+th {{ background: #f5f5f5; text-align: left; }}
+td.n {{ width: 4em; color: #888; }}
+td.l {{ width: 5em; color: #888; }}
+td.t {{ font-family: Menlo, monospace; white-space: pre-wrap; word-break: break-all; }}
+del {{ background: #ffebe9; color: #cc0000; text-decoration: none; }}
+ins {{ background: #e6ffec; color: #1a7f37; text-decoration: none; }}
+mark {{ background: #fff8c4; color: #996600; }}
+tr.moved del, tr.moved ins {{ background: #e8eefc; color: #1f4fb5; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p>Source: <code>{source}</code><br>Target: <code>{target}</code><br>Mode: {mode} (punctuation, whitespace and
+control characters are ignored)</p>
+<table>
+<tr><th class="n">#</th><th class="l">Line</th><th>Source</th><th class="l">Line</th><th>Target</th></tr>
+"""
+
+
+def _html_cell(pieces, tag):
+    return "".join(f"<{tag}>{html.escape(piece)}</{tag}>" if changed else html.escape(piece)
+                   for piece, changed in pieces)
+
+
+def write_html(result, f, source="source", target="target", progress=None):
+    """A standalone HTML page listing every hunk side by side. Returns the number of hunks written."""
+    progress = progress or NULL_PROGRESS
+    lines_a, lines_b = result.lines
+    f.write(_HTML_HEAD.format(title="Text comparison report", source=html.escape(source),
+                              target=html.escape(target), mode=html.escape(result.mode)))
+    removed, added = ("mark", "mark") if result.mode == MODE_SUMMARY else ("del", "ins")
+    count = 0
+    for count, hunk in enumerate(_hunks(result, progress), 1):
+        line_a, pieces_a = _excerpt(result.text_a, lines_a, [(change.start_a, change.end_a) for change in hunk])
+        line_b, pieces_b = _excerpt(result.text_b, lines_b, [(change.start_b, change.end_b) for change in hunk])
+        moved = ' class="moved"' if hunk[0].tag == "moved" else ""
+        f.write(f'<tr{moved}><td class="n">{count}</td><td class="l">{line_a}</td>'
+                f'<td class="t">{_html_cell(pieces_a, removed)}</td><td class="l">{line_b}</td>'
+                f'<td class="t">{_html_cell(pieces_b, added)}</td></tr>\n')
+    f.write("</table>\n")
+    if result.identical:
+        f.write("<p><strong>Files are identical</strong> (ignoring punctuation/whitespace).</p>\n")
+    else:
+        f.write(f"<p><strong>Files are different:</strong> {count} places differ.</p>\n")
+    f.write("</body>\n</html>\n")
+    return count
+
+
+_WRITERS = {"jsonl": write_jsonl, "json": write_json, "unified": write_unified, "html": write_html}
+
+
+def export_report(result, path, fmt=None, source="source", target="target", progress=None):
+    """Write a report of result to path in fmt (default: from the extension); returns the count written."""
+    fmt = fmt or format_for_path(path)
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown report format: {fmt}")
+    with open(path, 'w', encoding='utf-8') as f:
+        return _WRITERS[fmt](result, f, source=source, target=target, progress=progress)
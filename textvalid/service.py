@@ -0,0 +1,426 @@
+"""HTTP validation service: ``python -m textvalid serve``.
+
+A pipeline can check every generated text by POSTing it, instead of
+running the desktop app or a process per check. Only the standard library
+is used: http.server handles each request on a thread that just parses
+JSON and waits, and the comparison itself (compare_texts(), as in the GUI)
+runs on a bounded pool of worker processes.
+
+- Backpressure: at most max_pending comparisons are queued or running (two
+  per worker by default, as in batch.map_pairs). A request beyond that is
+  refused at once with 503 and Retry-After rather than queued without
+  bound.
+- Timeouts: a comparison is cancelled through its Progress once the
+  request timeout (counted from its arrival, so time spent queued counts)
+  has passed, which frees its worker, and the request gets 504.
+- Warm sources: each worker keeps the multi.SourceIndex (normalization and
+  chunk index) of the sources it compared most recently, keyed by content,
+  or by path, modification time and size. Checking many generations
+  against the same source then skips re-normalizing it. Workers warm up
+  independently of each other. A source text the pool was sent recently
+  goes to the worker by its key only; a worker that does not have it
+  answers "need_source" and the job is sent again with the text.
+- Counters: GET /stats gives request counts, throughput, latency
+  percentiles over the most recent requests and source cache hits.
+
+POST /compare takes a JSON object with "source" or "source_path",
+"target" or "target_path", and optionally "mode", "engine",
+"max_differences" and "max_chars". Paths are only accepted below the root
+directory the service was started with. The answer lists the differences
+as report.difference_records() does, with texts cut to max_chars
+(MAX_SHOWN_CHARS unless the request says otherwise; null for complete
+texts).
+"""
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+
+from .cache import text_key
+from .diffing import DEFAULT_ENGINE, ENGINES
+from .engine import MODE_SUMMARY, MODES, SUMMARY_MODE_SIZE, compare_texts, read_text
+from .multi import SourceIndex
+from .progress import Cancelled, DeadlineProgress
+from .report import MAX_SHOWN_CHARS, difference_records
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+REQUEST_TIMEOUT = 30.0  # Seconds a comparison may run
+MAX_DIFFERENCES = 1000  # Differences listed per answer unless the request asks otherwise
+MAX_BODY_BYTES = 256 * 1024 * 1024  # 256MB - largest request accepted
+SOURCE_CACHE_ENTRIES = 4  # Sources each worker keeps normalized
+LATENCY_WINDOW = 1000  # Most recent requests the latency percentiles cover
+THROUGHPUT_WINDOW = 60.0  # Seconds the throughput is averaged over
+_GRACE = 5.0  # Extra seconds a worker gets to notice its deadline
+
+# A comparison for a worker. The source is source_text, or the file at
+# source_path; source_key names it in the worker's source cache, and with
+# neither text nor path the worker must already have it. deadline
+# is the time.time() by which the answer is due, time spent queued included.
+CompareJob = namedtuple("CompareJob", "source_key source_text source_path target_text target_path "
+                                      "mode engine max_differences max_chars deadline")
+
+# Per worker process: source key -> SourceIndex, least recently used first
+_sources = OrderedDict()
+_source_entries = SOURCE_CACHE_ENTRIES
+
+
+def _init_worker(entries):
+    global _source_entries
+    _source_entries = entries
+
+
+def _source_index(job):
+    """The SourceIndex of job's source, and whether it was already warm.
+
+    None if the job sent only the key of a source this worker does not have.
+    """
+    source = _sources.get(job.source_key)
+    if source is not None:
+        _sources.move_to_end(job.source_key)
+        return source, True
+    if job.source_text is None and job.source_path is None:
+        return None, False
+    source = SourceIndex(job.source_text) if job.source_path is None else SourceIndex.load(job.source_path)
+    _sources[job.source_key] = source
+    while len(_sources) > _source_entries:
+        _sources.popitem(last=False)
+    return source, False
+
+
+def run_job(job):
+    """Compare a CompareJob (in a worker process); returns the JSON-ready answer."""
+    started = time.perf_counter()
+    progress = DeadlineProgress(job.deadline - time.time())
+    source, warm = _source_index(job)
+    if source is None:
+        return {"need_source": True}
+    text_b = job.target_text if job.target_path is None else read_text(job.target_path)
+    mode = job.mode
+    if mode is None and source.size + len(text_b.encode('utf-8', 'surrogatepass')) > SUMMARY_MODE_SIZE:
+        mode = MODE_SUMMARY
+    try:
+        result = compare_texts(source.text, text_b, mode=mode, engine=job.engine, progress=progress, source=source)
+        listed = list(islice(difference_records(result, job.max_chars, progress), job.max_differences))
+    except Cancelled:
+        return {"timeout": True, "source_cache": "warm" if warm else "cold",
+                "seconds": time.perf_counter() - started}
+    count = changed = 0
+    for _, start_a, end_a, start_b, end_b in result.changes():
+        count += 1
+        changed += max(end_a - start_a, end_b - start_b)
+    return {"identical": result.identical, "mode": result.mode,
+            "normalized_chars": [len(result.norm_a), len(result.norm_b)],
+            "difference_count": count, "changed_chars": changed, "differences": listed,
+            "truncated": count > len(listed), "source_cache": "warm" if warm else "cold",
+            "seconds": time.perf_counter() - started}
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ServiceStats:
+    """Request counters, throughput and latency of a ValidationService; thread safe."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.counts = {"requests": 0, "identical": 0, "different": 0, "rejected": 0, "timeouts": 0, "errors": 0,
+                       "source_warm": 0, "source_cold": 0, "source_resent": 0}
+        self.in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._finished = deque()  # time.monotonic() of answers within THROUGHPUT_WINDOW
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def begin(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def end(self, seconds, outcome, source_cache=None):
+        """A comparison that reached the pool ended as outcome (a counter name) after seconds."""
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            self.counts[outcome] += 1
+            if source_cache is not None:
+                self.counts["source_" + source_cache] += 1
+            self._latencies.append(seconds)
+            self._finished.append(now)
+            self._expire(now)
+
+    def _expire(self, now):
+        while self._finished and self._finished[0] < now - THROUGHPUT_WINDOW:
+            self._finished.popleft()
+
+    def report(self):
+        """The counters as a JSON-ready dict; latencies in milliseconds."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            uptime = now - self.started
+            throughput = len(self._finished) / max(min(uptime, THROUGHPUT_WINDOW), 1e-9)
+            report = {"uptime_seconds": round(uptime, 3), **self.counts, "in_flight": self.in_flight,
+                      "throughput_per_second": round(throughput, 3)}
+            ordered = sorted(self._latencies)
+        if ordered:
+            report["latency_ms"] = {name: round(_percentile(ordered, fraction) * 1000, 3)
+                                    for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1))}
+            report["latency_ms"]["window"] = len(ordered)
+        return report
+
+
+class ValidationService:
+    """Runs comparison requests on a bounded process pool.
+
+    Use as a context manager, or call close() when done. workers defaults
+    to the number of CPUs and max_pending to two per worker. Requests may
+    name files below root; without a root only texts are accepted.
+    """
+
+    def __init__(self, workers=None, max_pending=None, timeout=REQUEST_TIMEOUT, source_entries=SOURCE_CACHE_ENTRIES,
+                 root=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.workers
+        self.timeout = timeout
+        self.source_entries = source_entries
+        self.root = os.path.realpath(root) if root else None
+        self.stats = ServiceStats()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = self._new_executor()
+        # Keys of the source texts sent to the pool most recently, oldest first
+        self._sent = OrderedDict()
+
+    def _new_executor(self):
+        # spawn, as in parallel.ParallelPool: safe from a process that runs threads
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(self.source_entries,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+    def warm_up(self):
+        """Start every worker process now rather than on the first requests."""
+        for future in [self._executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    # -- requests ----------------------------------------------------------
+
+    def _path(self, path):
+        if self.root is None:
+            raise ValueError("this service does not accept paths; start it with a root directory")
+        full = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([full, self.root]) != self.root:
+            raise ValueError(f"{path} is outside the service root")
+        return full
+
+    def _side(self, request, name):
+        """(text, path) of one side of a request; exactly one is given."""
+        text, path = request.get(name), request.get(name + "_path")
+        if (text is None) == (path is None):
+            raise ValueError(f'give either "{name}" or "{name}_path"')
+        if not isinstance(text if path is None else path, str):
+            raise ValueError(f'"{name}" and "{name}_path" must be strings')
+        return (text, None) if path is None else (None, self._path(path))
+
+    @staticmethod
+    def _limit(request, name, default):
+        value = request.get(name, default)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+            raise ValueError(f'"{name}" must be a non-negative integer')
+        return value
+
+    def job(self, request):
+        """The CompareJob of a decoded request; raises ValueError (or OSError) if it is not valid."""
+        if not isinstance(request, dict):
+            raise ValueError("expected a JSON object")
+        source_text, source_path = self._side(request, "source")
+        target_text, target_path = self._side(request, "target")
+        if source_path is None:
+            source_key = text_key(source_text)
+        else:
+            stat = os.stat(source_path)
+            source_key = f"{source_path}|{stat.st_mtime_ns}|{stat.st_size}"
+        mode = request.get("mode")
+        if mode is not None and (not isinstance(mode, str) or mode not in MODES):
+            raise ValueError(f"Unknown comparison mode: {mode!r}")
+        engine = request.get("engine")
+        if engine is None:
+            engine = DEFAULT_ENGINE
+        if not isinstance(engine, str) or engine not in ENGINES:
+            raise ValueError(f"Unknown diff engine: {engine!r}")
+        return CompareJob(source_key, source_text, source_path, target_text, target_path, mode, engine,
+                          self._limit(request, "max_differences", MAX_DIFFERENCES),
+                          self._limit(request, "max_chars", MAX_SHOWN_CHARS), time.time() + self.timeout)
+
+    def _restart(self, broken):
+        """Replace a pool whose worker died, unless another request already did."""
+        with self._lock:
+            if self._executor is broken:
+                logger.warning("A worker process died; restarting the pool")
+                self._executor = self._new_executor()
+                self._sent.clear()
+                broken.shutdown(wait=False, cancel_futures=True)
+
+    def _sent_before(self, key):
+        """Whether the source text under key was sent to the pool recently; records that it is sent now."""
+        with self._lock:
+            if key in self._sent:
+                self._sent.move_to_end(key)
+                return True
+            self._sent[key] = None
+            while len(self._sent) > self.workers * self.source_entries:
+                self._sent.popitem(last=False)
+            return False
+
+    def _wait(self, executor, job):
+        """Submit job, which holds a slot, and wait for its answer until its deadline."""
+        try:
+            future = executor.submit(run_job, job)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is freed when the worker is done, not when the request gives up
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=max(0.0, job.deadline - time.time()) + _GRACE)
+        except FutureTimeout:
+            future.cancel()
+            return {"timeout": True}
+
+    def _run(self, executor, job):
+        """The answer of job, sending its source text only if a worker needs it."""
+        if job.source_text is None or not self._sent_before(job.source_key):
+            return self._wait(executor, job)
+        answer = self._wait(executor, job._replace(source_text=None))
+        if not answer.get("need_source"):
+            return answer
+        self.stats.count("source_resent")
+        if not self._slots.acquire(timeout=max(0.0, job.deadline - time.time())):
+            return {"timeout": True}
+        return self._wait(executor, job)
+
+    def compare(self, request):
+        """(HTTPStatus, JSON-ready answer) for a decoded comparison request."""
+        started = time.perf_counter()
+        self.stats.count("requests")
+        try:
+            job = self.job(request)
+        except (OSError, ValueError) as e:
+            self.stats.count("errors")
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        if not self._slots.acquire(blocking=False):
+            self.stats.count("rejected")
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "too many comparisons in progress; retry later"}
+
+        self.stats.begin()
+        status, outcome = HTTPStatus.INTERNAL_SERVER_ERROR, "errors"
+        with self._lock:
+            executor = self._executor
+        try:
+            answer = self._run(executor, job)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            status, answer = HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except BrokenProcessPool:
+            self._restart(executor)
+            answer = {"error": "a worker process died; retry"}
+        except Exception as e:
+            logger.exception("Comparison failed")
+            answer = {"error": f"comparison failed: {e}"}
+        else:
+            status = HTTPStatus.OK
+            outcome = "identical" if answer.get("identical") else "different"
+        if answer.get("timeout"):
+            status, outcome = HTTPStatus.GATEWAY_TIMEOUT, "timeouts"
+            answer["error"] = f"comparison took longer than {self.timeout:g}s"
+        self.stats.end(time.perf_counter() - started, outcome, answer.get("source_cache"))
+        return status, answer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "textvalid"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(HTTPStatus.OK, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send(HTTPStatus.OK, self.server.service.stats.report())
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"no such endpoint: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/compare":
+            self.close_connection = True
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"no such endpoint: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self.close_connection = True
+            self._send(HTTPStatus.LENGTH_REQUIRED, {"error": "Content-Length is required"})
+            return
+        if length < 0:
+            self.close_connection = True
+            self._send(HTTPStatus.BAD_REQUEST, {"error": "Content-Length must not be negative"})
+            return
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": f"requests are limited to {MAX_BODY_BYTES} bytes"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+        except (UnicodeDecodeError, ValueError) as e:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": f"invalid JSON: {e}"})
+            return
+        status, answer = self.server.service.compare(request)
+        self._send(status, answer)
+
+    def _send(self, status, answer):
+        try:
+            data = json.dumps(answer, ensure_ascii=False).encode('utf-8')
+        except UnicodeEncodeError:
+            # A lone surrogate (sent as a \u escape) has no UTF-8 form; escape it again
+            data = json.dumps(answer).encode('ascii')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 128  # Connections the OS holds while every handler thread is busy
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """An HTTP server answering requests with service; port 0 picks a free port."""
+    server = _Server((host, port), _Handler)
+    server.service = service
+    return server
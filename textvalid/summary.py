@@ -0,0 +1,91 @@
+"""Difference summaries for texts too large to diff in full.
+
+Both normalized texts are cut into small content-defined chunks and the
+chunk hashes aligned (see chunking.plan_regions), which takes close to
+linear time. Every region that did not align is then trimmed of its common
+prefix and suffix; small remainders are diffed exactly, larger ones are
+estimated from their length, so one inserted character counts as one edit
+rather than shifting everything after it.
+"""
+from collections import namedtuple
+
+from .chunking import plan_regions
+from .diffing import MyersEngine, _backward_match, _forward_match
+from .lines import LineIndex
+from .progress import NULL_PROGRESS
+
+SUMMARY_CHUNK_SIZE = 4096  # Target chunk size; smaller means tighter regions
+
+# Remainders up to this many characters (each side) are diffed exactly.
+_EXACT_SIZE = 256 * 1024
+
+# A stretch of the original texts containing differences, with 1-based
+# start lines and the estimated number of characters changed.
+SummaryRegion = namedtuple("SummaryRegion", "start_a end_a start_b end_b line_a line_b edits")
+
+
+def _trim(norm_a, norm_b, i1, i2, j1, j2):
+    """Shrink a region by its common prefix and suffix."""
+    prefix = _forward_match(norm_a, i1, i2, norm_b, j1, j2)
+    i1 += prefix
+    j1 += prefix
+    suffix = _backward_match(norm_a, i1, i2, norm_b, j1, j2)
+    return i1, i2 - suffix, j1, j2 - suffix
+
+
+def estimate_edits(a, b, differ=None):
+    """Characters changed between a and b: exact for short strings, else an upper bound."""
+    if len(a) > _EXACT_SIZE or len(b) > _EXACT_SIZE:
+        return max(len(a), len(b))
+    differ = differ or MyersEngine()
+    return sum(max(i2 - i1, j2 - j1) for tag, i1, i2, j1, j2 in differ.opcodes(a, b) if tag != "equal")
+
+
+def summarize(text_a, text_b, norm_a, norm_b, map_a, map_b, chunk_size=SUMMARY_CHUNK_SIZE, progress=None,
+              source=None):
+    """List the regions where two normalized texts differ.
+
+    source is the chunking.SourceChunks of norm_a for chunk_size, if
+    already built. Returns SummaryRegions in order, with offsets in the
+    original texts.
+    """
+    progress = progress or NULL_PROGRESS
+    plan, _ = plan_regions(norm_a, norm_b, chunk_size, progress, source)
+    differ = MyersEngine()
+
+    # Merge consecutive differing pieces back into one region each
+    groups = []
+    previous_equal = True
+    for equal, i1, i2, j1, j2 in plan:
+        if not equal:
+            if previous_equal:
+                groups.append([])
+            groups[-1].append((i1, i2, j1, j2))
+        previous_equal = equal
+
+    regions = []
+    lines_a = lines_b = None
+    for done, pieces in enumerate(groups, 1):
+        progress.check()
+        edits = 0
+        for i1, i2, j1, j2 in pieces:
+            i1, i2, j1, j2 = _trim(norm_a, norm_b, i1, i2, j1, j2)
+            edits += estimate_edits(norm_a[i1:i2], norm_b[j1:j2], differ)
+        i1, i2, j1, j2 = _trim(norm_a, norm_b, pieces[0][0], pieces[-1][1], pieces[0][2], pieces[-1][3])
+        if not edits:
+            continue
+        start_a, end_a = map_a.span(i1, i2)
+        start_b, end_b = map_b.span(j1, j2)
+        if lines_a is None:
+            lines_a, lines_b = LineIndex(text_a), LineIndex(text_b)
+        regions.append(SummaryRegion(start_a, end_a, start_b, end_b, lines_a.line(start_a), lines_b.line(start_b),
+                                     edits))
+        progress.update(done, len(groups))
+    return regions
+
+
+def describe_region(region):
+    """One-line, human readable description of a SummaryRegion."""
+    return (f"[Line A:{region.line_a} / B:{region.line_b}] [DIFFERENCE] "
+            f"~{region.edits} characters changed "
+            f"({region.end_a - region.start_a} chars in source, {region.end_b - region.start_b} in target)")
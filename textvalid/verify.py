@@ -0,0 +1,145 @@
+"""Streaming verification: are two files identical after normalization?
+
+Both files are decoded block by block, each block is normalized on its own
+(normalization is per character, so block edges do not matter) and the two
+normalized streams are compared as they are produced. The first mismatch
+stops the run, and memory stays at about one block per file however large
+the files are.
+"""
+import codecs
+import os
+from collections import namedtuple
+
+from .engine import normalize_text, strip_ignored
+from .progress import NULL_PROGRESS
+
+BLOCK_SIZE = 1024 * 1024  # Bytes read from each file at a time
+
+# Characters of original text shown after the mismatch position.
+_CONTEXT = 20
+
+# Where two files first differ. Lines and columns are 1-based and columns
+# count characters. char_a/char_b are the first differing kept characters,
+# or None when that file ended first; context_a/context_b hold the original
+# text from that point to the end of its line.
+Mismatch = namedtuple("Mismatch", "offset line_a column_a line_b column_b char_a char_b context_a context_b")
+
+
+class _NormalizedReader:
+    """Reads a file as a series of normalized blocks, tracking line/column."""
+
+    def __init__(self, f, block_size):
+        self._file = f
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._block_size = block_size
+        self.text = ""     # Original text of the current block
+        self.norm = ""     # Its normalized form
+        self.pos = 0       # Next unmatched character of norm
+        self.line = 1      # Line and column of text[0]
+        self.column = 1
+        self.bytes_read = 0
+        self.eof = False
+
+    def fill(self):
+        """Make sure norm[pos:] is not empty unless the file has ended."""
+        while self.pos >= len(self.norm) and not self.eof:
+            self._advance(self.text)
+            data = self._file.read(self._block_size)
+            self.bytes_read += len(data)
+            self.eof = not data
+            self.text = self._decoder.decode(data, final=self.eof)
+            self.norm = strip_ignored(self.text)
+            self.pos = 0
+        return self.pos < len(self.norm)
+
+    def _advance(self, text):
+        newlines = text.count('\n')
+        if newlines:
+            self.line += newlines
+            self.column = len(text) - text.rfind('\n')
+        else:
+            self.column += len(text)
+
+    def location(self, offset):
+        """Line and column of text[offset] within the current block."""
+        newlines = self.text.count('\n', 0, offset)
+        if not newlines:
+            return self.line, self.column + offset
+        return self.line + newlines, offset - self.text.rfind('\n', 0, offset)
+
+    def describe(self, i):
+        """(line, column, char, context) for norm[i], or for the end of file."""
+        if i >= len(self.norm):
+            line, column = self.location(len(self.text))
+            return line, column, None, ""
+        # Only the block holding the mismatch needs an offset map
+        offset = normalize_text(self.text)[1][i]
+        line, column = self.location(offset)
+        return line, column, self.norm[i], self.text[offset:offset + _CONTEXT].split('\n', 1)[0]
+
+
+def _common_prefix_length(a, b):
+    """Length of the common prefix of two strings, by bisecting slice compares."""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def verify_streams(file_a, file_b, block_size=BLOCK_SIZE, progress=None, total=None):
+    """verify_files() for binary file objects; total (bytes of file_a) drives progress."""
+    progress = progress or NULL_PROGRESS
+    reader_a = _NormalizedReader(file_a, block_size)
+    reader_b = _NormalizedReader(file_b, block_size)
+    offset = 0
+    while True:
+        progress.check()
+        has_a = reader_a.fill()
+        has_b = reader_b.fill()
+        if total:
+            progress.update(min(reader_a.bytes_read, total), total)
+        if not has_a and not has_b:
+            return None
+        if has_a and has_b:
+            n = min(len(reader_a.norm) - reader_a.pos, len(reader_b.norm) - reader_b.pos)
+            part_a = reader_a.norm[reader_a.pos:reader_a.pos + n]
+            part_b = reader_b.norm[reader_b.pos:reader_b.pos + n]
+            if part_a == part_b:
+                reader_a.pos += n
+                reader_b.pos += n
+                offset += n
+                continue
+            same = _common_prefix_length(part_a, part_b)
+            reader_a.pos += same
+            reader_b.pos += same
+            offset += same
+        line_a, column_a, char_a, context_a = reader_a.describe(reader_a.pos)
+        line_b, column_b, char_b, context_b = reader_b.describe(reader_b.pos)
+        return Mismatch(offset, line_a, column_a, line_b, column_b, char_a, char_b, context_a, context_b)
+
+
+def verify_files(path_a, path_b, block_size=BLOCK_SIZE, progress=None):
+    """Check whether two UTF-8 files are identical ignoring punctuation,
+    whitespace and control characters.
+
+    Returns None when they are, otherwise the first Mismatch. Only
+    block_size bytes of each file are held at a time.
+    """
+    progress = progress or NULL_PROGRESS
+    total = os.path.getsize(path_a)
+    progress.stage("Verifying", total)
+    with open(path_a, 'rb') as file_a, open(path_b, 'rb') as file_b:
+        return verify_streams(file_a, file_b, block_size, progress, total)
+
+
+def describe_mismatch(mismatch):
+    """One-line, human readable description of a Mismatch."""
+    found_a = repr(mismatch.char_a) if mismatch.char_a is not None else "end of file"
+    found_b = repr(mismatch.char_b) if mismatch.char_b is not None else "end of file"
+    return (f"[Line A:{mismatch.line_a} Col:{mismatch.column_a} / B:{mismatch.line_b} Col:{mismatch.column_b}] "
+            f"[MISMATCH] Source has {found_a}, target has {found_b} "
+            f"(source: '{mismatch.context_a}', target: '{mismatch.context_b}')")
@@ -0,0 +1,194 @@
+"""Watch a pair of files and update their comparison incrementally.
+
+FileWatcher polls the files' modification time and size; no OS
+notification service is needed. When a file changes, update_result()
+derives the new DiffResult from the previous one instead of starting over:
+
+1. The edited stretch of the original text is found by trimming the
+   common prefix and suffix of the old and new text.
+2. Only that stretch is normalized; the normalized text and OffsetMap
+   around it are reused (the map's runs after the edit are shifted).
+3. Opcodes entirely before or after the edit are kept, and only the
+   stretch between them is diffed again.
+
+So the work follows the size of the edit rather than the size of the
+files, apart from the linear reading, comparing and run-shifting that run
+in C. Summary-mode results are recomputed from scratch.
+"""
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+
+from .chunking import merge_equal_opcodes
+from .diffing import _backward_match, _forward_match, get_engine
+from .engine import MODE_SUMMARY, DiffResult, OffsetMap, compare_texts, normalize_text
+from .moves import find_moves, unmark_moves
+from .progress import NULL_PROGRESS
+
+POLL_INTERVAL = 1.0  # Seconds between checks in watch loops
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class FileWatcher:
+    """Notices when any of a set of files is modified, by polling.
+
+    A change is only reported once the file's stamp is the same on two
+    polls in a row, so a file still being written is not read half-way.
+    """
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self._reported = {path: _stamp(path) for path in self.paths}
+        self._seen = dict(self._reported)
+
+    def changed(self):
+        """Paths modified since the last call that have settled since."""
+        changed = []
+        for path in self.paths:
+            stamp = _stamp(path)
+            if stamp != self._reported[path] and stamp == self._seen[path] and stamp is not None:
+                self._reported[path] = stamp
+                changed.append(path)
+            self._seen[path] = stamp
+        return changed
+
+
+def changed_span(old, new):
+    """(start, old_end, new_end): old[start:old_end] became new[start:new_end]."""
+    start = _forward_match(old, 0, len(old), new, 0, len(new))
+    suffix = _backward_match(old, start, len(old), new, start, len(new))
+    return start, len(old) - suffix, len(new) - suffix
+
+
+def _normalized_offset(mapping, offset):
+    """Number of normalized characters whose original offset is below offset."""
+    k = bisect_right(mapping.orig_starts, offset) - 1
+    if k < 0:
+        return 0
+    run_end = mapping.norm_starts[k + 1] if k + 1 < len(mapping.norm_starts) else mapping.length
+    return min(mapping.norm_starts[k] + offset - mapping.orig_starts[k], run_end)
+
+
+def _shifted(values, delta):
+    return values if not delta else array(values.typecode, map(delta.__add__, values))
+
+
+def renormalize(old_text, new_text, norm, mapping):
+    """Update (norm, mapping) of old_text for new_text by normalizing only the edit.
+
+    Returns (new_norm, new_mapping, (n1, n2_old, n2_new)): normalized
+    characters norm[n1:n2_old] were replaced by new_norm[n1:n2_new].
+    """
+    start, old_end, new_end = changed_span(old_text, new_text)
+    n1 = _normalized_offset(mapping, start)
+    n2 = _normalized_offset(mapping, old_end)
+    mid_norm, mid_map = normalize_text(new_text[start:new_end])
+    new_norm = norm[:n1] + mid_norm + norm[n2:]
+    n2_new = n1 + len(mid_norm)
+
+    typecode = 'I' if len(new_text) < 2 ** 32 else 'Q'
+    norm_starts = array(typecode)
+    orig_starts = array(typecode)
+    # Runs before the edit, the last one cut at its start
+    k = bisect_left(mapping.norm_starts, n1)
+    norm_starts.extend(mapping.norm_starts[:k])
+    orig_starts.extend(mapping.orig_starts[:k])
+    # Runs of the re-normalized stretch
+    norm_starts.extend(_shifted(array(typecode, mid_map.norm_starts), n1))
+    orig_starts.extend(_shifted(array(typecode, mid_map.orig_starts), start))
+    # Runs after the edit, the first one cut at its end
+    if n2 < len(norm):
+        k = bisect_right(mapping.norm_starts, n2) - 1
+        norm_starts.append(n2_new)
+        orig_starts.append(mapping.orig_starts[k] + n2 - mapping.norm_starts[k] + new_end - old_end)
+        norm_starts.extend(_shifted(mapping.norm_starts[k + 1:], n2_new - n2))
+        orig_starts.extend(_shifted(mapping.orig_starts[k + 1:], new_end - old_end))
+    return new_norm, OffsetMap(norm_starts, orig_starts, len(new_norm), len(new_text)), (n1, n2, n2_new)
+
+
+def _reusable_opcodes(opcodes, edit_a, edit_b):
+    """Split opcodes into those before both edits, the stretch to re-diff, and those after.
+
+    edit_a and edit_b are (n1, n2_old, n2_new) normalized edit ranges; an
+    unchanged side passes (len, 0, 0) so it constrains neither end.
+    Returns (head, (i1, i2, j1, j2) in old coordinates, tail in new
+    coordinates).
+    """
+    a1, a2, a2_new = edit_a
+    b1, b2, b2_new = edit_b
+    head = []
+    cut_a = cut_b = 0
+    for index, (tag, i1, i2, j1, j2) in enumerate(opcodes):
+        if i2 <= a1 and j2 <= b1:
+            head.append((tag, i1, i2, j1, j2))
+            cut_a, cut_b = i2, j2
+            continue
+        # Keep the part of an equal run in front of the edits
+        k = max(0, min(a1 - i1, b1 - j1)) if tag == "equal" else 0
+        if k:
+            head.append(("equal", i1, i1 + k, j1, j1 + k))
+        cut_a, cut_b = i1 + k, j1 + k
+        break
+    else:
+        index = len(opcodes)
+
+    tail = []
+    end_a, end_b = cut_a, cut_b
+    delta_a, delta_b = a2_new - a2, b2_new - b2
+    for tag, i1, i2, j1, j2 in reversed(opcodes[index:]):
+        if i1 >= max(a2, cut_a) and j1 >= max(b2, cut_b):
+            tail.append((tag, i1 + delta_a, i2 + delta_a, j1 + delta_b, j2 + delta_b))
+            end_a, end_b = i1, j1
+            continue
+        # Keep the part of an equal run behind the edits
+        k = max(0, min(i2 - a2, j2 - b2, i2 - cut_a, j2 - cut_b)) if tag == "equal" else 0
+        if k:
+            tail.append(("equal", i2 - k + delta_a, i2 + delta_a, j2 - k + delta_b, j2 + delta_b))
+        end_a, end_b = i2 - k, j2 - k
+        break
+    tail.reverse()
+    return head, (cut_a, end_a, cut_b, end_b), tail
+
+
+def update_result(result, text_a, text_b, engine=None, progress=None):
+    """The DiffResult for (text_a, text_b), reusing result where the texts did not change."""
+    progress = progress or NULL_PROGRESS
+    if result.mode == MODE_SUMMARY:
+        return compare_texts(text_a, text_b, mode=MODE_SUMMARY, engine=engine, progress=progress)
+    differ = get_engine(engine)
+
+    progress.stage("Normalizing changes", 2)
+    if text_a == result.text_a:
+        norm_a, map_a, edit_a = result.norm_a, result.map_a, (len(result.norm_a), 0, 0)
+    else:
+        norm_a, map_a, edit_a = renormalize(result.text_a, text_a, result.norm_a, result.map_a)
+    progress.update(1, 2)
+    if text_b == result.text_b:
+        norm_b, map_b, edit_b = result.norm_b, result.map_b, (len(result.norm_b), 0, 0)
+    else:
+        norm_b, map_b, edit_b = renormalize(result.text_b, text_b, result.norm_b, result.map_b)
+    progress.update(2, 2)
+    progress.check()
+
+    head, (i1, i2, j1, j2), tail = _reusable_opcodes(unmark_moves(result.opcodes), edit_a, edit_b)
+    # The re-diffed stretch in new coordinates
+    i2 += edit_a[2] - edit_a[1]
+    j2 += edit_b[2] - edit_b[1]
+    progress.stage("Diffing changes")
+    progress.note("rediffed_chars", (i2 - i1) + (j2 - j1))
+    middle = [(tag, i1 + a1, i1 + a2, j1 + b1, j1 + b2)
+              for tag, a1, a2, b1, b2 in differ.opcodes(norm_a[i1:i2], norm_b[j1:j2], progress)]
+    opcodes = merge_equal_opcodes(head + middle + tail)
+    if norm_a == norm_b:
+        opcodes = [("equal", 0, len(norm_a), 0, len(norm_b))] if norm_a else []
+    # Either half of a move may have been edited: pair them up again
+    opcodes, moves = find_moves(norm_a, norm_b, opcodes, progress)
+    return DiffResult(text_a, text_b, norm_a, norm_b, map_a, map_b, opcodes, result.mode, chunks=result.chunks,
+                      moves=moves)